@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark dei motori di normalizzazione ISBN
+
+Confronta la catena pandas (_normalizza_serie_pandas) con il motore
+bytes.translate (_normalizza_serie_translate) su colonne di ISBN casuali
+scritti come negli export (trattini, spazi, 'x' minuscola, celle vuote),
+e verifica che i risultati coincidano.
+
+Uso:
+    python benchmarks/bench_normalizza.py [righe ...]
+"""
+import random
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import AppConfig  # noqa: E402
+from utils import _normalizza_serie_pandas, _normalizza_serie_translate  # noqa: E402
+
+
+def colonna_isbn(righe: int, seme: int = 26) -> pd.Series:
+    """Colonna di ISBN casuali con la varietà di formati di un export reale"""
+    rng = random.Random(seme)
+    valori = []
+    for _ in range(righe):
+        cifre = "978" + "".join(rng.choice("0123456789") for _ in range(9)) + rng.choice("0123456789X")
+        forma = rng.random()
+        if forma < 0.05:
+            valori.append(None)
+        elif forma < 0.35:
+            valori.append(f"{cifre[:3]}-{cifre[3:5]}-{cifre[5:10]}-{cifre[10:12]}-{cifre[12:]}")
+        elif forma < 0.45:
+            valori.append(f" {cifre.lower()} ")
+        else:
+            valori.append(cifre)
+    return pd.Series(valori, dtype=object)
+
+
+def misura(funzione, ripetizioni: int) -> float:
+    """Tempo migliore di una chiamata, in millisecondi"""
+    return min(timeit.repeat(funzione, number=1, repeat=ripetizioni)) * 1000
+
+
+def main(dimensioni) -> None:
+    config = AppConfig()
+    print(f"{'righe':>10} {'pandas (ms)':>12} {'translate (ms)':>15} {'rapporto':>9}  uguali")
+    for righe in dimensioni:
+        serie = colonna_isbn(righe)
+        ripetizioni = 5 if righe <= 100_000 else 2
+        t_pandas = misura(lambda: _normalizza_serie_pandas(serie, config), ripetizioni)
+        t_translate = misura(lambda: _normalizza_serie_translate(serie), ripetizioni)
+        uguali = _normalizza_serie_translate(serie).equals(_normalizza_serie_pandas(serie, config))
+        print(f"{righe:>10} {t_pandas:>12.1f} {t_translate:>15.1f} {t_pandas / t_translate:>8.1f}x  {uguali}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark della lettura della colonna ISBN di un file di confronto .xlsx
+
+Crea un catalogo di prova (righe x colonne, ISBN nella prima colonna) e
+misura la lettura della sola colonna ISBN con:
+
+    - il lettore in streaming (xlsx_stream.LettoreXlsx)
+    - openpyxl tramite pd.ExcelFile.parse(usecols=...)
+    - pd.read_excel(usecols=...)
+
+verificando che le chiavi estratte coincidano.
+
+Uso:
+    python benchmarks/bench_xlsx_stream.py [righe] [colonne] [--file catalogo.xlsx]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import AppConfig  # noqa: E402
+from utils import estrai_chiavi_isbn  # noqa: E402
+from xlsx_stream import LettoreXlsx  # noqa: E402
+
+
+def crea_catalogo(path: Path, righe: int, colonne: int, seme: int = 30) -> None:
+    """Catalogo con ISBN (testo) nella prima colonna e colonne di testo e numeri"""
+    rng = random.Random(seme)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Catalogo")
+    ws.append(["ISBN"] + [f"Campo {i}" for i in range(1, colonne)])
+    for n in range(righe):
+        isbn = "978" + "".join(rng.choice("0123456789") for _ in range(10))
+        altri = [f"titolo {n}" if i % 2 else rng.random() * 100 for i in range(1, colonne)]
+        ws.append([isbn] + altri)
+    wb.save(path)
+
+
+def cronometra(etichetta: str, funzione):
+    inizio = time.perf_counter()
+    risultato = funzione()
+    print(f"  {etichetta:<26} {time.perf_counter() - inizio:>7.1f} s")
+    return risultato
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('righe', type=int, nargs='?', default=200_000)
+    parser.add_argument('colonne', type=int, nargs='?', default=11)
+    parser.add_argument('--file', help="Catalogo esistente da usare (ISBN nella prima colonna)")
+    args = parser.parse_args()
+    config = AppConfig()
+
+    with tempfile.TemporaryDirectory() as cartella:
+        if args.file:
+            path = Path(args.file)
+        else:
+            path = Path(cartella) / "catalogo.xlsx"
+            print(f"Creazione catalogo {args.righe} righe x {args.colonne} colonne...")
+            crea_catalogo(path, args.righe, args.colonne)
+
+        print(f"Lettura colonna ISBN di {path.name}:")
+        with LettoreXlsx(path) as lettore:
+            foglio = lettore.sheet_names[0]
+            streaming = cronometra("lettore in streaming", lambda: lettore.colonna(foglio, 0, 0))
+        with pd.ExcelFile(path) as xls:
+            openpyxl = cronometra(
+                "openpyxl (ExcelFile)", lambda: xls.parse(xls.sheet_names[0], usecols=[0], dtype=str).iloc[:, 0]
+            )
+        read_excel = cronometra(
+            "pd.read_excel(usecols)", lambda: pd.read_excel(path, usecols=[0], dtype=str).iloc[:, 0]
+        )
+
+        chiavi = [estrai_chiavi_isbn(s, config).tolist() for s in (streaming, openpyxl, read_excel)]
+        print(f"Chiavi uguali: {chiavi[0] == chiavi[1] == chiavi[2]} ({len(chiavi[0])} ISBN)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Filtro di Bloom per ISBN (prefiltro probabilistico)
+
+Costruito dal lato catalogo, occupa pochi bit per ISBN e risponde
+"sicuramente assente" o "forse presente" con un tasso di falsi positivi
+configurabile. Nel confronto con un indice molto grande serve a scartare
+subito i candidati assenti: la conferma esatta (ricerca binaria
+sull'indice) viene fatta solo per quelli che passano il filtro.
+
+Gli ISBN vengono codificati in uint64 (utils.codifica_chiavi_isbn) e
+mescolati con splitmix64: l'hash non dipende da versioni di Python o
+pandas, quindi un filtro salvato su disco resta valido ovunque.
+
+Formato file:
+    MAGIC (8 byte) | lunghezza intestazione (uint32 LE) | intestazione JSON
+    | padding fino a multiplo di 64 | bit (n_bit / 8 byte)
+"""
+import json
+import math
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from utils import codifica_chiavi_isbn
+
+
+MAGIC = b'ISBNBLM1'
+VERSIONE = 1
+ALLINEAMENTO = 64
+BLOCCO_CHIAVI = 1 << 20
+
+_C1 = np.uint64(0x9E3779B97F4A7C15)
+_C2 = np.uint64(0xBF58476D1CE4E5B9)
+_C3 = np.uint64(0x94D049BB133111EB)
+_SEME_H2 = np.uint64(0x5851F42D4C957F2D)
+
+
+class FiltroNonValido(Exception):
+    """Il file non è un filtro di Bloom ISBN valido"""
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Mescolatore splitmix64 vettorizzato (aritmetica modulo 2^64)."""
+    with np.errstate(over='ignore'):
+        z = x + _C1
+        z = (z ^ (z >> np.uint64(30))) * _C2
+        z = (z ^ (z >> np.uint64(27))) * _C3
+        return z ^ (z >> np.uint64(31))
+
+
+def dimensiona_filtro(n_elementi: int, tasso_fp: float) -> tuple:
+    """
+    Calcola numero di bit e di funzioni hash ottimali.
+
+    Returns:
+        Tupla (n_bit, n_hash)
+    """
+    n_elementi = max(n_elementi, 1)
+    n_bit = math.ceil(-n_elementi * math.log(tasso_fp) / (math.log(2) ** 2))
+    n_bit = max(64, (n_bit + 63) // 64 * 64)
+    n_hash = max(1, round(n_bit / n_elementi * math.log(2)))
+    return n_bit, n_hash
+
+
+class FiltroBloom:
+    """
+    Filtro di Bloom su ISBN normalizzati.
+
+    Esempio:
+        >>> filtro = FiltroBloom.per_capacita(1_000_000, 0.01)
+        >>> filtro.aggiungi(["9788804668237"])
+        >>> filtro.contiene(["9788804668237", "9780000000002"])
+        array([ True, False])
+    """
+
+    def __init__(self, n_bit: int, n_hash: int, larghezza: int = 13,
+                 bit: Optional[np.ndarray] = None, info: Optional[Dict[str, Any]] = None):
+        self.n_bit = n_bit
+        self.n_hash = n_hash
+        self.larghezza = larghezza
+        self.bit = bit if bit is not None else np.zeros(n_bit // 8, dtype=np.uint8)
+        self.info: Dict[str, Any] = info or {}
+        self.n_elementi: int = self.info.get('n_elementi', 0)
+
+    @classmethod
+    def per_capacita(cls, n_elementi: int, tasso_fp: float, larghezza: int = 13) -> 'FiltroBloom':
+        """Crea un filtro vuoto dimensionato per n_elementi al tasso di falsi positivi dato."""
+        n_bit, n_hash = dimensiona_filtro(n_elementi, tasso_fp)
+        return cls(n_bit, n_hash, larghezza, info={'tasso_fp': tasso_fp})
+
+    def _posizioni(self, chiavi: Any) -> np.ndarray:
+        """Matrice (n_chiavi, n_hash) delle posizioni di bit (double hashing)."""
+        codici = codifica_chiavi_isbn(chiavi, self.larghezza)
+        h1 = _splitmix64(codici)
+        h2 = _splitmix64(codici ^ _SEME_H2) | np.uint64(1)
+        passi = np.arange(self.n_hash, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            return (h1[:, None] + passi[None, :] * h2[:, None]) % np.uint64(self.n_bit)
+
+    def aggiungi(self, chiavi: Any) -> None:
+        """Aggiunge un blocco di ISBN al filtro."""
+        chiavi = np.asarray(chiavi)
+        for inizio in range(0, len(chiavi), BLOCCO_CHIAVI):
+            posizioni = self._posizioni(chiavi[inizio:inizio + BLOCCO_CHIAVI]).ravel()
+            np.bitwise_or.at(
+                self.bit,
+                (posizioni >> np.uint64(3)).astype(np.intp),
+                (np.uint8(1) << (posizioni & np.uint64(7)).astype(np.uint8))
+            )
+        self.n_elementi += len(chiavi)
+
+    def contiene(self, chiavi: Any) -> np.ndarray:
+        """
+        True = forse presente, False = sicuramente assente.
+
+        Returns:
+            Array booleano allineato alle chiavi
+        """
+        chiavi = np.asarray(chiavi)
+        risultato = np.empty(len(chiavi), dtype=bool)
+        for inizio in range(0, len(chiavi), BLOCCO_CHIAVI):
+            posizioni = self._posizioni(chiavi[inizio:inizio + BLOCCO_CHIAVI])
+            byte = self.bit[(posizioni >> np.uint64(3)).astype(np.intp)]
+            bit = (byte >> (posizioni & np.uint64(7)).astype(np.uint8)) & 1
+            risultato[inizio:inizio + len(posizioni)] = bit.all(axis=1)
+        return risultato
+
+    def salva(self, path: Path, **extra: Any) -> None:
+        """Scrive il filtro su disco (extra finisce nell'intestazione JSON)."""
+        intestazione = {
+            'versione': VERSIONE,
+            'n_bit': self.n_bit,
+            'n_hash': self.n_hash,
+            'larghezza': self.larghezza,
+            'n_elementi': self.n_elementi,
+            'tasso_fp': self.info.get('tasso_fp'),
+            'creato': datetime.now().isoformat(timespec='seconds'),
+            **{k: v for k, v in self.info.items() if k.startswith('indice_')},
+            **extra,
+        }
+        dati = json.dumps(intestazione, ensure_ascii=False).encode('utf-8')
+        inizio_bit = _allinea(len(MAGIC) + 4 + len(dati))
+
+        path = Path(path)
+        temporaneo = path.with_name(path.name + '.tmp')
+        with open(temporaneo, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(dati)))
+            f.write(dati)
+            f.write(b'\0' * (inizio_bit - f.tell()))
+            f.write(self.bit.tobytes())
+        temporaneo.replace(path)
+
+    @classmethod
+    def carica(cls, path: Path) -> 'FiltroBloom':
+        """Carica un filtro salvato con salva()."""
+        path = Path(path)
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise FiltroNonValido(f"{path.name}: non è un filtro di Bloom ISBN")
+            (lunghezza,) = struct.unpack('<I', f.read(4))
+            try:
+                intestazione = json.loads(f.read(lunghezza).decode('utf-8'))
+            except ValueError as e:
+                raise FiltroNonValido(f"{path.name}: intestazione danneggiata ({e})")
+            if intestazione.get('versione') != VERSIONE:
+                raise FiltroNonValido(f"{path.name}: versione filtro non supportata")
+            f.seek(_allinea(len(MAGIC) + 4 + lunghezza))
+            bit = np.fromfile(f, dtype=np.uint8, count=intestazione['n_bit'] // 8)
+        if len(bit) != intestazione['n_bit'] // 8:
+            raise FiltroNonValido(f"{path.name}: file troncato")
+        return cls(intestazione['n_bit'], intestazione['n_hash'],
+                   intestazione['larghezza'], bit, intestazione)
+
+
+def costruisci_da_indice(indice: Any, tasso_fp: float) -> FiltroBloom:
+    """
+    Costruisce un filtro dalle chiavi di un indice ISBN (isbn_index.IndiceIsbn).
+
+    Le chiavi vengono lette a blocchi dal file mappato, senza caricarle
+    tutte in memoria.
+    """
+    filtro = FiltroBloom.per_capacita(len(indice), tasso_fp, indice.larghezza)
+    for inizio in range(0, len(indice), BLOCCO_CHIAVI):
+        filtro.aggiungi(np.asarray(indice.chiavi[inizio:inizio + BLOCCO_CHIAVI]))
+    filtro.info['indice_impronta'] = indice.intestazione.get('impronta_chiavi')
+    filtro.info['indice_n_chiavi'] = len(indice)
+    return filtro
+
+
+def _allinea(n: int) -> int:
+    return (n + ALLINEAMENTO - 1) // ALLINEAMENTO * ALLINEAMENTO
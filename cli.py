@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Interfaccia a riga di comando per ISBN Matcher
+
+Esempi:
+    isbn-matcher indice catalogo.isbnidx export1.xlsx export2.xlsx --bloom
+    isbn-matcher bloom catalogo.isbnidx --fp 0.001
+    isbn-matcher storico storico.isbndb export_2024_05.zip --data 2024-05-31
+    isbn-matcher cerca catalogo.isbnidx storico.isbndb --isbn "978-88-04-66823-7, 8804668237"
+    isbn-matcher ispeziona worklist.xlsx export1.xlsx export2.xlsx
+    isbn-matcher servizio catalogo.isbnidx export1.xlsx --indirizzo 127.0.0.1:8765
+    isbn-matcher osserva --worklist in/worklist --confronto in/cataloghi --output out
+    isbn-matcher inverso worklist.xlsx catalogo.xlsx catalogo.isbnidx --righe-complete
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from config import AppConfig
+from data_processor import DataProcessor
+from localization import get_translations
+from zip_bundle import espandi_archivi
+
+
+SIMBOLI = {"INFO": "ℹ️", "SUCCESS": "✅", "WARNING": "⚠️", "ERROR": "❌"}
+
+
+def log_console(message: str, level: str = "INFO") -> None:
+    """Callback di log per la console (stesso formato simboli della GUI)"""
+    stream = sys.stderr if level == "ERROR" else sys.stdout
+    print(f"{SIMBOLI.get(level, 'ℹ️')} {message}", file=stream, flush=True)
+
+
+def _crea_processor(args: argparse.Namespace) -> DataProcessor:
+    processor = DataProcessor(AppConfig())
+    processor.set_translations(get_translations(args.lang))
+    return processor
+
+
+def comando_indice(args: argparse.Namespace) -> int:
+    """Compila i cataloghi indicati in un file indice ISBN"""
+    processor = _crea_processor(args)
+    output = Path(args.output)
+    if output.suffix.lower() != processor.config.SUFFIX_INDICE:
+        output = output.with_name(output.name + processor.config.SUFFIX_INDICE)
+    processor.compila_indice([Path(f) for f in args.files], output, log_console,
+                             bloom=args.bloom)
+    return 0
+
+
+def comando_bloom(args: argparse.Namespace) -> int:
+    """Crea il filtro di Bloom per un indice ISBN esistente"""
+    processor = _crea_processor(args)
+    processor.compila_filtro_bloom(Path(args.indice), log_console, args.fp)
+    return 0
+
+
+def comando_storico(args: argparse.Namespace) -> int:
+    """Aggiunge i cataloghi indicati allo storico ISBN (SQLite)"""
+    processor = _crea_processor(args)
+    storico = Path(args.storico)
+    if storico.suffix.lower() != processor.config.SUFFIX_STORICO:
+        storico = storico.with_name(storico.name + processor.config.SUFFIX_STORICO)
+    processor.carica_storico([Path(f) for f in args.files], storico, log_console, data=args.data)
+    return 0
+
+
+def comando_cerca(args: argparse.Namespace) -> int:
+    """Ricerca rapida degli ISBN indicati (o letti da stdin) in indici e storici"""
+    from quick_lookup import RicercaRapida
+    
+    processor = _crea_processor(args)
+    t = processor.t
+    testo = args.isbn if args.isbn is not None else sys.stdin.read()
+    with RicercaRapida([Path(f) for f in args.sorgenti], processor.config) as ricerca:
+        if not len(ricerca):
+            raise Exception(t.lookup_no_sources)
+        esiti = ricerca.cerca(testo)
+    for esito in esiti:
+        if not esito.valido:
+            print(f"{esito.isbn}\t{t.lookup_invalid}")
+        elif esito.trovato:
+            print(f"{esito.isbn}\t{t.lookup_found}\t{'; '.join(esito.provenienze)}")
+        else:
+            print(f"{esito.isbn}\t{t.lookup_not_found}")
+    return 0
+
+
+def comando_ispeziona(args: argparse.Namespace) -> int:
+    """Ispezione preliminare: fogli, righe, colonna ISBN e costo stimato"""
+    processor = _crea_processor(args)
+    processor.ispeziona([Path(f) for f in args.files], log_console)
+    return 0
+
+
+def comando_servizio(args: argparse.Namespace) -> int:
+    """Carica i file di confronto e risponde alle richieste di confronto"""
+    from match_service import ServizioConfronto, avvia_servizio
+    
+    processor = _crea_processor(args)
+    files = espandi_archivi([Path(f) for f in args.files], processor.config.SUFFISSI_EXCEL)
+    servizio = ServizioConfronto(processor, files, log_console)
+    avvia_servizio(servizio, args.indirizzo, processor.config.SERVIZIO_CONTROLLO_SECONDI)
+    return 0
+
+
+def comando_osserva(args: argparse.Namespace) -> int:
+    """Confronta automaticamente i file depositati nelle cartelle osservate"""
+    from watch_folder import OsservatoreCartelle
+    
+    processor = _crea_processor(args)
+    if args.entrambi:
+        modalita = processor.config.MODE_ENTRAMBI
+    elif args.non_match:
+        modalita = processor.config.MODE_NON_MATCH
+    else:
+        modalita = processor.config.MODE_MATCH
+    osservatore = OsservatoreCartelle(
+        processor,
+        [Path(c) for c in args.worklist],
+        [Path(c) for c in args.confronto],
+        Path(args.output),
+        log_console,
+        modalita
+    )
+    osservatore.esegui()
+    return 0
+
+
+def comando_inverso(args: argparse.Namespace) -> int:
+    """ISBN dei file di confronto assenti dalla worklist, con file e foglio di origine"""
+    processor = _crea_processor(args)
+    processor.process_inverso_isbn(
+        [Path(f) for f in args.files], log_console,
+        n_worklist=args.worklist,
+        righe_complete=args.righe_complete or None
+    )
+    return 0
+
+
+def crea_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='isbn-matcher',
+        description="Confronto ISBN tra file Excel (senza argomenti avvia l'interfaccia grafica)"
+    )
+    parser.add_argument('--lang', choices=['it', 'en'], default='it',
+                        help="Lingua dei messaggi (default: it)")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_indice = sub.add_parser('indice', help="Compila cataloghi in un indice ISBN (.isbnidx)")
+    p_indice.add_argument('output', help="File indice da creare")
+    p_indice.add_argument('files', nargs='+', help="Cataloghi Excel (o archivi .zip) da indicizzare")
+    p_indice.add_argument('--bloom', action='store_true',
+                          help="Crea anche il filtro di Bloom (indice.isbnidx.bloom)")
+    p_indice.set_defaults(func=comando_indice)
+
+    p_bloom = sub.add_parser('bloom', help="Crea il filtro di Bloom di un indice esistente")
+    p_bloom.add_argument('indice', help="Indice ISBN (.isbnidx)")
+    p_bloom.add_argument('--fp', type=float, default=None,
+                         help="Tasso di falsi positivi (default: 0.01)")
+    p_bloom.set_defaults(func=comando_bloom)
+
+    p_storico = sub.add_parser('storico', help="Aggiunge cataloghi allo storico ISBN (.isbndb, SQLite)")
+    p_storico.add_argument('storico', help="File storico (creato se non esiste)")
+    p_storico.add_argument('files', nargs='+', help="Cataloghi Excel (o archivi .zip) da aggiungere")
+    p_storico.add_argument('--data', default=None,
+                           help="Data degli export (AAAA-MM-GG, default: data di modifica dei file)")
+    p_storico.set_defaults(func=comando_storico)
+
+    p_cerca = sub.add_parser('cerca', help="Ricerca rapida di ISBN in indici e storici (nessun workbook letto)")
+    p_cerca.add_argument('sorgenti', nargs='+', help="Indici (.isbnidx) e storici (.isbndb)")
+    p_cerca.add_argument('--isbn', default=None,
+                         help="ISBN separati da virgole, spazi o a capo (default: letti da stdin)")
+    p_cerca.set_defaults(func=comando_cerca)
+
+    p_ispeziona = sub.add_parser(
+        'ispeziona', help="Dimensioni, colonna ISBN e costo stimato dei file (senza elaborarli)"
+    )
+    p_ispeziona.add_argument('files', nargs='+', help="File Excel, indici o archivi .zip da ispezionare")
+    p_ispeziona.set_defaults(func=comando_ispeziona)
+
+    p_servizio = sub.add_parser(
+        'servizio', help="Tiene in memoria i file di confronto e risponde a GUI, CLI e script"
+    )
+    p_servizio.add_argument('files', nargs='+', help="Cataloghi Excel, indici o archivi .zip di confronto")
+    p_servizio.add_argument('--indirizzo', default="127.0.0.1:8765",
+                            help="host:porta o unix:/percorso (default: 127.0.0.1:8765, solo questo PC)")
+    p_servizio.set_defaults(func=comando_servizio)
+
+    p_osserva = sub.add_parser(
+        'osserva', help="Osserva cartelle e confronta automaticamente i file nuovi o modificati"
+    )
+    p_osserva.add_argument('--worklist', nargs='+', required=True,
+                           help="Cartelle in cui vengono depositate le worklist")
+    p_osserva.add_argument('--confronto', nargs='+', required=True,
+                           help="Cartelle dei file di confronto (cataloghi, indici, archivi .zip)")
+    p_osserva.add_argument('--output', required=True, help="Cartella degli output")
+    modo_osserva = p_osserva.add_mutually_exclusive_group()
+    modo_osserva.add_argument('--non-match', action='store_true',
+                              help="Cerca le non corrispondenze (default: corrispondenze)")
+    modo_osserva.add_argument('--entrambi', action='store_true',
+                              help="Corrispondenze e non corrispondenze dallo stesso confronto")
+    p_osserva.set_defaults(func=comando_osserva)
+
+    p_inverso = sub.add_parser(
+        'inverso', help="ISBN dei file di confronto assenti dalla worklist (file di confronto letti a blocchi)"
+    )
+    p_inverso.add_argument('files', nargs='+',
+                           help="Worklist seguite da cataloghi Excel, indici, storici o archivi .zip")
+    p_inverso.add_argument('--worklist', type=int, default=1,
+                           help="Worklist in testa all'elenco: ISBN assenti da tutte (default: 1)")
+    p_inverso.add_argument('--righe-complete', action='store_true',
+                           help="Copia anche l'intera riga del file di confronto")
+    p_inverso.set_defaults(func=comando_inverso)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point della riga di comando"""
+    args = crea_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        t = get_translations(args.lang)
+        log_console(f"{t.error_title}: {e}", "ERROR")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
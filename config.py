@@ -3,7 +3,7 @@
 Configurazioni dell'applicazione ISBN Matcher
 """
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
 
 @dataclass
@@ -16,6 +16,14 @@ class AppConfig:
     
     MODE_MATCH: str = "MATCH"
     MODE_NON_MATCH: str = "NON_MATCH"
+    MODE_ENTRAMBI: str = "ENTRAMBI"
+    MODE_INVERSO: str = "INVERSO"
+
+    # Strategie di esecuzione scelte dal pianificatore (planner.py)
+    STRATEGIA_IN_MEMORIA: str = "IN_MEMORIA"
+    STRATEGIA_STREAMING: str = "STREAMING"
+    STRATEGIA_DUE_FASI: str = "DUE_FASI"
+    STRATEGIA_SU_DISCO: str = "SU_DISCO"
     
     
     # ========================================================================
@@ -27,6 +35,83 @@ class AppConfig:
         'ean', 'codice', 'barcode', 'codiceean', 'codice ean'
     ])
     """Varianti accettate per la colonna ISBN"""
+
+    RIGHE_CAMPIONE_ISBN: int = field(default=50)
+    """Righe lette da ogni foglio per individuare colonna ISBN e intestazione"""
+
+    RIGHE_RICERCA_INTESTAZIONE: int = field(default=10)
+    """Righe del campione in cui cercare un'intestazione ISBN per nome"""
+
+    SOGLIA_RILEVAMENTO_ISBN: float = field(default=0.6)
+    """Frazione minima di ISBN con checksum valido per riconoscere una colonna dal contenuto"""
+
+    # ========================================================================
+    # LETTURA FILE
+    # ========================================================================
+
+    LETTORE_XLSX_STREAMING: bool = field(default=True)
+    """Legge la colonna ISBN dei file .xlsx di confronto direttamente dall'XML (con fallback)"""
+
+    # ========================================================================
+    # MEMORIA E PIANIFICAZIONE
+    # ========================================================================
+
+    BUDGET_MEMORIA_MB: int = field(default=0)
+    """Memoria utilizzabile per il confronto (0 = metà della memoria disponibile)"""
+
+    BUDGET_MEMORIA_DEFAULT_MB: int = field(default=2048)
+    """Budget usato quando la memoria disponibile non è rilevabile"""
+
+    FATTORE_ESPANSIONE_XLSX: float = field(default=12.0)
+    """Rapporto stimato tra memoria e dimensione su disco per i file senza dimensioni leggibili (.xls)"""
+
+    BYTE_PER_CELLA: int = field(default=150)
+    """Memoria stimata per cella di un foglio caricato in un DataFrame (lettura compresa)"""
+
+    BYTE_PER_CHIAVE: int = field(default=200)
+    """Memoria stimata per ISBN tenuto in memoria (stringa, set, fattorizzazione)"""
+
+    BYTE_XML_PER_CELLA: int = field(default=50)
+    """Byte XML per cella, per stimare le righe di un foglio senza record <dimension>"""
+
+    COLONNE_STIMATE: int = field(default=10)
+    """Colonne ipotizzate quando le dimensioni di un foglio non sono leggibili"""
+
+    MAX_WORKERS: int = field(default=0)
+    """Processi massimi per la lettura dei file di confronto (0 = numero di CPU)"""
+
+    SOGLIA_PARALLELO_MB: int = field(default=16)
+    """Dimensione totale dei file di confronto sotto la quale non si usano processi paralleli"""
+
+    RIGHE_PER_SEGMENTO: int = field(default=250_000)
+    """Righe per intervallo quando un foglio .xlsx molto grande viene letto da più processi"""
+
+    SOGLIA_SOVRAPPOSIZIONE_RIGHE: int = field(default=100_000)
+    """Righe worklist oltre le quali i file di confronto vengono letti durante il suo caricamento"""
+
+    PRECARICAMENTO_MB: int = field(default=256)
+    """Byte massimi (MB) di file di input letti in anticipo in memoria (0 = disattivato)"""
+
+    PRECARICAMENTO_THREAD: int = field(default=2)
+    """Thread di lettura anticipata dei file di input"""
+
+    SERVIZIO_INDIRIZZO: Optional[str] = field(default=None)
+    """Servizio di confronto da interrogare ("host:porta" o "unix:/percorso"; None = confronto locale)"""
+
+    SERVIZIO_TIMEOUT_SECONDI: float = field(default=2.0)
+    """Attesa massima della connessione al servizio prima di confrontare in locale"""
+
+    SERVIZIO_CONTROLLO_SECONDI: int = field(default=30)
+    """Secondi tra due controlli dei file sorgente da parte del servizio"""
+
+    OSSERVA_INTERVALLO_SECONDI: float = field(default=5.0)
+    """Secondi tra due controlli delle cartelle osservate (watch_folder)"""
+
+    OSSERVA_STABILITA_SECONDI: float = field(default=10.0)
+    """Secondi senza variazioni dopo i quali un file depositato è considerato completo"""
+
+    CARTELLA_TEMPORANEA: Optional[str] = field(default=None)
+    """Cartella per i file temporanei dell'elaborazione su disco (None = temp di sistema)"""
     
     # ========================================================================
     # OUTPUT E FILE GENERATI
@@ -34,9 +119,76 @@ class AppConfig:
     
     SUFFIX_OUTPUT: str = "_confronto_isbn.xlsx"
     """Suffisso per file di output"""
+
+    SUFFIX_INDICE: str = ".isbnidx"
+    """Estensione dei file indice ISBN precompilati (usabili al posto di un file di confronto)"""
+
+    SUFFISSI_EXCEL: tuple = ('.xlsx', '.xls')
+    """Estensioni dei file Excel accettati (anche dentro gli archivi .zip)"""
+
+    SUFFIX_ARCHIVIO: str = ".zip"
+    """Estensione degli archivi di export: i file Excel contenuti vengono letti senza estrarli"""
+
+    SUFFIX_STATO: str = ".isbnstate"
+    """Suffisso del file di stato del confronto incrementale (accanto alla worklist)"""
+
+    SUFFIX_STORICO: str = ".isbndb"
+    """Estensione dello storico ISBN SQLite (usabile al posto di un file di confronto)"""
+
+    STORICO_DAL: Optional[str] = field(default=None)
+    """Confronto con uno storico: solo gli export da questa data (ISO, AAAA-MM-GG; None = tutti)"""
+
+    STORICO_AL: Optional[str] = field(default=None)
+    """Confronto con uno storico: solo gli export fino a questa data (ISO; None = tutti)"""
+
+    CARTELLA_CACHE_CHIAVI: str = ".isbncache"
+    """Cartella (dentro quella di output) con la cache delle chiavi delle cartelle osservate"""
+
+    CODA_CACHE_MB: int = field(default=512)
+    """Memoria massima (MB) per le chiavi dei file di confronto conservate tra i lavori (coda GUI e cartelle osservate)"""
+
+    SUFFIX_BLOOM: str = ".bloom"
+    """Suffisso del filtro di Bloom affiancato a un indice (es. catalogo.isbnidx.bloom)"""
+
+    BLOOM_TASSO_FALSI_POSITIVI: float = field(default=0.01)
+    """Tasso di falsi positivi dei filtri di Bloom costruiti dagli indici"""
     
     SHEET_PARAMETRI: str = "parametri"
     """Nome del foglio da ignorare in tutti i file Excel"""
+
+    REPORT_DUPLICATI: bool = field(default=False)
+    """Aggiunge all'output un foglio con gli ISBN duplicati della worklist"""
+
+    CONFRONTO_INCREMENTALE: bool = field(default=False)
+    """Riusa lo stato dell'ultimo confronto e verifica solo le chiavi worklist nuove o modificate"""
+
+    SHEET_DUPLICATI: str = field(default="duplicati")
+    """Nome del foglio report duplicati"""
+
+    SHEET_MATCH: str = field(default="match")
+    """Modalità ENTRAMBI: nome del foglio con le righe che hanno match"""
+
+    SHEET_NON_MATCH: str = field(default="non_match")
+    """Modalità ENTRAMBI: nome del foglio con le righe senza match"""
+
+    OUTPUT_ENTRAMBI_IN_FILE: bool = field(default=False)
+    """Modalità ENTRAMBI: righe con e senza match in due file invece che in due fogli"""
+
+    INVERSO_RIGHE_COMPLETE: bool = field(default=False)
+    """Modalità INVERSO: copia nell'output anche l'intera riga del file di confronto"""
+
+    RIGHE_BLOCCO_INVERSO: int = field(default=50_000)
+    """Modalità INVERSO: righe dei file di confronto lette (e confrontate) per volta"""
+
+    COLONNE_INVERSO: List[str] = field(default_factory=lambda: [
+        'ISBN', 'File', 'Foglio'
+    ])
+    """Modalità INVERSO: intestazioni di ISBN assente dalla worklist, file e foglio di origine"""
+
+    COLONNE_REPORT_DUPLICATI: List[str] = field(default_factory=lambda: [
+        'ISBN', 'Righe', 'Fogli'
+    ])
+    """Intestazioni del foglio report duplicati (ISBN, numero righe, fogli di origine)"""
     
     # ========================================================================
     # FORMATTAZIONE EXCEL
@@ -98,6 +250,25 @@ class AppConfig:
 
     EXCEL_ZOOM: int = field(default=110)
     """Livello zoom foglio Excel (%)"""
+
+    # Output grandi
+    OUTPUT_MAX_RIGHE_FOGLIO: int = field(default=1_048_575)
+    """Righe dati massime per foglio di output (limite di Excel, intestazione esclusa)"""
+
+    OUTPUT_DIVIDI_PER: Optional[str] = field(default=None)
+    """Colonna per cui dividere l'output, un foglio (o file) per valore (es. 'Sezione'; None = nessuna)"""
+
+    OUTPUT_PARTI_IN_FILE: bool = field(default=False)
+    """Scrive le parti dell'output in file separati invece che in fogli dello stesso file"""
+
+    SHEET_RISULTATI: str = field(default="risultati")
+    """Nome base dei fogli (o file) quando l'output è diviso per numero di righe"""
+
+    SHEET_GRUPPO_VUOTO: str = field(default="senza_valore")
+    """Nome della parte con le righe senza valore nella colonna OUTPUT_DIVIDI_PER"""
+
+    SOGLIA_SCRITTURA_STREAMING: int = field(default=100_000)
+    """Righe di output oltre le quali il file viene scritto e formattato in streaming"""
     
         
     # ========================================================================
@@ -145,13 +316,22 @@ class AppConfig:
     
     MAX_ISBN_LENGTH: int = field(default=13)
     """Lunghezza massima ISBN valido"""
-    
+
+    SOGLIA_NORMALIZZAZIONE_VELOCE: int = field(default=2000)
+    """Righe oltre le quali la normalizzazione usa il motore bytes.translate"""
+
     # Nomi colonne temporanee (evita stringhe hardcoded nel codice)
     COL_ISBN_NORM: str = field(default='_isbn_norm')
     """Nome colonna temporanea per ISBN normalizzati"""
 
     COL_ISBN_VALIDO: str = field(default='_isbn_valido')
     """Nome colonna temporanea per flag validità ISBN"""
+
+    COL_FOGLIO_ORIGINE: str = field(default='_foglio_origine')
+    """Nome colonna temporanea con il foglio di origine della riga worklist"""
+
+    COL_ESITO_MATCH: str = field(default='_esito_match')
+    """Nome colonna temporanea con l'esito del confronto (modalità ENTRAMBI)"""
     
     
     BATCH_SIZE_EXCEL: int = field(default=20)
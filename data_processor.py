@@ -3,20 +3,54 @@
 Classe per la logica di elaborazione dati (Business Logic)
 Aggiornata per supportare localizzazione
 """
+import io
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Callable, Any, Optional
+from typing import Dict, List, Callable, Any, Iterator, Optional, Tuple, Union
 from config import AppConfig
 from localization import Translations
 from utils import (
-    normalizza_isbn, 
-    valida_isbn, 
-    trova_colonna_isbn, 
     trim_df, 
-    normalizza_serie_isbn, 
-    valida_serie_isbn
+    estrai_chiavi_isbn,
+    individua_colonna_isbn,
+    rileva_colonna_isbn,
+    ColonnaIsbn,
+    AnalisiDuplicati,
+    analizza_duplicati,
+    crea_report_duplicati,
+    impronta_file,
+    codifica_chiavi_isbn,
+    decodifica_chiavi_isbn
+)
+from excel_formatter import ScrittoreExcelStreaming, formatta_excel_isbn, scrivi_excel_streaming
+from xlsx_stream import LettoreXlsx, XlsxNonSupportato
+from isbn_index import IndiceIsbn, IndiceNonValido, scrivi_indice
+from isbn_store import StoricoIsbn, StoricoNonValido
+from bloom_filter import FiltroBloom, FiltroNonValido, costruisci_da_indice, BLOCCO_CHIAVI
+from external_sort import ScrittoreRun, unisci_run
+from prefetch import Precaricatore
+from reconcile_state import (
+    StatoConfronto, StatoNonValido, carica_stato, impostazioni_chiavi, impronta_rapida, salva_stato
+)
+from zip_bundle import dimensione_input, elenca_archivio, percorso_su_disco, sorgente_input
+from shared_keys import ChiaviCondivise, collega_riferimento, posizioni_presenti, riferimento_collegato
+from planner import (
+    PianoEsecuzione,
+    StimaFile,
+    StimaFoglio,
+    memoria_lettura,
+    pianifica,
+    stima_file,
+    trova_file_identici
 )
-from excel_formatter import formatta_excel_isbn
 
 # Livelli di Log
 LOG_INFO = "INFO"
@@ -24,6 +58,9 @@ LOG_WARNING = "WARNING"
 LOG_ERROR = "ERROR"
 LOG_SUCCESS = "SUCCESS"
 
+# Bit riservati alla posizione dell'ISBN nella cella negli id riga su disco
+_BIT_POSIZIONE_CELLA = 8
+
 
 class DataProcessor:
     """Classe per la logica di elaborazione dati"""
@@ -31,6 +68,8 @@ class DataProcessor:
     def __init__(self, config: AppConfig):
         self.config = config
         self.t: Optional[Translations] = None
+        self._precaricatore: Optional[Precaricatore] = None
+        self._chiavi_anticipate: Optional[_ChiaviAnticipate] = None
     
     def set_translations(self, t: Translations):
         """Imposta le traduzioni per i messaggi di log"""
@@ -41,7 +80,10 @@ class DataProcessor:
         files: List[Path], 
         log_callback: Callable[[str, str], None],
         progress_callback: Optional[Callable[[int, int], None]] = None,
-        modalita: str = None  # "MATCH" o "NON_MATCH"
+        modalita: str = None,  # "MATCH", "NON_MATCH" o "ENTRAMBI"
+        report_duplicati: Optional[bool] = None,
+        strategia: Optional[str] = None,
+        stato: Optional[Path] = None
     ) -> Dict[str, Any]:
         """
         Confronta ISBN tra file Excel.
@@ -51,27 +93,29 @@ class DataProcessor:
             files: Lista di file da elaborare
             log_callback: Funzione per logging (message, level)
             progress_callback: Funzione per progress bar (current, total)
-            modalita: "MATCH" per trovare corrispondenze, "NON_MATCH" per non corrispondenze
+            modalita: "MATCH" per trovare corrispondenze, "NON_MATCH" per non
+                corrispondenze, "ENTRAMBI" per le due partizioni in un solo
+                confronto
+            report_duplicati: Aggiunge il foglio report duplicati (default: config.REPORT_DUPLICATI)
+            strategia: Impone una strategia (config.STRATEGIA_*); None = scelta
+                dal pianificatore in base a dimensioni dei file e memoria
+            stato: File di stato per il confronto incrementale (vedi
+                reconcile_state); None = config.CONFRONTO_INCREMENTALE decide
+                se usare quello accanto alla worklist
         
         Returns:
             Dict con statistiche: output, isbn_wl, match_trovati, duplicati_rimossi
         """
         if modalita is None:
             modalita = self.config.MODE_MATCH
+        if report_duplicati is None:
+            report_duplicati = self.config.REPORT_DUPLICATI
         
         # Usa traduzioni se disponibili, altrimenti usa messaggi di default
-        if self.t:
-            if modalita == self.config.MODE_MATCH:
-                log_callback(self.t.proc_mode_match, LOG_INFO)
-            else:
-                log_callback(self.t.proc_mode_non_match, LOG_INFO)
-            log_callback(self.t.proc_start_comparison, LOG_INFO)
-        else:
-            if modalita == self.config.MODE_MATCH:
-                log_callback("🔍 Modalità: TROVA CORRISPONDENZE", LOG_INFO)
-            else:
-                log_callback("🔍 Modalità: TROVA NON CORRISPONDENZE", LOG_INFO)
-            log_callback("Inizio confronto ISBN", LOG_INFO)
+        self._log_modalita(modalita, log_callback)
+        log_callback(self.t.proc_start_comparison if self.t else "Inizio confronto ISBN", LOG_INFO)
+        
+        files = self._espandi_archivi(files, log_callback)
         
         if len(files) < 2:
             error_msg = self.t.error_min_files if self.t else "Servono almeno 2 file per il confronto ISBN"
@@ -86,187 +130,707 @@ class DataProcessor:
         if progress_callback:
             progress_callback(0, 100)
         
-        # ====================================================================
-        # STEP 1: Carica worklist (concatena tutti i fogli)
-        # ====================================================================
-        df_wl = pd.DataFrame()
-        for nome, df in pd.read_excel(file_wl, sheet_name=None, dtype=str).items():
-            if nome.lower() != self.config.SHEET_PARAMETRI:
-                col_isbn = trova_colonna_isbn(df, self.config)
-                if col_isbn:
-                    df_wl = pd.concat([df_wl, df], ignore_index=True)
-        
-        if df_wl.empty:
-            error_msg = self.t.error_no_isbn_worklist if self.t else "Nessuna colonna ISBN trovata nel file worklist"
-            raise Exception(error_msg)
+        # File di confronto aggiunti due volte: letti una volta sola
+        file_non_wl = self._escludi_file_identici(file_non_wl, log_callback)
         
-        col_isbn_wl = trova_colonna_isbn(df_wl, self.config)
-        if not col_isbn_wl:
-            error_msg = self.t.error_no_isbn_column if self.t else "Colonna ISBN non trovata nella worklist"
-            raise Exception(error_msg)
+        # Piano di esecuzione dai metadati dei file (nessuna cella letta)
+        stime = [stima_file(f, self.config) for f in [file_wl] + file_non_wl]
+        piano = pianifica(stime, self.config, strategia)
+        self._log_piano(piano, log_callback)
+        
+        if stato is None and self.config.CONFRONTO_INCREMENTALE:
+            stato = percorso_su_disco(file_wl).parent / (file_wl.stem + self.config.SUFFIX_STATO)
+        if stato is not None:
+            state_msg = (
+                self.t.proc_incremental_state if self.t
+                else "🔁 Confronto incrementale, stato: {file}"
+            ).format(file=Path(stato).name)
+            log_callback(state_msg, LOG_INFO)
         
-        # Normalizza ISBN (VETTORIZZATO - molto più veloce!)
-        df_wl[self.config.COL_ISBN_NORM] = normalizza_serie_isbn(
-            df_wl[col_isbn_wl], 
-            self.config
+        # Servizio di confronto con gli stessi file già in memoria: si legge solo la worklist
+        servizio = None
+        if stato is None and self.config.SERVIZIO_INDIRIZZO:
+            servizio = self._servizio_compatibile(file_non_wl, log_callback)
+        
+        # Lettura anticipata dei file letti da questo processo, nell'ordine di lettura
+        # (in modalità incrementale i file di confronto si rileggono solo se cambiati)
+        da_precaricare = [file_wl]
+        if stato is None and servizio is None and not self._lettura_parallela(file_non_wl, piano):
+            da_precaricare += [f for f in file_non_wl if not self._precompilato(f)]
+        self._precaricatore = Precaricatore(
+            da_precaricare, piano.precaricamento, self.config.PRECARICAMENTO_THREAD
         )
-
-        # Filtra ISBN validi (VETTORIZZATO)
-        df_wl = df_wl[valida_serie_isbn(
-            df_wl[self.config.COL_ISBN_NORM], 
-            self.config
-        )]
-        
-        # Diagnostica duplicati
-        isbn_totali_prima = len(df_wl)
-        isbn_unici_prima = df_wl[self.config.COL_ISBN_NORM].nunique()
-        duplicati = isbn_totali_prima - isbn_unici_prima
+        if self._precaricatore.n_file:
+            prefetch_msg = (
+                self.t.proc_prefetch if self.t
+                else "📥 Lettura anticipata di {count} file (fino a {budget} MB in memoria)"
+            ).format(count=self._precaricatore.n_file, budget=piano.precaricamento // (1024 * 1024))
+            log_callback(prefetch_msg, LOG_INFO)
         
-        if duplicati > 0:
-            if self.t:
-                log_callback(
-                    f"{self.t.proc_duplicates_detected}: {isbn_totali_prima} "
-                    f"{self.t.proc_worklist_rows}, {isbn_unici_prima} ISBN unici",
-                    LOG_WARNING
-                )
-                log_callback(
-                    f"   {self.t.proc_duplicates_removed.format(duplicati=duplicati)}", 
-                    LOG_WARNING
+        if piano.sovrapposta and stato is None and servizio is None:
+            pipeline_msg = (
+                self.t.proc_pipeline if self.t
+                else "🔀 Chiavi dei file di confronto estratte durante il caricamento della worklist ({workers} processi)"
+            ).format(workers=piano.workers)
+            log_callback(pipeline_msg, LOG_INFO)
+            self._chiavi_anticipate = _ChiaviAnticipate(
+                self, file_non_wl, piano, log_callback, progress_callback
+            )
+        
+        try:
+            if stato is not None:
+                esito = self._confronto_incrementale(
+                    file_wl, file_non_wl, modalita, report_duplicati,
+                    log_callback, progress_callback, piano, Path(stato)
                 )
-            else:
-                log_callback(
-                    f"⚠️ Worklist: {isbn_totali_prima} righe totali, "
-                    f"{isbn_unici_prima} ISBN unici",
-                    LOG_WARNING
+            elif servizio is not None:
+                esito = self._confronto_servizio(
+                    file_wl, file_non_wl, modalita, report_duplicati,
+                    log_callback, progress_callback, piano, servizio
                 )
-                log_callback(
-                    f"   Rilevati {duplicati} duplicati (verranno rimossi)", 
-                    LOG_WARNING
+            elif piano.strategia in (self.config.STRATEGIA_DUE_FASI, self.config.STRATEGIA_SU_DISCO):
+                esito = self._confronto_su_disco(
+                    file_wl, file_non_wl, modalita, report_duplicati,
+                    log_callback, progress_callback, piano
                 )
+            else:
+                try:
+                    esito = self._confronto_in_memoria(
+                        file_wl, file_non_wl, modalita, report_duplicati,
+                        log_callback, progress_callback, piano
+                    )
+                except MemoryError:
+                    retry_msg = (
+                        self.t.proc_out_of_core_retry if self.t
+                        else "💽 Memoria insufficiente: ripeto l'elaborazione su disco"
+                    )
+                    log_callback(retry_msg, LOG_WARNING)
+                    self._chiudi_letture_anticipate()
+                    piano = pianifica(stime, self.config, self.config.STRATEGIA_SU_DISCO)
+                    esito = self._confronto_su_disco(
+                        file_wl, file_non_wl, modalita, report_duplicati,
+                        log_callback, progress_callback, piano
+                    )
+        finally:
+            self._chiudi_letture_anticipate()
         
-        # Deduplicazione - mantiene prima occorrenza
-        df_wl = df_wl.drop_duplicates(
-            subset=[self.config.COL_ISBN_NORM], 
-            keep='first'
+        cartella_output = percorso_su_disco(file_non_wl[0]).parent
+        return self._salva_risultato(
+            esito, cartella_output, modalita, len(files), log_callback, progress_callback
         )
-
-        unique_msg = f"{self.t.proc_unique_isbn if self.t else '✅ ISBN unici nella worklist'}: {df_wl[self.config.COL_ISBN_NORM].nunique()}"
-        log_callback(unique_msg, LOG_SUCCESS)
+    
+    def process_batch_isbn(
+        self,
+        worklists: List[Path],
+        files_confronto: List[Path],
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        modalita: str = None,
+        report_duplicati: Optional[bool] = None,
+        confronto: Optional[np.ndarray] = None,
+        cartella_output: Optional[Path] = None,
+        prefisso_output: Optional[Callable[[Path], str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Confronta più worklist con lo stesso insieme di file di confronto.
+        
+        Le chiavi dei file di confronto vengono lette una sola volta (come
+        indicato dal piano, processi paralleli compresi) e ogni worklist
+        viene confrontata con esse; ogni worklist ha il proprio file di
+        output, con il nome della worklist come prefisso. Una worklist che
+        non produce risultati (o non è leggibile) non interrompe le altre.
+        
+        Args:
+            worklists: Worklist da confrontare
+            files_confronto: File di confronto (cataloghi, indici, archivi)
+            log_callback: Funzione per logging (message, level)
+            progress_callback: Funzione per progress bar (current, total)
+            modalita: "MATCH", "NON_MATCH" o "ENTRAMBI" (default: MATCH)
+            report_duplicati: Aggiunge il foglio report duplicati (default: config.REPORT_DUPLICATI)
+            confronto: Chiavi dei file di confronto già lette (uint64 ordinate
+                e uniche, vedi chiavi_confronto): i file non vengono riletti
+            cartella_output: Cartella degli output (default: accanto a ogni worklist)
+            prefisso_output: Prefisso del nome di output di una worklist
+                (default: nome della worklist seguito da '_')
+        
+        Returns:
+            Per ogni worklist il dict di process_confronto_isbn (con la
+            chiave 'worklist'), o {'worklist', 'errore'} se non è riuscita
+        """
+        if modalita is None:
+            modalita = self.config.MODE_MATCH
+        if report_duplicati is None:
+            report_duplicati = self.config.REPORT_DUPLICATI
+        
+        self._log_modalita(modalita, log_callback)
+        
+        worklists = self._espandi_archivi(worklists, log_callback)
+        files_confronto = self._espandi_archivi(files_confronto, log_callback)
+        if not worklists or not files_confronto:
+            error_msg = (
+                self.t.error_batch_files if self.t
+                else "Servono almeno una worklist e un file di confronto"
+            )
+            raise Exception(error_msg)
+        if confronto is None:
+            files_confronto = self._escludi_file_identici(files_confronto, log_callback)
+        
+        batch_msg = (
+            self.t.proc_batch_start if self.t
+            else "📦 Batch: {worklists} worklist confrontate con {files} file di confronto letti una volta"
+        ).format(worklists=len(worklists), files=len(files_confronto))
+        log_callback(batch_msg, LOG_INFO)
         
         if progress_callback:
-            progress_callback(30, 100)
+            progress_callback(0, 100)
+        inizio = time.perf_counter()
+        
+        # Piano per la lettura dei file di confronto (la worklist più grande come riferimento)
+        stime_wl = [stima_file(f, self.config) for f in worklists]
+        stime = [max(stime_wl, key=lambda s: s.dimensione)]
+        if confronto is None:
+            stime += [stima_file(f, self.config) for f in files_confronto]
+        piano = pianifica(stime, self.config)
+        self._log_piano(piano, log_callback)
+        
+        da_precaricare = []
+        if confronto is None and not self._lettura_parallela(files_confronto, piano):
+            da_precaricare += [f for f in files_confronto if not self._precompilato(f)]
+        self._precaricatore = Precaricatore(
+            da_precaricare + worklists, piano.precaricamento, self.config.PRECARICAMENTO_THREAD
+        )
+        
+        risultati = []
+        try:
+            if confronto is None:
+                confronto = self.chiavi_confronto(files_confronto, log_callback, piano)
+            if progress_callback:
+                progress_callback(40, 100)
+            
+            for i, file_wl in enumerate(worklists, 1):
+                worklist_msg = (
+                    self.t.proc_batch_worklist if self.t
+                    else "📦 Worklist {index}/{count}: {file}"
+                ).format(index=i, count=len(worklists), file=file_wl.name)
+                log_callback(worklist_msg, LOG_INFO)
+                try:
+                    df_wl, df_duplicati, analisi = self._worklist_deduplicata(
+                        file_wl, report_duplicati, log_callback
+                    )
+                    chiavi = np.asarray(df_wl[self.config.COL_ISBN_NORM].unique(), dtype=object)
+                    codici = codifica_chiavi_isbn(chiavi, self.config.MAX_ISBN_LENGTH)
+                    isbn_trovati = set(chiavi[posizioni_presenti(confronto, codici)[0]])
+                    esito = (
+                        self._righe_risultato(df_wl, isbn_trovati, modalita), df_duplicati,
+                        analisi.n_unici, analisi.n_duplicati, len(isbn_trovati)
+                    )
+                    risultato = self._salva_risultato(
+                        esito, cartella_output or percorso_su_disco(file_wl).parent, modalita,
+                        len(files_confronto) + 1, log_callback, None,
+                        prefisso_output=prefisso_output(file_wl) if prefisso_output else f"{file_wl.stem}_"
+                    )
+                    risultati.append({'worklist': file_wl, **risultato})
+                except MemoryError:
+                    raise
+                except Exception as e:
+                    log_callback(f"{file_wl.name}: {e}", LOG_ERROR)
+                    risultati.append({'worklist': file_wl, 'errore': str(e)})
+                if progress_callback:
+                    progress_callback(40 + 60 * i // len(worklists), 100)
+        finally:
+            self._chiudi_letture_anticipate()
+        
+        riusciti = sum(1 for r in risultati if 'errore' not in r)
+        done_msg = (
+            self.t.proc_batch_done if self.t
+            else "📦 Batch completato: {ok} di {count} worklist in {seconds:.1f} s"
+        ).format(ok=riusciti, count=len(worklists), seconds=time.perf_counter() - inizio)
+        log_callback(done_msg, LOG_SUCCESS if riusciti == len(worklists) else LOG_WARNING)
+        return risultati
+    
+    def process_inverso_isbn(
+        self,
+        files: List[Path],
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        n_worklist: int = 1,
+        righe_complete: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Confronto inverso: righe dei file di confronto con ISBN assenti
+        dalla worklist, con file e foglio di origine.
+        
+        Delle worklist si leggono solo le chiavi (vedi chiavi_confronto). I
+        file di confronto vengono letti a blocchi di
+        config.RIGHE_BLOCCO_INVERSO righe e le righe con ISBN assenti
+        vengono scritte subito nell'output (ScrittoreExcelStreaming): la
+        memoria non cresce con la dimensione dei cataloghi. Di indici e
+        storici si conoscono solo ISBN, file e foglio di origine: una riga
+        per ISBN, con il primo foglio sorgente che lo contiene (indici) o
+        l'export più recente del periodo STORICO_DAL-STORICO_AL (storici).
+        
+        Args:
+            files: Worklist seguite dai file di confronto (cataloghi,
+                indici, storici, archivi .zip)
+            log_callback: Funzione per logging (message, level)
+            progress_callback: Funzione per progress bar (current, total)
+            n_worklist: Worklist in testa all'elenco (ISBN assenti da tutte)
+            righe_complete: Copia anche l'intera riga del file di confronto
+                (default: config.INVERSO_RIGHE_COMPLETE)
+        
+        Returns:
+            Dict con statistiche (vedi process_confronto_isbn); match_trovati
+            sono le righe con ISBN assenti dalla worklist
+        """
+        if righe_complete is None:
+            righe_complete = self.config.INVERSO_RIGHE_COMPLETE
+        
+        self._log_modalita(self.config.MODE_INVERSO, log_callback)
+        
+        files = self._espandi_archivi(files, log_callback)
+        worklists, files_confronto = files[:n_worklist], files[n_worklist:]
+        if not worklists or not files_confronto:
+            error_msg = (
+                self.t.error_batch_files if self.t
+                else "Servono almeno una worklist e un file di confronto"
+            )
+            raise Exception(error_msg)
+        files_confronto = self._escludi_file_identici(files_confronto, log_callback)
+        
+        if progress_callback:
+            progress_callback(0, 100)
         
         # ====================================================================
-        # STEP 2: Ricerca match negli altri file
+        # STEP 1: Chiavi delle worklist (solo la colonna ISBN)
         # ====================================================================
-        # OTTIMIZZAZIONE: Converte ISBN worklist in set per lookup O(1)
-        set_isbn_riferimento = set(df_wl[self.config.COL_ISBN_NORM])
+        # Nessun file di confronto nella stima: vengono letti a blocchi
+        riferimento = self.chiavi_confronto(worklists, log_callback)
         
-        ref_msg = f"{self.t.proc_reference_set if self.t else '📦 Set di riferimento creato'} ({len(set_isbn_riferimento)} ISBN)"
+        ref_msg = (
+            self.t.proc_reverse_reference if self.t
+            else "↩️ Chiavi worklist: {count} ISBN unici, cercati nei file di confronto"
+        ).format(count=len(riferimento))
         log_callback(ref_msg, LOG_INFO)
         
-        isbn_trovati = set()
-        total_files = len(file_non_wl)
+        if progress_callback:
+            progress_callback(20, 100)
         
-        for idx, file in enumerate(file_non_wl):
-            search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
-            log_callback(search_msg, LOG_INFO)
-            file_matches = 0
-            
-            if progress_callback:
-                progress_callback(30 + int(40 * (idx / total_files)), 100)
-            
-            # OTTIMIZZAZIONE: Prima identifichiamo la colonna ISBN senza caricare dati
-            for nome in pd.ExcelFile(file).sheet_names:
-                if nome.lower() == self.config.SHEET_PARAMETRI:
+        # ====================================================================
+        # STEP 2: Righe dei file di confronto con ISBN assenti, a blocchi
+        # ====================================================================
+        # Con le righe complete le intestazioni servono prima della prima riga
+        colonne_origine: List[str] = []
+        if righe_complete:
+            for file in files_confronto:
+                if self._precompilato(file):
                     continue
+                for colonne in self._intestazioni_fogli(file):
+                    colonne_origine += [c for c in colonne if c not in colonne_origine]
+        
+        scrittore = ScrittoreExcelStreaming(self.config, log_callback, t=self.t)
+        scrittore.aggiungi_foglio(
+            self.config.SHEET_RISULTATI, self.config.COLONNE_INVERSO + colonne_origine
+        )
+        
+        try:
+            for idx, file in enumerate(files_confronto):
+                search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                log_callback(search_msg, LOG_INFO)
                 
-                # Carica solo le intestazioni (0 righe) per trovare la colonna ISBN
-                df_headers = pd.read_excel(file, sheet_name=nome, nrows=0, dtype=str)
-                col_isbn = trova_colonna_isbn(df_headers, self.config)
+                if self._precompilato(file):
+                    blocchi = self._assenti_precompilato(file, riferimento)
+                else:
+                    blocchi = self._assenti_file(file, riferimento, righe_complete, log_callback)
+                righe_file = 0
+                for blocco in blocchi:
+                    scrittore.aggiungi_righe(self._righe_inverso(blocco, colonne_origine))
+                    righe_file += len(blocco[0])
                 
-                if not col_isbn:
-                    continue
+                file_msg = (
+                    self.t.proc_reverse_file if self.t
+                    else "  ↩️ {file}: {rows} righe con ISBN assenti dalla worklist"
+                ).format(file=file.name, rows=righe_file)
+                log_callback(file_msg, LOG_INFO)
                 
-                # Carica SOLO la colonna ISBN (risparmio enorme di memoria!)
-                df_isbn_only = pd.read_excel(
-                    file, 
-                    sheet_name=nome, 
-                    usecols=[col_isbn], 
+                if progress_callback:
+                    progress_callback(20 + int(70 * ((idx + 1) / len(files_confronto))), 100)
+        except BaseException:
+            # Errore o interruzione a metà: via i file temporanei del workbook
+            scrittore.scarta()
+            raise
+        
+        if not scrittore.n_righe:
+            scrittore.scarta()
+            error_msg = (
+                self.t.error_reverse_none if self.t
+                else "Tutti gli ISBN dei file di confronto sono presenti nella worklist"
+            )
+            raise Exception(error_msg)
+        
+        output = percorso_su_disco(files_confronto[0]).parent / f"inverso_isbn{self.config.SUFFIX_OUTPUT}"
+        scrittore.salva(output)
+        
+        if progress_callback:
+            progress_callback(100, 100)
+        
+        summary_msg = f"{self.t.proc_summary if self.t else 'Riepilogo'}:"
+        log_callback(summary_msg, LOG_INFO)
+        
+        wl_msg = f"  • {self.t.proc_worklist_unique if self.t else 'ISBN worklist (unici)'}: {len(riferimento)}"
+        log_callback(wl_msg, LOG_INFO)
+        
+        result_msg = f"  • {self.t.proc_results_reverse if self.t else 'Righe con ISBN assenti dalla worklist'}: {scrittore.n_righe}"
+        log_callback(result_msg, LOG_SUCCESS)
+        
+        return {
+            'output': output,
+            'output_parti': [output],
+            'isbn_wl': len(riferimento),
+            'match_trovati': scrittore.n_righe,
+            'files_elaborati': len(worklists) + len(files_confronto),
+            'duplicati_rimossi': 0,
+            'modalita': self.config.MODE_INVERSO
+        }
+    
+    def _assenti_file(
+        self,
+        file: Path,
+        riferimento: np.ndarray,
+        righe_complete: bool,
+        log_callback: Callable[[str, str], None]
+    ) -> Iterator[Tuple[pd.DataFrame, Optional[pd.DataFrame]]]:
+        """
+        Righe di un file di confronto con ISBN assenti dal riferimento,
+        blocco per blocco.
+        
+        Yields:
+            (ISBN assenti, file e foglio; righe di origine se righe_complete)
+        """
+        colonna_isbn, colonna_file, colonna_foglio = self.config.COLONNE_INVERSO
+        for foglio, _, colonna, blocchi in self._fogli_a_blocchi(file, log_callback):
+            for blocco in blocchi:
+                chiavi = estrai_chiavi_isbn(blocco.iloc[:, colonna.indice], self.config)
+                if chiavi.empty:
+                    continue
+                codici = codifica_chiavi_isbn(chiavi.to_numpy(), self.config.MAX_ISBN_LENGTH)
+                assenti = chiavi[~posizioni_presenti(riferimento, codici)[0]]
+                if assenti.empty:
+                    continue
+                # Celle multi-valore: gli ISBN assenti della riga in un'unica cella
+                per_riga = assenti.groupby(level=0, sort=False).agg('; '.join)
+                origine = pd.DataFrame({
+                    colonna_isbn: per_riga.to_numpy(),
+                    colonna_file: file.name,
+                    colonna_foglio: foglio,
+                })
+                yield origine, blocco.iloc[per_riga.index] if righe_complete else None
+    
+    def _assenti_precompilato(
+        self,
+        file: Path,
+        riferimento: np.ndarray
+    ) -> Iterator[Tuple[pd.DataFrame, None]]:
+        """ISBN di un indice o storico assenti dal riferimento, una riga per ISBN con file e foglio di origine"""
+        colonna_isbn, colonna_file, colonna_foglio = self.config.COLONNE_INVERSO
+        larghezza = self.config.MAX_ISBN_LENGTH
+        if file.suffix.lower() == self.config.SUFFIX_STORICO:
+            # Confronto in SQL, a blocchi: lo storico non viene caricato in memoria
+            with self._apri_storico(file) as storico:
+                for righe in storico.assenti(
+                    riferimento, self.config.STORICO_DAL, self.config.STORICO_AL,
+                    self.config.RIGHE_BLOCCO_INVERSO
+                ):
+                    chiavi, file_origine, fogli, _ = zip(*righe)
+                    codici = np.array(chiavi, dtype=np.int64).astype(np.uint64)
+                    yield pd.DataFrame({
+                        colonna_isbn: decodifica_chiavi_isbn(codici, larghezza),
+                        colonna_file: file_origine,
+                        colonna_foglio: fogli,
+                    }), None
+            return
+        
+        try:
+            indice = IndiceIsbn(file)
+        except IndiceNonValido as e:
+            raise Exception(str(e))
+        for inizio in range(0, len(indice), BLOCCO_CHIAVI):
+            chiavi = np.asarray(indice.chiavi[inizio:inizio + BLOCCO_CHIAVI])
+            codici = codifica_chiavi_isbn(chiavi, larghezza)
+            assenti = chiavi[~posizioni_presenti(riferimento, codici)[0]]
+            if not len(assenti):
+                continue
+            origini = indice.sorgente_di(assenti)
+            yield pd.DataFrame({
+                colonna_isbn: assenti.astype(str),
+                colonna_file: [o['file'] for o in origini],
+                colonna_foglio: [o['foglio'] for o in origini],
+            }), None
+    
+    def _righe_inverso(
+        self,
+        blocco: Tuple[pd.DataFrame, Optional[pd.DataFrame]],
+        colonne_origine: List[str]
+    ) -> pd.DataFrame:
+        """Righe di output: ISBN, file e foglio, seguite (se richiesto) dalle colonne di origine"""
+        origine, righe = blocco
+        if not colonne_origine:
+            return origine
+        if righe is None:
+            righe = pd.DataFrame(index=origine.index, columns=colonne_origine)
+        else:
+            righe = righe.reindex(columns=colonne_origine).set_axis(origine.index)
+        return pd.concat([origine, righe], axis=1)
+    
+    def _intestazioni_fogli(self, file: Path) -> Iterator[List[str]]:
+        """
+        Intestazioni dei fogli con colonna ISBN di un file Excel, come le
+        rende _fogli_a_blocchi, senza leggere le righe di dati: i .xls
+        vengono letti solo fino a config.RIGHE_CAMPIONE_ISBN righe.
+        """
+        if file.suffix.lower() in ('.xlsx', '.xlsm'):
+            # In streaming le intestazioni vengono già dal solo campione
+            for _, intestazioni, _, _ in self._fogli_a_blocchi(file, lambda m, l: None):
+                yield intestazioni
+            return
+        
+        with pd.ExcelFile(self._sorgente(file)) as xls:
+            for nome in xls.sheet_names:
+                if nome.lower() == self.config.SHEET_PARAMETRI:
+                    continue
+                colonna = individua_colonna_isbn(xls, nome, self.config)
+                if colonna is None:
+                    continue
+                campione = xls.parse(
+                    nome,
+                    header=colonna.riga_intestazione,
+                    nrows=self.config.RIGHE_CAMPIONE_ISBN,
                     dtype=str
                 )
+                if colonna.riga_intestazione is None:
+                    yield [get_column_letter(i + 1) for i in range(campione.shape[1])]
+                else:
+                    yield _intestazioni_univoche(list(campione.columns))
+    
+    def _fogli_a_blocchi(
+        self,
+        file: Path,
+        log_callback: Callable[[str, str], None]
+    ) -> Iterator[Tuple[str, List[str], ColonnaIsbn, Iterator[pd.DataFrame]]]:
+        """
+        Fogli con colonna ISBN di un file Excel, letti a blocchi di
+        config.RIGHE_BLOCCO_INVERSO righe.
+        
+        I .xlsx/.xlsm vengono letti in streaming (openpyxl in sola
+        lettura); gli altri formati (.xls, limitati a 65.536 righe) con
+        pandas e poi divisi. I valori sono stringhe, come con dtype=str;
+        intestazioni vuote o ripetute come le rende pandas, lettere di
+        colonna se il foglio non ha intestazione.
+        
+        Yields:
+            (nome foglio, intestazioni, colonna ISBN, blocchi di righe);
+            i blocchi vanno consumati prima di passare al foglio successivo
+        """
+        dimensione = self.config.RIGHE_BLOCCO_INVERSO
+        if file.suffix.lower() not in ('.xlsx', '.xlsm'):
+            with pd.ExcelFile(self._sorgente(file)) as xls:
+                for nome in xls.sheet_names:
+                    if nome.lower() == self.config.SHEET_PARAMETRI:
+                        continue
+                    colonna = individua_colonna_isbn(xls, nome, self.config)
+                    if colonna is None:
+                        continue
+                    self._log_colonna_rilevata(file, nome, colonna, log_callback)
+                    df = xls.parse(nome, header=colonna.riga_intestazione, dtype=str)
+                    if colonna.riga_intestazione is None:
+                        df.columns = [get_column_letter(i + 1) for i in range(df.shape[1])]
+                    else:
+                        df.columns = _intestazioni_univoche(list(df.columns))
+                    yield nome, list(df.columns), colonna, (
+                        df.iloc[inizio:inizio + dimensione].reset_index(drop=True)
+                        for inizio in range(0, len(df), dimensione)
+                    )
+            return
+        
+        wb = load_workbook(self._sorgente(file), read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                if ws.title.lower() == self.config.SHEET_PARAMETRI:
+                    continue
+                campione = pd.DataFrame([
+                    [_testo_cella(valore) for valore in riga]
+                    for riga in ws.iter_rows(max_row=self.config.RIGHE_CAMPIONE_ISBN, values_only=True)
+                ])
+                colonna = rileva_colonna_isbn(campione, self.config)
+                if colonna is None:
+                    continue
+                self._log_colonna_rilevata(file, ws.title, colonna, log_callback)
                 
-                # Normalizza ISBN (usa vettorizzazione quando possibile)
-                df_isbn_only[self.config.COL_ISBN_NORM] = normalizza_serie_isbn(
-                    df_isbn_only[col_isbn],
-                    self.config
-                )
-                
-                # Filtra validi (vettorizzato)
-                mask_validi = valida_serie_isbn(
-                    df_isbn_only[self.config.COL_ISBN_NORM],
-                    self.config
-                )
-                isbn_validi = df_isbn_only.loc[mask_validi, self.config.COL_ISBN_NORM]
-                
-                # Trova match (usa set per performance O(1))
-                matches = isbn_validi.isin(set_isbn_riferimento)
-                
-                if matches.any():
-                    isbn_trovati.update(isbn_validi[matches].values)
-                    file_matches += matches.sum()
-            
-            if file_matches > 0:
-                match_msg = f"  {self.t.proc_matches_in if self.t else 'Match in'} {file.name}: {file_matches}"
-                log_callback(match_msg, LOG_SUCCESS)
+                if colonna.riga_intestazione is None:
+                    intestazioni = [get_column_letter(i + 1) for i in range(campione.shape[1])]
+                    prima_riga = 1
+                else:
+                    intestazioni = _intestazioni_univoche(list(campione.iloc[colonna.riga_intestazione]))
+                    prima_riga = colonna.riga_intestazione + 2
+                righe = ws.iter_rows(min_row=prima_riga, values_only=True)
+                yield ws.title, intestazioni, colonna, _blocchi_righe(righe, intestazioni, dimensione)
+        finally:
+            wb.close()
+    
+    def _log_modalita(self, modalita: str, log_callback: Callable[[str, str], None]) -> None:
+        if modalita == self.config.MODE_MATCH:
+            log_callback(self.t.proc_mode_match if self.t else "🔍 Modalità: TROVA CORRISPONDENZE", LOG_INFO)
+        elif modalita == self.config.MODE_ENTRAMBI:
+            log_callback(self.t.proc_mode_both if self.t else "🔍 Modalità: CORRISPONDENZE E NON CORRISPONDENZE", LOG_INFO)
+        elif modalita == self.config.MODE_INVERSO:
+            log_callback(self.t.proc_mode_reverse if self.t else "🔍 Modalità: ISBN DEI FILE DI CONFRONTO ASSENTI DALLA WORKLIST", LOG_INFO)
+        else:
+            log_callback(self.t.proc_mode_non_match if self.t else "🔍 Modalità: TROVA NON CORRISPONDENZE", LOG_INFO)
+    
+    def _salva_risultato(
+        self,
+        esito: Tuple[pd.DataFrame, Optional[pd.DataFrame], int, int, int],
+        cartella_output: Path,
+        modalita: str,
+        n_file: int,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]],
+        prefisso_output: str = ''
+    ) -> Dict[str, Any]:
+        """
+        Scrive e formatta il file di output di un confronto e ne registra
+        il riepilogo.
         
-        if progress_callback:
-            progress_callback(70, 100)
+        Args:
+            esito: Tupla restituita da _confronto_in_memoria e simili
+            cartella_output: Cartella del file di output
+            modalita: "MATCH", "NON_MATCH" o "ENTRAMBI" (righe con e senza
+                match in due fogli, o due file con OUTPUT_ENTRAMBI_IN_FILE)
+            n_file: File elaborati (per il riepilogo)
+            prefisso_output: Anteposto al nome del file di output (es. nome
+                della worklist, per non sovrascrivere gli output di un batch)
+        
+        Returns:
+            Dict con statistiche (vedi process_confronto_isbn)
+        """
+        df_finale, df_duplicati, isbn_unici_prima, duplicati, n_trovati = esito
         
         # ====================================================================
         # STEP 3: Filtra risultati in base alla modalità
         # ====================================================================
-        # Crea maschera booleana (più efficiente e leggibile)
-        is_present = df_wl[self.config.COL_ISBN_NORM].isin(isbn_trovati)
-
+        # Partizioni da scrivere: (prefisso file, prefisso fogli, righe, etichetta riepilogo)
         if modalita == self.config.MODE_MATCH:
             # Modalità: trova ISBN che HANNO match
-            if not isbn_trovati:
+            if not n_trovati:
                 error_msg = self.t.error_no_matches if self.t else "Nessun match trovato tra la worklist e gli altri file"
                 raise Exception(error_msg)
             
-            df_finale = df_wl[is_present].copy()
-            output_prefix = "confronto_isbn"
             log_msg = self.t.proc_results_found if self.t else "Match trovati"
+            partizioni = [("confronto_isbn", None, trim_df(df_finale), log_msg)]
+        elif modalita == self.config.MODE_ENTRAMBI:
+            # Modalità: righe con e senza match dallo stesso confronto
+            esito_match = df_finale.pop(self.config.COL_ESITO_MATCH).to_numpy(dtype=bool)
+            df_finale = trim_df(df_finale)
+            match_msg = self.t.proc_results_match if self.t else "Corrispondenze"
+            non_match_msg = self.t.proc_results_non_match if self.t else "Non corrispondenze"
+            if self.config.OUTPUT_ENTRAMBI_IN_FILE:
+                partizioni = [
+                    ("confronto_isbn", None, df_finale[esito_match], match_msg),
+                    ("non_match_isbn", None, df_finale[~esito_match], non_match_msg),
+                ]
+            else:
+                partizioni = [
+                    ("confronto_completo_isbn", self.config.SHEET_MATCH, df_finale[esito_match], match_msg),
+                    ("confronto_completo_isbn", self.config.SHEET_NON_MATCH, df_finale[~esito_match], non_match_msg),
+                ]
         else:
             # Modalità: trova ISBN che NON HANNO match
-            df_finale = df_wl[~is_present].copy()
-            
             if df_finale.empty:
                 error_msg = self.t.error_all_matched if self.t else "Tutti gli ISBN della worklist hanno match negli altri file"
                 raise Exception(error_msg)
             
-            output_prefix = "non_match_isbn"
             log_msg = self.t.proc_results_found if self.t else "Non corrispondenze trovate"
-        
-        # Rimuovi colonna temporanea
-        df_finale = df_finale.drop([self.config.COL_ISBN_NORM], axis=1)
-        df_finale = trim_df(df_finale)
+            partizioni = [("non_match_isbn", None, trim_df(df_finale), log_msg)]
         
         # Verifica consistenza
-        risultati_count = len(df_finale)
+        risultati_count = sum(len(df) for _, _, df, _ in partizioni)
+        
+        # Fogli di ogni file di output, nell'ordine di scrittura
+        fogli_output: Dict[Path, List[Tuple[str, pd.DataFrame]]] = {}
+        n_parti = 0
+        for prefisso_file, prefisso_fogli, df_partizione, _ in partizioni:
+            parti = self._parti_output(df_partizione, log_callback)
+            n_parti += len(parti)
+            if prefisso_fogli is not None:
+                parti = [
+                    (prefisso_fogli if len(parti) == 1 else f"{prefisso_fogli}_{nome}", df)
+                    for nome, df in parti
+                ]
+            if self.config.OUTPUT_PARTI_IN_FILE and len(parti) > 1:
+                # Un file per parte
+                for nome, df in parti:
+                    file_parte = cartella_output / f"{prefisso_output}{prefisso_file}_{nome}{self.config.SUFFIX_OUTPUT}"
+                    fogli_output[file_parte] = [(nome, df)]
+            else:
+                file_partizione = cartella_output / f"{prefisso_output}{prefisso_file}{self.config.SUFFIX_OUTPUT}"
+                fogli_output.setdefault(file_partizione, []).extend(parti)
         
-        output = file_non_wl[0].parent / f"{output_prefix}{self.config.SUFFIX_OUTPUT}"
+        output_parti = list(fogli_output)
+        output = output_parti[0]
+        if df_duplicati is not None:
+            # Il report duplicati va nel primo file
+            fogli_output[output].append((self.config.SHEET_DUPLICATI, df_duplicati))
         
-        df_finale.to_excel(output, index=False, engine='openpyxl')
+        # Output diviso o grande: scrittura e formattazione in streaming
+        diviso = n_parti > len(partizioni)
+        streaming = diviso or risultati_count > self.config.SOGLIA_SCRITTURA_STREAMING
         
         if progress_callback:
             progress_callback(80, 100)
         
-        # Applica formattazione Excel
-        format_msg = self.t.proc_applying_format if self.t else "Applicazione formattazione Excel..."
-        log_callback(format_msg, LOG_INFO)
-        formatta_excel_isbn(output, self.config, log_callback, progress_callback, self.t)
+        if streaming:
+            streaming_msg = (
+                self.t.proc_output_streaming if self.t
+                else "📝 Scrittura e formattazione in streaming di {rows} righe"
+            ).format(rows=risultati_count)
+            log_callback(streaming_msg, LOG_INFO)
+        
+        for n, (file_output, fogli) in enumerate(fogli_output.items()):
+            fogli = _nomi_fogli_univoci(fogli)
+            # Avanzamento del formattatore solo con un unico file
+            avanzamento = progress_callback if len(fogli_output) == 1 else None
+            if streaming:
+                scrivi_excel_streaming(file_output, fogli, self.config, log_callback, avanzamento, self.t)
+            else:
+                with pd.ExcelWriter(file_output, engine='openpyxl') as writer:
+                    for nome, df in fogli:
+                        df.to_excel(writer, sheet_name=nome, index=False)
+                
+                # Applica formattazione Excel (tutti i fogli in un solo passaggio)
+                format_msg = self.t.proc_applying_format if self.t else "Applicazione formattazione Excel..."
+                log_callback(format_msg, LOG_INFO)
+                formatta_excel_isbn(file_output, self.config, log_callback, avanzamento, self.t)
+            if progress_callback and avanzamento is None:
+                progress_callback(80 + 20 * (n + 1) // len(fogli_output), 100)
+        
+        if diviso:
+            if self.config.OUTPUT_PARTI_IN_FILE:
+                split_msg = (
+                    self.t.proc_output_split_files if self.t
+                    else "📑 Output diviso in {parts} file"
+                ).format(parts=len(fogli_output))
+            else:
+                split_msg = (
+                    self.t.proc_output_split_sheets if self.t
+                    else "📑 Output diviso in {parts} fogli"
+                ).format(parts=n_parti)
+            log_callback(split_msg, LOG_INFO)
+        
+        if df_duplicati is not None:
+            report_msg = (
+                self.t.proc_duplicates_report if self.t
+                else "📑 Report duplicati: {count} ISBN nel foglio '{sheet}'"
+            ).format(count=len(df_duplicati), sheet=self.config.SHEET_DUPLICATI)
+            log_callback(report_msg, LOG_INFO)
         
         if progress_callback:
             progress_callback(100, 100)
@@ -281,14 +845,1859 @@ class DataProcessor:
             dup_msg = f"  • {self.t.proc_duplicates_removed_label if self.t else 'Duplicati rimossi'}: {duplicati}"
             log_callback(dup_msg, LOG_WARNING)
         
-        result_msg = f"  • {log_msg}: {risultati_count}"
-        log_callback(result_msg, LOG_SUCCESS)
+        for _, _, df_partizione, log_msg in partizioni:
+            result_msg = f"  • {log_msg}: {len(df_partizione)}"
+            log_callback(result_msg, LOG_SUCCESS)
         
-        return {
+        risultato = {
             'output': output,
+            'output_parti': output_parti,
             'isbn_wl': isbn_unici_prima,
-            'match_trovati': risultati_count,
-            'files_elaborati': len(files),
+            'match_trovati': len(partizioni[0][2]),
+            'files_elaborati': n_file,
             'duplicati_rimossi': duplicati,
             'modalita': modalita
         }
+        if modalita == self.config.MODE_ENTRAMBI:
+            risultato['non_match_trovati'] = len(partizioni[1][2])
+        return risultato
+    
+    def _parti_output(
+        self,
+        df_finale: pd.DataFrame,
+        log_callback: Callable[[str, str], None]
+    ) -> List[Tuple[str, pd.DataFrame]]:
+        """
+        Divide i risultati in parti (fogli o file) per colonna
+        OUTPUT_DIVIDI_PER e per numero di righe (OUTPUT_MAX_RIGHE_FOGLIO).
+        
+        Returns:
+            Tuple (nome parte, righe), nell'ordine di scrittura; una sola
+            parte "Sheet1" (come to_excel) se l'output non va diviso
+        """
+        gruppi: List[Tuple[str, pd.DataFrame]] = []
+        colonna = self.config.OUTPUT_DIVIDI_PER
+        if colonna:
+            trovata = next(
+                (c for c in df_finale.columns if str(c).strip().lower() == colonna.strip().lower()),
+                None
+            )
+            if trovata is None:
+                missing_msg = (
+                    self.t.proc_output_group_missing if self.t
+                    else "⚠️ Colonna '{column}' non presente nei risultati: output non diviso per gruppo"
+                ).format(column=colonna)
+                log_callback(missing_msg, LOG_WARNING)
+            else:
+                for valore, df_gruppo in df_finale.groupby(trovata, sort=True, dropna=False):
+                    valore = '' if pd.isna(valore) else str(valore).strip()
+                    nome = valore or self.config.SHEET_GRUPPO_VUOTO
+                    gruppi.append((nome, df_gruppo))
+        if not gruppi:
+            gruppi = [(self.config.SHEET_RISULTATI, df_finale)]
+        
+        massimo = max(1, min(self.config.OUTPUT_MAX_RIGHE_FOGLIO, 1_048_575))
+        parti = []
+        for nome, df_gruppo in gruppi:
+            if len(df_gruppo) <= massimo:
+                parti.append((nome, df_gruppo))
+            else:
+                for n, inizio in enumerate(range(0, len(df_gruppo), massimo), 1):
+                    parti.append((f"{nome}_{n}", df_gruppo.iloc[inizio:inizio + massimo]))
+        
+        if len(parti) == 1:
+            return [("Sheet1", df_finale)]
+        return _nomi_fogli_univoci(parti)
+    
+    def _confronto_in_memoria(
+        self,
+        file_wl: Path,
+        file_non_wl: List[Path],
+        modalita: str,
+        report_duplicati: bool,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]],
+        piano: PianoEsecuzione
+    ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], int, int, int]:
+        """
+        Confronto con worklist e chiavi interamente in memoria.
+        
+        Returns:
+            Tupla (righe risultato, report duplicati o None, ISBN unici,
+            duplicati rimossi, ISBN della worklist trovati)
+        """
+        # ====================================================================
+        # STEP 1: Carica worklist (concatena tutti i fogli)
+        # ====================================================================
+        df_wl, df_duplicati, analisi = self._worklist_deduplicata(
+            file_wl, report_duplicati, log_callback
+        )
+        
+        if self._chiavi_anticipate is not None:
+            self._chiavi_anticipate.worklist_pronta()
+        elif progress_callback:
+            progress_callback(30, 100)
+        
+        # ====================================================================
+        # STEP 2: Ricerca match negli altri file
+        # ====================================================================
+        # OTTIMIZZAZIONE: Converte ISBN worklist in set per lookup O(1)
+        set_isbn_riferimento = set(df_wl[self.config.COL_ISBN_NORM])
+        
+        ref_msg = f"{self.t.proc_reference_set if self.t else '📦 Set di riferimento creato'} ({len(set_isbn_riferimento)} ISBN)"
+        log_callback(ref_msg, LOG_INFO)
+        
+        isbn_trovati = set()
+        total_files = len(file_non_wl)
+        
+        if self._chiavi_anticipate is not None:
+            esiti = self._match_chiavi_anticipate(
+                file_non_wl, set_isbn_riferimento, log_callback
+            )
+        elif self._lettura_parallela(file_non_wl, piano):
+            esiti = self._match_file_paralleli(
+                file_non_wl, set_isbn_riferimento, log_callback, piano
+            )
+        else:
+            esiti = self._match_file_sequenziale(
+                file_non_wl, set_isbn_riferimento, log_callback, piano
+            )
+        
+        for idx, (file, trovati, file_matches) in enumerate(esiti):
+            isbn_trovati.update(trovati)
+            self._log_match_file(file, file_matches, log_callback)
+            
+            # Con le letture anticipate l'avanzamento segue le letture stesse
+            if progress_callback and self._chiavi_anticipate is None:
+                progress_callback(30 + int(40 * ((idx + 1) / total_files)), 100)
+        
+        if progress_callback:
+            progress_callback(70, 100)
+        
+        df_finale = self._righe_risultato(df_wl, isbn_trovati, modalita)
+        return df_finale, df_duplicati, analisi.n_unici, analisi.n_duplicati, len(isbn_trovati)
+    
+    def _worklist_deduplicata(
+        self,
+        file_wl: Path,
+        report_duplicati: bool,
+        log_callback: Callable[[str, str], None]
+    ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], AnalisiDuplicati]:
+        """
+        Carica la worklist e rimuove gli ISBN duplicati (prima occorrenza).
+        
+        Returns:
+            Tupla (worklist deduplicata, report duplicati o None, analisi)
+        """
+        df_wl, isbn_multi = self._carica_worklist(file_wl, log_callback)
+        self._log_isbn_multi(isbn_multi, log_callback)
+        
+        # Diagnostica e deduplicazione in un solo passaggio (fattorizzazione)
+        analisi = analizza_duplicati(df_wl[self.config.COL_ISBN_NORM])
+        self._log_duplicati(analisi.n_righe, analisi.n_unici, log_callback)
+        
+        df_duplicati = None
+        if report_duplicati and analisi.n_duplicati > 0:
+            df_duplicati = crea_report_duplicati(
+                analisi,
+                df_wl[self.config.COL_FOGLIO_ORIGINE],
+                self.config
+            )
+        
+        # Deduplicazione - mantiene prima occorrenza
+        return df_wl[analisi.prima_occorrenza], df_duplicati, analisi
+    
+    def _righe_risultato(self, df_wl: pd.DataFrame, isbn_trovati: set, modalita: str) -> pd.DataFrame:
+        """
+        Righe worklist da scrivere nell'output, senza colonne temporanee.
+        
+        Una riga ha match se almeno uno dei suoi ISBN è stato trovato; le
+        altre sono le non corrispondenze (le due parti non si
+        sovrappongono). In modalità ENTRAMBI: righe con match seguite dalle
+        righe senza match, con la colonna temporanea COL_ESITO_MATCH (vedi
+        _salva_risultato); la maschera viene calcolata una volta sola.
+        """
+        # Crea maschera booleana (più efficiente e leggibile)
+        is_present = df_wl[self.config.COL_ISBN_NORM].isin(isbn_trovati)
+        if df_wl.index.has_duplicates:
+            # Celle multi-valore: esito per riga, non per ISBN
+            is_present = is_present.groupby(level=0, sort=False).transform('any')
+        if modalita == self.config.MODE_ENTRAMBI:
+            return pd.concat([
+                self._righe_risultato_maschera(df_wl, is_present).assign(
+                    **{self.config.COL_ESITO_MATCH: True}),
+                self._righe_risultato_maschera(df_wl, ~is_present).assign(
+                    **{self.config.COL_ESITO_MATCH: False}),
+            ])
+        if modalita == self.config.MODE_MATCH:
+            return self._righe_risultato_maschera(df_wl, is_present)
+        return self._righe_risultato_maschera(df_wl, ~is_present)
+    
+    def _righe_risultato_maschera(self, df_wl: pd.DataFrame, maschera: pd.Series) -> pd.DataFrame:
+        df_finale = df_wl[maschera].copy()
+        
+        # Una riga worklist con più ISBN compare una sola volta nell'output
+        df_finale = df_finale[~df_finale.index.duplicated(keep='first')]
+        
+        # Rimuovi colonne temporanee
+        return df_finale.drop(
+            [self.config.COL_ISBN_NORM, self.config.COL_FOGLIO_ORIGINE], axis=1
+        )
+    
+    def _confronto_incrementale(
+        self,
+        file_wl: Path,
+        file_non_wl: List[Path],
+        modalita: str,
+        report_duplicati: bool,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]],
+        piano: PianoEsecuzione,
+        file_stato: Path
+    ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], int, int, int]:
+        """
+        Confronto incrementale a partire dallo stato della riconciliazione
+        precedente (reconcile_state).
+        
+        Se i file di confronto non sono cambiati (impronte rapide uguali) e
+        nemmeno le impostazioni che ne determinano le chiavi
+        (reconcile_state.impostazioni_chiavi), vengono cercate solo le chiavi worklist nuove o modificate, nelle
+        chiavi di confronto salvate; gli esiti delle altre vengono dallo
+        stato. Altrimenti le chiavi di confronto vengono rilette e tutte le
+        chiavi verificate. Lo stato aggiornato viene salvato al termine.
+        
+        Returns:
+            Tupla come _confronto_in_memoria
+        """
+        df_wl, df_duplicati, analisi = self._worklist_deduplicata(
+            file_wl, report_duplicati, log_callback
+        )
+        if progress_callback:
+            progress_callback(30, 100)
+        
+        chiavi = np.asarray(df_wl[self.config.COL_ISBN_NORM].unique(), dtype=object)
+        codici = codifica_chiavi_isbn(chiavi, self.config.MAX_ISBN_LENGTH)
+        impronte = [impronta_rapida(f) for f in file_non_wl]
+        impostazioni = impostazioni_chiavi(self.config)
+        
+        stato = None
+        if file_stato.exists():
+            try:
+                stato = carica_stato(file_stato)
+            except StatoNonValido as e:
+                invalid_msg = (
+                    self.t.proc_incremental_invalid if self.t
+                    else "⚠️ Stato precedente non utilizzabile ({reason}): confronto completo"
+                ).format(reason=e)
+                log_callback(invalid_msg, LOG_WARNING)
+        
+        rimosse = 0
+        if stato is not None and stato.impronte == impronte and stato.impostazioni == impostazioni:
+            confronto = stato.confronto
+            note, trovate = stato.esito(codici)
+            rimosse = len(stato.chiavi) - int(note.sum())
+        else:
+            if stato is not None and stato.impronte != impronte:
+                changed_msg = (
+                    self.t.proc_incremental_sources_changed if self.t
+                    else "🔁 File di confronto cambiati dall'ultima riconciliazione: rilettura completa"
+                )
+                log_callback(changed_msg, LOG_INFO)
+            elif stato is not None:
+                changed_msg = (
+                    self.t.proc_incremental_settings_changed if self.t
+                    else "🔁 Impostazioni di lettura delle chiavi cambiate dall'ultima riconciliazione: rilettura completa"
+                )
+                log_callback(changed_msg, LOG_INFO)
+            confronto = self.chiavi_confronto(file_non_wl, log_callback, piano)
+            note = np.zeros(len(codici), dtype=bool)
+            trovate = np.zeros(len(codici), dtype=bool)
+        
+        if progress_callback:
+            progress_callback(60, 100)
+        
+        # Solo le chiavi nuove o modificate vengono cercate
+        da_verificare = ~note
+        trovate[da_verificare] = posizioni_presenti(confronto, codici[da_verificare])[0]
+        
+        incremental_msg = (
+            self.t.proc_incremental if self.t
+            else "🔁 Incrementale: {checked} chiavi nuove o modificate verificate, "
+                 "{kept} dallo stato precedente, {removed} non più in worklist"
+        ).format(
+            checked=int(da_verificare.sum()),
+            kept=int(note.sum()),
+            removed=rimosse
+        )
+        log_callback(incremental_msg, LOG_INFO)
+        
+        ordine = np.argsort(codici)
+        salva_stato(file_stato, StatoConfronto(
+            chiavi=codici[ordine],
+            trovate=trovate[ordine],
+            confronto=confronto,
+            impronte=impronte,
+            impostazioni=impostazioni,
+        ))
+        
+        if progress_callback:
+            progress_callback(70, 100)
+        
+        isbn_trovati = set(chiavi[trovate])
+        df_finale = self._righe_risultato(df_wl, isbn_trovati, modalita)
+        return df_finale, df_duplicati, analisi.n_unici, analisi.n_duplicati, len(isbn_trovati)
+    
+    def _servizio_compatibile(
+        self,
+        file_non_wl: List[Path],
+        log_callback: Callable[[str, str], None]
+    ) -> Optional[Any]:
+        """
+        Client del servizio configurato (match_service), se risponde e ha
+        caricato gli stessi file di confronto; None = confronto locale.
+        """
+        from match_service import ClientServizio, ServizioNonDisponibile
+        
+        client = ClientServizio(self.config.SERVIZIO_INDIRIZZO, self.config.SERVIZIO_TIMEOUT_SECONDI)
+        try:
+            if not client.compatibile(file_non_wl, self.config):
+                incompatible_msg = (
+                    self.t.proc_service_incompatible if self.t
+                    else "⚠️ Il servizio ha caricato file di confronto diversi o con altre impostazioni: confronto locale"
+                )
+                log_callback(incompatible_msg, LOG_WARNING)
+                return None
+            caricato = client.stato()['caricato']
+        except (ServizioNonDisponibile, OSError) as e:
+            unavailable_msg = (
+                self.t.proc_service_unavailable if self.t
+                else "⚠️ Servizio non disponibile ({reason}): confronto locale"
+            ).format(reason=e)
+            log_callback(unavailable_msg, LOG_WARNING)
+            return None
+        
+        service_msg = (
+            self.t.proc_service if self.t
+            else "🛰️ Confronto tramite il servizio {address} (chiavi caricate il {loaded})"
+        ).format(address=self.config.SERVIZIO_INDIRIZZO, loaded=caricato)
+        log_callback(service_msg, LOG_INFO)
+        return client
+    
+    def _confronto_servizio(
+        self,
+        file_wl: Path,
+        file_non_wl: List[Path],
+        modalita: str,
+        report_duplicati: bool,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]],
+        piano: PianoEsecuzione,
+        client: Any
+    ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], int, int, int]:
+        """
+        Confronto con le chiavi già caricate dal servizio: viene letta solo
+        la worklist e al servizio si inviano le sue chiavi uniche. Se il
+        servizio smette di rispondere il confronto prosegue in locale.
+        
+        Returns:
+            Tupla come _confronto_in_memoria
+        """
+        from match_service import ServizioNonDisponibile
+        
+        df_wl, df_duplicati, analisi = self._worklist_deduplicata(
+            file_wl, report_duplicati, log_callback
+        )
+        if progress_callback:
+            progress_callback(30, 100)
+        
+        chiavi = np.asarray(df_wl[self.config.COL_ISBN_NORM].unique(), dtype=object)
+        inizio = time.perf_counter()
+        try:
+            trovate = client.confronta(chiavi)
+        except ServizioNonDisponibile as e:
+            unavailable_msg = (
+                self.t.proc_service_unavailable if self.t
+                else "⚠️ Servizio non disponibile ({reason}): confronto locale"
+            ).format(reason=e)
+            log_callback(unavailable_msg, LOG_WARNING)
+            confronto = self.chiavi_confronto(file_non_wl, log_callback, piano)
+            codici = codifica_chiavi_isbn(chiavi, self.config.MAX_ISBN_LENGTH)
+            trovate = posizioni_presenti(confronto, codici)[0]
+        else:
+            result_msg = (
+                self.t.proc_service_result if self.t
+                else "🛰️ Servizio: {found} di {count} chiavi trovate in {seconds:.2f} s"
+            ).format(found=int(trovate.sum()), count=len(chiavi), seconds=time.perf_counter() - inizio)
+            log_callback(result_msg, LOG_INFO)
+        
+        if progress_callback:
+            progress_callback(70, 100)
+        
+        isbn_trovati = set(chiavi[trovate])
+        df_finale = self._righe_risultato(df_wl, isbn_trovati, modalita)
+        return df_finale, df_duplicati, analisi.n_unici, analisi.n_duplicati, len(isbn_trovati)
+    
+    def _confronto_su_disco(
+        self,
+        file_wl: Path,
+        file_non_wl: List[Path],
+        modalita: str,
+        report_duplicati: bool,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]],
+        piano: PianoEsecuzione
+    ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], int, int, int]:
+        """
+        Confronto out-of-core: stesso risultato di _confronto_in_memoria.
+        
+        Le chiavi di worklist e cataloghi vengono codificate in uint64,
+        ordinate a blocchi su disco (external_sort) e fuse in un unico
+        flusso: dedup e join si fanno gruppo per gruppo, tenendo in memoria
+        solo un bit per riga worklist. Le righe selezionate vengono poi
+        rilette dalla worklist a blocchi (vedi _fogli_a_blocchi), tenendo
+        in memoria solo quelle.
+        
+        Nel flusso il valore di una chiave worklist è l'id globale della
+        riga (spostato di _BIT_POSIZIONE_CELLA bit, più la posizione
+        dell'ISBN nella cella); quello di una chiave catalogo è
+        -(indice file + 1), quindi nei gruppi le voci catalogo vengono prima.
+        
+        Returns:
+            Tupla come _confronto_in_memoria
+        """
+        larghezza = self.config.MAX_ISBN_LENGTH
+        elementi = piano.elementi_run
+        
+        with tempfile.TemporaryDirectory(
+            prefix='isbn_matcher_', dir=self.config.CARTELLA_TEMPORANEA
+        ) as cartella:
+            scrittore = ScrittoreRun(Path(cartella), 'chiavi', elementi)
+            
+            # STEP 1: solo la colonna ISBN di ogni foglio worklist
+            fogli_wl: List[Tuple[str, int]] = []
+            n_righe_wl = 0
+            isbn_multi = 0
+            for nome, chiavi in self._chiavi_file_confronto(file_wl, log_callback, piano.streaming):
+                fogli_wl.append((nome, n_righe_wl))
+                if chiavi.empty:
+                    continue
+                righe = chiavi.index.to_numpy(dtype=np.int64) + n_righe_wl
+                in_cella = chiavi.groupby(level=0, sort=False).cumcount().to_numpy()
+                isbn_multi += int((in_cella > 0).sum())
+                valori = (righe << _BIT_POSIZIONE_CELLA) | np.minimum(
+                    in_cella, (1 << _BIT_POSIZIONE_CELLA) - 1
+                )
+                scrittore.aggiungi(codifica_chiavi_isbn(chiavi.to_numpy(), larghezza), valori)
+                n_righe_wl = int(righe.max()) + 1
+            
+            if not fogli_wl:
+                error_msg = self.t.error_no_isbn_worklist if self.t else "Nessuna colonna ISBN trovata nel file worklist"
+                raise Exception(error_msg)
+            self._log_isbn_multi(isbn_multi, log_callback)
+            
+            if progress_callback:
+                progress_callback(30, 100)
+            
+            # STEP 2: chiavi dei file di confronto nello stesso flusso
+            letture = self._leggi_file_confronto(file_non_wl, log_callback, piano)
+            for idx, (file, parti) in enumerate(letture):
+                if progress_callback:
+                    progress_callback(30 + int(30 * (idx / len(file_non_wl))), 100)
+                
+                id_file = -(file_non_wl.index(file) + 1)
+                for codici in self._codici_file_confronto(file, parti):
+                    scrittore.aggiungi(codici, np.full(len(codici), id_file, dtype=np.int64))
+            
+            run = scrittore.chiudi()
+            runs_msg = (
+                self.t.proc_out_of_core_runs if self.t
+                else "💽 {count} chiavi ordinate in {runs} blocchi su disco"
+            ).format(count=scrittore.n_elementi, runs=len(run))
+            log_callback(runs_msg, LOG_INFO)
+            
+            if progress_callback:
+                progress_callback(60, 100)
+            
+            # Esito per riga: con match se almeno un suo ISBN è stato trovato
+            con_match = np.zeros(n_righe_wl, dtype=bool)
+            con_chiavi = np.zeros(n_righe_wl, dtype=bool)
+            match_per_file = np.zeros(len(file_non_wl), dtype=np.int64)
+            n_voci = n_unici = n_trovati = 0
+            duplicate: List[np.ndarray] = []
+            
+            for blocco in unisci_run(run, max(1 << 12, elementi // max(1, len(run)))):
+                chiavi, valori = blocco['chiave'], blocco['valore']
+                inizio = np.ones(len(chiavi), dtype=bool)
+                inizio[1:] = chiavi[1:] != chiavi[:-1]
+                gruppo = np.cumsum(inizio) - 1
+                starts = np.flatnonzero(inizio)
+                
+                wl = valori >= 0
+                voci_wl = np.add.reduceat(wl.astype(np.int64), starts)
+                con_catalogo = np.logical_or.reduceat(~wl, starts)
+                n_voci += int(wl.sum())
+                n_unici += int((voci_wl > 0).sum())
+                
+                # Righe catalogo che trovano la chiave in worklist, per file
+                match_catalogo = ~wl & (voci_wl[gruppo] > 0)
+                match_per_file += np.bincount(
+                    -valori[match_catalogo] - 1, minlength=len(file_non_wl)
+                )
+                
+                # Prima occorrenza di ogni chiave worklist (dedup)
+                prime = wl.copy()
+                prime[1:] &= inizio[1:] | ~wl[:-1]
+                righe = valori[prime] >> _BIT_POSIZIONE_CELLA
+                trovate = con_catalogo[gruppo[prime]]
+                n_trovati += int(trovate.sum())
+                con_match[righe[trovate]] = True
+                con_chiavi[righe] = True
+                
+                if report_duplicati:
+                    doppie = wl & (voci_wl[gruppo] > 1)
+                    if doppie.any():
+                        duplicate.append(blocco[doppie])
+        
+        for file, file_matches in zip(file_non_wl, match_per_file):
+            self._log_match_file(file, int(file_matches), log_callback)
+        
+        duplicati = n_voci - n_unici
+        self._log_duplicati(n_voci, n_unici, log_callback)
+        
+        df_duplicati = None
+        if report_duplicati and duplicati > 0:
+            df_duplicati = self._report_duplicati_su_disco(np.concatenate(duplicate), fogli_wl)
+        
+        if progress_callback:
+            progress_callback(70, 100)
+        
+        # Modalità ENTRAMBI: selezionate = con match, escluse = senza match
+        senza_match = con_chiavi & ~con_match
+        selezionate = senza_match if modalita == self.config.MODE_NON_MATCH else con_match
+        escluse = senza_match
+        
+        # STEP 3: rilegge a blocchi solo le righe selezionate, un foglio alla volta
+        limiti = {
+            nome: (inizio, fogli_wl[i + 1][1] if i + 1 < len(fogli_wl) else n_righe_wl)
+            for i, (nome, inizio) in enumerate(fogli_wl)
+        }
+        parti = []
+        for nome, intestazioni, colonna, blocchi in self._fogli_a_blocchi(file_wl, lambda m, l: None):
+            if nome not in limiti:
+                continue
+            inizio_foglio, fine_foglio = limiti[nome]
+            righe_con: List[pd.DataFrame] = []
+            righe_senza: List[pd.DataFrame] = []
+            riga = inizio_foglio
+            larghezza = 0
+            for blocco in blocchi:
+                blocco.index = pd.RangeIndex(riga - inizio_foglio, riga - inizio_foglio + len(blocco))
+                piene = np.flatnonzero(blocco.notna().to_numpy().any(axis=0))
+                if len(piene):
+                    larghezza = max(larghezza, int(piene[-1]) + 1)
+                
+                n = max(0, min(len(blocco), fine_foglio - riga))
+                maschera = np.zeros(len(blocco), dtype=bool)
+                maschera[:n] = selezionate[riga:riga + n]
+                righe_con.append(blocco[maschera])
+                if modalita == self.config.MODE_ENTRAMBI:
+                    maschera = np.zeros(len(blocco), dtype=bool)
+                    maschera[:n] = escluse[riga:riga + n]
+                    righe_senza.append(blocco[maschera])
+                riga += len(blocco)
+            
+            # Come pandas: niente colonne finali senza intestazione né valori
+            if colonna.riga_intestazione is not None:
+                larghezza = max([larghezza] + [
+                    i + 1 for i, valore in enumerate(intestazioni) if valore != f"Unnamed: {i}"
+                ])
+            df = pd.concat(righe_con) if righe_con else pd.DataFrame(columns=intestazioni)
+            df = df.iloc[:, :larghezza]
+            if colonna.riga_intestazione is None:
+                df.columns = range(larghezza)
+            if modalita != self.config.MODE_ENTRAMBI:
+                parti.append(df)
+                continue
+            df_senza = pd.concat(righe_senza) if righe_senza else pd.DataFrame(columns=intestazioni)
+            df_senza = df_senza.iloc[:, :larghezza].set_axis(df.columns, axis=1)
+            parti.append(df.assign(**{self.config.COL_ESITO_MATCH: True}))
+            parti.append(df_senza.assign(**{self.config.COL_ESITO_MATCH: False}))
+        
+        return pd.concat(parti), df_duplicati, n_unici, duplicati, n_trovati
+    
+    def piano_solo_confronto(self, files: List[Path]) -> PianoEsecuzione:
+        """Piano per leggere solo le chiavi di file di confronto, senza worklist"""
+        # La worklist non conta: la stima serve solo per la lettura dei file di confronto
+        stime = [StimaFile(path=Path(), dimensione=0)] + [stima_file(f, self.config) for f in files]
+        return pianifica(stime, self.config)
+    
+    def chiavi_confronto(
+        self,
+        files: List[Path],
+        log_callback: Callable[[str, str], None],
+        piano: Optional[PianoEsecuzione] = None
+    ) -> np.ndarray:
+        """
+        Chiavi di tutti i file di confronto (e indici) in uint64, ordinate e
+        uniche, lette come indicato dal piano (processi paralleli compresi;
+        default: piano_solo_confronto).
+        """
+        blocchi = [np.empty(0, dtype=np.uint64)]
+        blocchi += [chiavi for _, chiavi in self.chiavi_per_file(files, log_callback, piano)]
+        return np.unique(np.concatenate(blocchi))
+    
+    def chiavi_per_file(
+        self,
+        files: List[Path],
+        log_callback: Callable[[str, str], None],
+        piano: Optional[PianoEsecuzione] = None
+    ) -> Iterator[Tuple[Path, np.ndarray]]:
+        """
+        Come chiavi_confronto, file per file (nell'ordine in cui finisce la
+        lettura): chiavi in uint64 ordinate e uniche di ogni file.
+        """
+        if piano is None:
+            piano = self.piano_solo_confronto(files)
+        for file, parti in self._leggi_file_confronto(files, log_callback, piano):
+            blocchi = [np.empty(0, dtype=np.uint64)]
+            blocchi.extend(self._codici_file_confronto(file, parti))
+            yield file, np.unique(np.concatenate(blocchi))
+    
+    def _codici_file_confronto(
+        self,
+        file: Path,
+        parti: Optional[List[Tuple[str, pd.Series]]]
+    ) -> Iterator[np.ndarray]:
+        """Chiavi di un file di confronto (o indice/storico, se parti è None) in uint64, a blocchi"""
+        larghezza = self.config.MAX_ISBN_LENGTH
+        if parti is None and file.suffix.lower() == self.config.SUFFIX_STORICO:
+            with self._apri_storico(file) as storico:
+                yield storico.chiavi(self.config.STORICO_DAL, self.config.STORICO_AL)
+        elif parti is None:
+            try:
+                indice = IndiceIsbn(file)
+            except IndiceNonValido as e:
+                raise Exception(str(e))
+            for inizio in range(0, len(indice), BLOCCO_CHIAVI):
+                yield codifica_chiavi_isbn(
+                    np.asarray(indice.chiavi[inizio:inizio + BLOCCO_CHIAVI]), larghezza
+                )
+        else:
+            for _, chiavi in parti:
+                yield codifica_chiavi_isbn(chiavi.to_numpy(), larghezza)
+    
+    def _report_duplicati_su_disco(
+        self,
+        voci: np.ndarray,
+        fogli_wl: List[Tuple[str, int]]
+    ) -> pd.DataFrame:
+        """Report duplicati (come crea_report_duplicati) dalle voci worklist ripetute"""
+        col_isbn, col_righe, col_fogli = self.config.COLONNE_REPORT_DUPLICATI
+        righe = voci['valore'] >> _BIT_POSIZIONE_CELLA
+        inizi = np.array([inizio for _, inizio in fogli_wl], dtype=np.int64)
+        nomi = np.array([nome for nome, _ in fogli_wl], dtype=object)
+        
+        df = pd.DataFrame({
+            'chiave': voci['chiave'],
+            'valore': voci['valore'],
+            'foglio': nomi[np.searchsorted(inizi, righe, side='right') - 1],
+        })
+        gruppi = df.groupby('chiave', sort=False).agg(
+            righe=('valore', 'size'),
+            prima=('valore', 'min'),
+            fogli=('foglio', lambda f: ', '.join(map(str, f.unique()))),
+        ).sort_values('prima')
+        
+        return pd.DataFrame({
+            col_isbn: decodifica_chiavi_isbn(gruppi.index.to_numpy(), self.config.MAX_ISBN_LENGTH),
+            col_righe: gruppi['righe'].to_numpy(),
+            col_fogli: gruppi['fogli'].to_numpy(),
+        })
+    
+    def ispeziona(
+        self,
+        files: List[Path],
+        log_callback: Callable[[str, str], None]
+    ) -> List[StimaFile]:
+        """
+        Ispezione preliminare: dimensioni dei fogli dai metadati, colonna
+        ISBN rilevata su un campione di righe e costo stimato, senza
+        leggere i dati. Segnala anche i file identici aggiunti due volte.
+        
+        Returns:
+            Una StimaFile per file, nello stesso ordine
+        """
+        files = self._espandi_archivi(files, log_callback)
+        stime = [stima_file(f, self.config, rileva_isbn=True) for f in files]
+        identici = trova_file_identici(files)
+        
+        for stima in stime:
+            for riga, livello in self.descrivi_ispezione(stima, identici.get(stima.path)):
+                log_callback(riga, livello)
+        return stime
+    
+    def descrivi_ispezione(
+        self,
+        stima: StimaFile,
+        originale: Optional[Path] = None
+    ) -> List[Tuple[str, str]]:
+        """Righe di report (messaggio, livello) per un file ispezionato"""
+        costo = memoria_lettura(stima, self.config.LETTORE_XLSX_STREAMING, self.config)
+        if stima.indice:
+            righe = [((
+                self.t.inspect_index if self.t
+                else "📇 {file}: indice con {rows} ISBN"
+            ).format(file=stima.path.name, rows=stima.righe), LOG_INFO)]
+        else:
+            righe = [((
+                self.t.inspect_file if self.t
+                else "📄 {file}: {sheets} fogli, {rows} righe, lettura ~{cost} MB"
+            ).format(
+                file=stima.path.name,
+                sheets=len(stima.fogli),
+                rows=stima.righe,
+                cost=max(1, costo // (1024 * 1024))
+            ), LOG_INFO)]
+            for foglio in stima.fogli:
+                righe.append((self._descrivi_foglio(foglio), LOG_INFO))
+        
+        if originale is not None:
+            righe.append(((
+                self.t.inspect_identical if self.t
+                else "   ⏭️ Identico a {original}: verrà letto una volta sola"
+            ).format(original=originale.name), LOG_WARNING))
+        return righe
+    
+    def _descrivi_foglio(self, foglio: StimaFoglio) -> str:
+        colonna = foglio.colonna_isbn
+        if colonna is None:
+            isbn = self.t.inspect_no_isbn if self.t else "nessuna colonna ISBN"
+        elif colonna.da_contenuto or colonna.riga_intestazione is None:
+            isbn = (
+                self.t.inspect_isbn_by_content if self.t
+                else "ISBN in colonna {column} (dal contenuto)"
+            ).format(column=get_column_letter(colonna.indice + 1))
+        else:
+            isbn = (
+                self.t.inspect_isbn_column if self.t
+                else "ISBN in colonna {column}, intestazione alla riga {header}"
+            ).format(
+                column=get_column_letter(colonna.indice + 1),
+                header=colonna.riga_intestazione + 1
+            )
+        
+        stimata = (self.t.inspect_estimated if self.t else " (stima)") if foglio.stimata else ""
+        return (
+            self.t.inspect_sheet if self.t
+            else "   [{sheet}] {rows} righe × {columns} colonne{estimated} - {isbn}"
+        ).format(
+            sheet=foglio.nome,
+            rows=foglio.righe,
+            columns=foglio.colonne,
+            estimated=stimata,
+            isbn=isbn
+        )
+    
+    def _escludi_file_identici(
+        self,
+        files: List[Path],
+        log_callback: Callable[[str, str], None]
+    ) -> List[Path]:
+        """Toglie i file di confronto con contenuto identico a uno precedente"""
+        identici = trova_file_identici(files)
+        for copia, originale in identici.items():
+            skip_msg = (
+                self.t.proc_identical_file_skipped if self.t
+                else "⏭️ {file}: identico a {original}, ignorato"
+            ).format(file=copia.name, original=originale.name)
+            log_callback(skip_msg, LOG_WARNING)
+        return [f for f in files if f not in identici]
+    
+    def _log_piano(self, piano: PianoEsecuzione, log_callback: Callable[[str, str], None]) -> None:
+        """Spiega la strategia scelta dal pianificatore"""
+        if piano.forzata:
+            motivo = self.t.plan_reason_forced if self.t else "strategia impostata dal chiamante"
+        elif self.t:
+            motivo = {
+                self.config.STRATEGIA_IN_MEMORIA: self.t.plan_reason_in_memory,
+                self.config.STRATEGIA_STREAMING: self.t.plan_reason_streaming,
+                self.config.STRATEGIA_DUE_FASI: self.t.plan_reason_two_phase,
+                self.config.STRATEGIA_SU_DISCO: self.t.plan_reason_out_of_core,
+            }[piano.strategia]
+        else:
+            motivo = {
+                self.config.STRATEGIA_IN_MEMORIA: "tutti i dati entrano nel budget di memoria",
+                self.config.STRATEGIA_STREAMING: "worklist in memoria, file di confronto letti un foglio alla volta solo nella colonna ISBN",
+                self.config.STRATEGIA_DUE_FASI: "la worklist completa non entra in memoria: prima le chiavi, poi le sole righe selezionate",
+                self.config.STRATEGIA_SU_DISCO: "le chiavi non entrano in memoria: ordinamento a blocchi su disco",
+            }[piano.strategia]
+        
+        plan_msg = (
+            self.t.proc_plan if self.t
+            else "🧭 Strategia {strategy}: {reason}"
+        ).format(strategy=piano.strategia, reason=motivo)
+        log_callback(plan_msg, LOG_INFO)
+        
+        detail_msg = (
+            self.t.proc_plan_detail if self.t
+            else "   Stima worklist {worklist} MB, chiavi {keys} MB, lettura confronto {compare} MB "
+                 "(budget {budget} MB) - {workers} processi di lettura su {cpus} CPU"
+        ).format(
+            worklist=piano.memoria_worklist // (1024 * 1024),
+            keys=piano.memoria_chiavi // (1024 * 1024),
+            compare=piano.memoria_confronto // (1024 * 1024),
+            budget=piano.budget // (1024 * 1024),
+            workers=piano.workers,
+            cpus=piano.cpu
+        )
+        log_callback(detail_msg, LOG_INFO)
+    
+    def _chiudi_letture_anticipate(self) -> None:
+        """Ferma lettura anticipata e chiavi anticipate (se attive) e rilascia i buffer"""
+        if self._precaricatore is not None:
+            self._precaricatore.close()
+            self._precaricatore = None
+        if self._chiavi_anticipate is not None:
+            self._chiavi_anticipate.close()
+            self._chiavi_anticipate = None
+    
+    def _match_chiavi_anticipate(
+        self,
+        files: List[Path],
+        set_isbn_riferimento: set,
+        log_callback: Callable[[str, str], None]
+    ) -> Iterator[Tuple[Path, List[str], int]]:
+        """
+        Come _match_file_sequenziale, con le chiavi estratte durante il
+        caricamento della worklist (_ChiaviAnticipate): i file già pronti
+        vengono confrontati subito, gli altri man mano che finiscono.
+        """
+        for file in files:
+            if self._precompilato(file):
+                search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                log_callback(search_msg, LOG_INFO)
+                trovati = self._match_indice(file, set_isbn_riferimento, log_callback)
+                yield file, trovati, len(trovati)
+        
+        for file, parti, messaggi in self._chiavi_anticipate.completate():
+            search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+            log_callback(search_msg, LOG_INFO)
+            for messaggio, livello in messaggi:
+                log_callback(messaggio, livello)
+            trovati, file_matches = self._match_parti(parti, set_isbn_riferimento)
+            yield file, trovati, file_matches
+    
+    def _sorgente(self, file: Path) -> Union[Path, io.BytesIO]:
+        """
+        File da aprire: il buffer letto in anticipo, se disponibile, o il
+        path (per i file dentro un .zip, il contenuto letto dall'archivio)
+        """
+        if self._precaricatore is not None:
+            sorgente = self._precaricatore.apri(file)
+            if not isinstance(sorgente, Path):
+                return sorgente
+        return sorgente_input(file)
+    
+    def _espandi_archivi(
+        self,
+        files: List[Path],
+        log_callback: Callable[[str, str], None]
+    ) -> List[Path]:
+        """Sostituisce ogni archivio .zip con i file Excel che contiene, nello stesso punto"""
+        risultato = []
+        for file in files:
+            if file.suffix.lower() != self.config.SUFFIX_ARCHIVIO:
+                risultato.append(file)
+                continue
+            membri = elenca_archivio(file, self.config.SUFFISSI_EXCEL)
+            archive_msg = (
+                self.t.proc_archive_members if self.t
+                else "🗜️ {archive}: {count} file Excel letti dall'archivio"
+            ).format(archive=file.name, count=len(membri))
+            log_callback(archive_msg, LOG_INFO if membri else LOG_WARNING)
+            risultato.extend(membri)
+        return risultato
+    
+    def _precompilato(self, file: Path) -> bool:
+        """True per indici e storici ISBN: chiavi già pronte, nessun workbook da leggere"""
+        return file.suffix.lower() in (self.config.SUFFIX_INDICE, self.config.SUFFIX_STORICO)
+    
+    def _lettura_parallela(self, files: List[Path], piano: PianoEsecuzione) -> bool:
+        """True se conviene leggere i file di confronto in processi paralleli"""
+        da_leggere = [f for f in files if not self._precompilato(f)]
+        segmentati = any(piano.segmenti.get(f, 1) > 1 for f in da_leggere)
+        return piano.sovrapposta or (piano.workers > 1 and (len(da_leggere) > 1 or segmentati))
+    
+    def _match_file_sequenziale(
+        self,
+        files: List[Path],
+        set_isbn_riferimento: set,
+        log_callback: Callable[[str, str], None],
+        piano: PianoEsecuzione
+    ) -> Iterator[Tuple[Path, List[str], int]]:
+        """
+        Cerca gli ISBN della worklist nei file di confronto, uno alla volta.
+        
+        Yields:
+            (file, ISBN worklist trovati, righe del file con match)
+        """
+        for file, parti in self._leggi_file_confronto(files, log_callback, piano):
+            if parti is None:
+                # Indice precompilato: ricerca binaria sul file mappato, nessun parsing
+                trovati = self._match_indice(file, set_isbn_riferimento, log_callback)
+                yield file, trovati, len(trovati)
+                continue
+            
+            trovati, file_matches = self._match_parti(parti, set_isbn_riferimento)
+            yield file, trovati, file_matches
+    
+    def _match_parti(
+        self,
+        parti: List[Tuple[str, pd.Series]],
+        set_isbn_riferimento: set
+    ) -> Tuple[List[str], int]:
+        """ISBN worklist trovati tra le chiavi di un file e righe con match"""
+        trovati = []
+        file_matches = 0
+        for nome, isbn_validi in parti:
+            # Trova match (usa set per performance O(1))
+            matches = isbn_validi.isin(set_isbn_riferimento)
+            
+            if matches.any():
+                trovati.extend(isbn_validi[matches].values)
+                file_matches += int(matches.sum())
+        return trovati, file_matches
+    
+    def _match_file_paralleli(
+        self,
+        files: List[Path],
+        set_isbn_riferimento: set,
+        log_callback: Callable[[str, str], None],
+        piano: PianoEsecuzione
+    ) -> Iterator[Tuple[Path, List[str], int]]:
+        """
+        Come _match_file_sequenziale, con i file letti in processi paralleli.
+        
+        Il set di riferimento viene pubblicato una volta in memoria condivisa
+        (shared_keys) come array ordinato di chiavi codificate: ogni processo
+        vi si collega senza copie e restituisce solo le posizioni trovate.
+        I file più costosi partono per primi e vengono restituiti man mano
+        che finiscono.
+        
+        I .xlsx con fogli molto grandi (piano.segmenti) vengono letti a
+        intervalli di righe in processi distinti: la colonna ISBN è
+        individuata qui una volta sola, ogni processo confronta il proprio
+        intervallo con il riferimento condiviso e le posizioni trovate
+        vengono unite quando tutti gli intervalli del file sono finiti.
+        """
+        for file in files:
+            if self._precompilato(file):
+                search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                log_callback(search_msg, LOG_INFO)
+                trovati = self._match_indice(file, set_isbn_riferimento, log_callback)
+                yield file, trovati, len(trovati)
+        
+        chiavi = np.fromiter(set_isbn_riferimento, dtype=object, count=len(set_isbn_riferimento))
+        codici = codifica_chiavi_isbn(chiavi, self.config.MAX_ISBN_LENGTH)
+        ordine = np.argsort(codici)
+        chiavi, codici = chiavi[ordine], codici[ordine]
+        
+        # Letture: (costo, file, None) per un file intero,
+        # (costo, file, (colonne, intervallo)) per un intervallo di righe
+        compiti = []
+        for file in files:
+            if self._precompilato(file):
+                continue
+            costo = piano.costi.get(file, dimensione_input(file))
+            n_segmenti = piano.segmenti.get(file, 1)
+            colonne = self._colonne_segmentabili(file, log_callback) if n_segmenti > 1 else None
+            if colonne is None:
+                compiti.append((costo, file, None))
+                continue
+            
+            fogli, righe = colonne
+            segmented_msg = (
+                self.t.proc_segmented_read if self.t
+                else "✂️ {file}: {rows} righe lette in {segments} intervalli paralleli"
+            ).format(file=file.name, rows=righe, segments=n_segmenti)
+            log_callback(segmented_msg, LOG_INFO)
+            for intervallo in _intervalli_righe(righe, n_segmenti):
+                compiti.append((costo // n_segmenti, file, (fogli, intervallo)))
+        # Prima le letture più costose: la più lenta non resta per ultima da sola
+        compiti.sort(key=lambda compito: compito[0], reverse=True)
+        
+        in_corso: Dict[Path, int] = {}
+        for _, file, _ in compiti:
+            in_corso[file] = in_corso.get(file, 0) + 1
+        parziali: Dict[Path, List[Tuple[np.ndarray, int]]] = {}
+        errori: Dict[Path, XlsxNonSupportato] = {}
+        
+        with ChiaviCondivise(codici) as condivise, ProcessPoolExecutor(
+            max_workers=piano.workers,
+            initializer=collega_riferimento,
+            initargs=(condivise.nome, len(condivise))
+        ) as pool:
+            letture = {}
+            for _, file, segmento in compiti:
+                if segmento is None:
+                    lettura = pool.submit(
+                        _match_file_in_processo, self.config, self.t, file, piano.streaming
+                    )
+                else:
+                    lettura = pool.submit(
+                        _match_segmento_in_processo, self.config, file, *segmento
+                    )
+                letture[lettura] = (file, segmento)
+            
+            for lettura in as_completed(letture):
+                file, segmento = letture[lettura]
+                if segmento is None:
+                    search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                    log_callback(search_msg, LOG_INFO)
+                    posizioni, file_matches, messaggi = lettura.result()
+                    for messaggio, livello in messaggi:
+                        log_callback(messaggio, livello)
+                    yield file, chiavi[posizioni].tolist(), file_matches
+                    continue
+                
+                try:
+                    parziali.setdefault(file, []).append(lettura.result())
+                except XlsxNonSupportato as e:
+                    errori[file] = e
+                in_corso[file] -= 1
+                if in_corso[file]:
+                    continue
+                
+                search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                log_callback(search_msg, LOG_INFO)
+                if file in errori:
+                    fallback_msg = (
+                        self.t.proc_stream_reader_fallback if self.t
+                        else "  {file}: lettura veloce non possibile ({reason}), uso lettore standard"
+                    ).format(file=file.name, reason=errori[file])
+                    log_callback(fallback_msg, LOG_INFO)
+                    trovati, file_matches = self._match_parti(
+                        self._chiavi_excel(file, log_callback), set_isbn_riferimento
+                    )
+                    yield file, trovati, file_matches
+                    continue
+                
+                posizioni = np.unique(np.concatenate([p for p, _ in parziali[file]]))
+                file_matches = sum(m for _, m in parziali[file])
+                yield file, chiavi[posizioni].tolist(), file_matches
+    
+    def _colonne_segmentabili(
+        self,
+        file: Path,
+        log_callback: Callable[[str, str], None]
+    ) -> Optional[Tuple[List[Tuple[str, ColonnaIsbn]], int]]:
+        """
+        Colonne ISBN dei fogli di un .xlsx da leggere a intervalli di righe.
+        
+        Returns:
+            Tupla (lista di (foglio, colonna ISBN), righe del foglio più
+            lungo), None se il file va letto per intero (struttura insolita,
+            dimensioni dei fogli non dichiarate)
+        """
+        try:
+            with LettoreXlsx(self._sorgente(file)) as lettore:
+                righe = 0
+                for nome in lettore.sheet_names:
+                    if nome.lower() == self.config.SHEET_PARAMETRI:
+                        continue
+                    dimensioni = lettore.dimensioni(nome)
+                    if dimensioni is None:
+                        return None
+                    righe = max(righe, dimensioni[0])
+                return self._colonne_isbn_xlsx(lettore, file, log_callback), righe
+        except XlsxNonSupportato:
+            return None
+    
+    def _colonne_isbn_xlsx(
+        self,
+        lettore: LettoreXlsx,
+        file: Path,
+        log_callback: Callable[[str, str], None]
+    ) -> List[Tuple[str, ColonnaIsbn]]:
+        """Colonna ISBN di ogni foglio, rilevata su un campione di righe"""
+        colonne = []
+        for nome in lettore.sheet_names:
+            if nome.lower() == self.config.SHEET_PARAMETRI:
+                continue
+            
+            campione = lettore.campione(nome, self.config.RIGHE_CAMPIONE_ISBN)
+            colonna = rileva_colonna_isbn(campione, self.config)
+            if colonna is None:
+                continue
+            self._log_colonna_rilevata(file, nome, colonna, log_callback)
+            colonne.append((nome, colonna))
+        return colonne
+    
+    def _leggi_file_confronto(
+        self,
+        files: List[Path],
+        log_callback: Callable[[str, str], None],
+        piano: PianoEsecuzione
+    ) -> Iterator[Tuple[Path, Optional[List[Tuple[str, pd.Series]]]]]:
+        """
+        Chiavi dei file di confronto.
+        
+        Con piano.workers > 1 i file vengono letti in processi paralleli,
+        avviando per primi i più costosi (piano.costi) e restituendoli man
+        mano che finiscono; i messaggi di log dei processi vengono riemessi
+        qui, raggruppati per file. Altrimenti l'ordine è quello dato.
+        
+        Yields:
+            (file, lista di (foglio, Serie di ISBN)), oppure (file, None)
+            per gli indici precompilati, che non vanno letti
+        """
+        if not self._lettura_parallela(files, piano):
+            for file in files:
+                search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                log_callback(search_msg, LOG_INFO)
+                if self._precompilato(file):
+                    yield file, None
+                else:
+                    yield file, self._chiavi_file_confronto(file, log_callback, piano.streaming)
+            return
+        
+        for file in files:
+            if self._precompilato(file):
+                search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                log_callback(search_msg, LOG_INFO)
+                yield file, None
+        
+        da_leggere = [f for f in files if not self._precompilato(f)]
+        # Prima i file più grandi: il più lento non resta per ultimo da solo
+        da_leggere.sort(key=lambda f: piano.costi.get(f, dimensione_input(f)), reverse=True)
+        with ProcessPoolExecutor(max_workers=piano.workers) as pool:
+            letture = {
+                pool.submit(
+                    _chiavi_file_in_processo, self.config, self.t, file, piano.streaming
+                ): file
+                for file in da_leggere
+            }
+            for lettura in as_completed(letture):
+                file = letture[lettura]
+                search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+                log_callback(search_msg, LOG_INFO)
+                parti, messaggi = lettura.result()
+                for messaggio, livello in messaggi:
+                    log_callback(messaggio, livello)
+                yield file, parti
+    
+    def _log_isbn_multi(self, isbn_multi: int, log_callback: Callable[[str, str], None]) -> None:
+        if isbn_multi > 0:
+            multi_msg = (
+                self.t.proc_multi_value_extracted if self.t
+                else "🔀 Estratti {count} ISBN aggiuntivi da celle multi-valore"
+            ).format(count=isbn_multi)
+            log_callback(multi_msg, LOG_INFO)
+    
+    def _log_duplicati(
+        self,
+        isbn_totali_prima: int,
+        isbn_unici_prima: int,
+        log_callback: Callable[[str, str], None]
+    ) -> None:
+        duplicati = isbn_totali_prima - isbn_unici_prima
+        if duplicati > 0:
+            if self.t:
+                log_callback(
+                    f"{self.t.proc_duplicates_detected}: {isbn_totali_prima} "
+                    f"{self.t.proc_worklist_rows}, {isbn_unici_prima} ISBN unici",
+                    LOG_WARNING
+                )
+                log_callback(
+                    f"   {self.t.proc_duplicates_removed.format(duplicati=duplicati)}", 
+                    LOG_WARNING
+                )
+            else:
+                log_callback(
+                    f"⚠️ Worklist: {isbn_totali_prima} righe totali, "
+                    f"{isbn_unici_prima} ISBN unici",
+                    LOG_WARNING
+                )
+                log_callback(
+                    f"   Rilevati {duplicati} duplicati (verranno rimossi)", 
+                    LOG_WARNING
+                )
+        
+        unique_msg = f"{self.t.proc_unique_isbn if self.t else '✅ ISBN unici nella worklist'}: {isbn_unici_prima}"
+        log_callback(unique_msg, LOG_SUCCESS)
+    
+    def _log_match_file(
+        self,
+        file: Path,
+        file_matches: int,
+        log_callback: Callable[[str, str], None]
+    ) -> None:
+        if file_matches > 0:
+            match_msg = f"  {self.t.proc_matches_in if self.t else 'Match in'} {file.name}: {file_matches}"
+            log_callback(match_msg, LOG_SUCCESS)
+    
+    def _carica_worklist(
+        self,
+        file_wl: Path,
+        log_callback: Callable[[str, str], None]
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Carica tutti i fogli della worklist con la loro colonna ISBN.
+        
+        Ogni foglio viene letto dalla sua riga di intestazione; le chiavi
+        normalizzate finiscono in COL_ISBN_NORM (una riga per ISBN estratto,
+        con l'indice che identifica la riga di origine).
+        
+        Returns:
+            Tupla (DataFrame worklist, numero di ISBN extra da celle multi-valore)
+        """
+        fogli = []
+        isbn_multi = 0
+        offset = 0
+        with pd.ExcelFile(self._sorgente(file_wl)) as xls:
+            for nome in xls.sheet_names:
+                if nome.lower() == self.config.SHEET_PARAMETRI:
+                    continue
+                
+                colonna = individua_colonna_isbn(xls, nome, self.config)
+                if colonna is None:
+                    continue
+                self._log_colonna_rilevata(file_wl, nome, colonna, log_callback)
+                
+                df = xls.parse(nome, header=colonna.riga_intestazione, dtype=str)
+                df.index = pd.RangeIndex(offset, offset + len(df))
+                offset += len(df)
+                
+                chiavi = estrai_chiavi_isbn(df.iloc[:, colonna.indice], self.config)
+                isbn_multi += len(chiavi) - chiavi.index.nunique()
+                
+                df = df.loc[chiavi.index]
+                df[self.config.COL_ISBN_NORM] = chiavi.to_numpy()
+                df[self.config.COL_FOGLIO_ORIGINE] = nome
+                fogli.append(df)
+        
+        if not fogli:
+            error_msg = self.t.error_no_isbn_worklist if self.t else "Nessuna colonna ISBN trovata nel file worklist"
+            raise Exception(error_msg)
+        
+        return pd.concat(fogli), isbn_multi
+    
+    def _match_indice(
+        self,
+        file: Path,
+        set_isbn_riferimento: set,
+        log_callback: Callable[[str, str], None]
+    ) -> List[str]:
+        """
+        Cerca gli ISBN della worklist in un indice precompilato (memory-mapped).
+        
+        Returns:
+            ISBN della worklist presenti nell'indice
+        """
+        if file.suffix.lower() == self.config.SUFFIX_STORICO:
+            return self._match_storico(file, set_isbn_riferimento, log_callback)
+        try:
+            indice = IndiceIsbn(file)
+        except IndiceNonValido as e:
+            raise Exception(str(e))
+        
+        index_msg = (
+            self.t.proc_index_opened if self.t
+            else "📇 Indice {file}: {count} ISBN da {sources} fogli (creato {created})"
+        ).format(
+            file=file.name,
+            count=len(indice),
+            sources=len(indice.sorgenti),
+            created=indice.intestazione['creato']
+        )
+        log_callback(index_msg, LOG_INFO)
+        
+        chiavi = np.fromiter(set_isbn_riferimento, dtype=object, count=len(set_isbn_riferimento))
+        
+        # Prefiltro di Bloom (se presente): la ricerca esatta sull'indice
+        # viene fatta solo per i candidati che passano il filtro
+        filtro = self._carica_filtro_bloom(file, indice, log_callback)
+        if filtro is not None:
+            candidati = chiavi[filtro.contiene(chiavi)]
+            bloom_msg = (
+                self.t.proc_bloom_prefilter if self.t
+                else "🧮 Prefiltro Bloom: {candidates}/{total} candidati da confermare"
+            ).format(candidates=len(candidati), total=len(chiavi))
+            log_callback(bloom_msg, LOG_INFO)
+            chiavi = candidati
+        
+        return chiavi[indice.contiene(chiavi)].tolist()
+    
+    def _apri_storico(self, file: Path) -> StoricoIsbn:
+        """Storico ISBN esistente (errore leggibile se non valido)"""
+        try:
+            return StoricoIsbn(file, crea=False)
+        except StoricoNonValido as e:
+            raise Exception(str(e))
+    
+    def _match_storico(
+        self,
+        file: Path,
+        set_isbn_riferimento: set,
+        log_callback: Callable[[str, str], None]
+    ) -> List[str]:
+        """
+        Cerca gli ISBN della worklist nello storico SQLite, con una query
+        sull'indice (limitata al periodo config.STORICO_DAL/STORICO_AL).
+        
+        Returns:
+            ISBN della worklist presenti nello storico
+        """
+        chiavi = np.fromiter(set_isbn_riferimento, dtype=object, count=len(set_isbn_riferimento))
+        with self._apri_storico(file) as storico:
+            riepilogo = storico.riepilogo()
+            store_msg = (
+                self.t.proc_store_opened if self.t
+                else "🗄️ Storico {file}: {count} ISBN da {exports} export ({first} – {last})"
+            ).format(
+                file=file.name,
+                count=riepilogo['chiavi'],
+                exports=riepilogo['file'],
+                first=riepilogo['dal'] or '-',
+                last=riepilogo['al'] or '-'
+            )
+            log_callback(store_msg, LOG_INFO)
+            if self.config.STORICO_DAL or self.config.STORICO_AL:
+                period_msg = (
+                    self.t.proc_store_period if self.t
+                    else "🗄️ Solo gli export dal {first} al {last}"
+                ).format(first=self.config.STORICO_DAL or '-', last=self.config.STORICO_AL or '-')
+                log_callback(period_msg, LOG_INFO)
+            trovate = storico.presenti(
+                codifica_chiavi_isbn(chiavi, self.config.MAX_ISBN_LENGTH),
+                self.config.STORICO_DAL,
+                self.config.STORICO_AL
+            )
+        return chiavi[trovate].tolist()
+    
+    def carica_storico(
+        self,
+        files: List[Path],
+        storico: Path,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        data: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggiunge gli ISBN dei cataloghi allo storico SQLite (creato se non
+        esiste), con file, foglio e data dell'export.
+        
+        I file già caricati (stesso contenuto, SHA-256) vengono saltati; gli
+        altri vengono letti come file di confronto (processi paralleli
+        compresi) e inseriti a blocchi, una transazione per file.
+        
+        Args:
+            files: Cataloghi da caricare (.xlsx/.xls o archivi .zip)
+            storico: File dello storico (estensione config.SUFFIX_STORICO)
+            data: Data degli export (ISO, AAAA-MM-GG); default: data di
+                modifica di ogni file
+        
+        Returns:
+            Riepilogo dello storico dopo il caricamento (vedi StoricoIsbn.riepilogo)
+        """
+        files = [f for f in self._espandi_archivi(files, log_callback) if not self._precompilato(f)]
+        with StoricoIsbn(storico) as db:
+            impronte = {}
+            for file in files:
+                impronta = impronta_file(file)
+                if db.caricato(impronta['sha256']):
+                    skip_msg = (
+                        self.t.proc_store_skipped if self.t
+                        else "🗄️ {file}: già nello storico"
+                    ).format(file=file.name)
+                    log_callback(skip_msg, LOG_INFO)
+                else:
+                    impronte[file] = impronta
+            
+            da_caricare = list(impronte)
+            if da_caricare:
+                piano = self.piano_solo_confronto(da_caricare)
+                larghezza = self.config.MAX_ISBN_LENGTH
+                for idx, (file, parti) in enumerate(self._leggi_file_confronto(da_caricare, log_callback, piano)):
+                    if progress_callback:
+                        progress_callback(int(90 * idx / len(da_caricare)), 100)
+                    data_file = data or datetime.fromtimestamp(
+                        percorso_su_disco(file).stat().st_mtime
+                    ).date().isoformat()
+                    inserite = db.aggiungi(
+                        file.name,
+                        ((foglio, codifica_chiavi_isbn(chiavi.to_numpy(), larghezza)) for foglio, chiavi in parti),
+                        data_file,
+                        impronte[file]['sha256']
+                    )
+                    loaded_msg = (
+                        self.t.proc_store_loaded if self.t
+                        else "🗄️ {file}: {count} ISBN aggiunti (export del {date})"
+                    ).format(file=file.name, count=inserite, date=data_file)
+                    log_callback(loaded_msg, LOG_SUCCESS)
+            riepilogo = db.riepilogo()
+        
+        if progress_callback:
+            progress_callback(100, 100)
+        summary_msg = (
+            self.t.proc_store_summary if self.t
+            else "🗄️ Storico {file}: {count} ISBN unici da {exports} export ({first} – {last})"
+        ).format(
+            file=Path(storico).name,
+            count=riepilogo['chiavi'],
+            exports=riepilogo['file'],
+            first=riepilogo['dal'] or '-',
+            last=riepilogo['al'] or '-'
+        )
+        log_callback(summary_msg, LOG_SUCCESS)
+        return riepilogo
+    
+    def _carica_filtro_bloom(
+        self,
+        file_indice: Path,
+        indice: IndiceIsbn,
+        log_callback: Callable[[str, str], None]
+    ) -> Optional[FiltroBloom]:
+        """Carica il filtro di Bloom affiancato all'indice, se esiste ed è aggiornato"""
+        file_filtro = file_indice.with_name(file_indice.name + self.config.SUFFIX_BLOOM)
+        if not file_filtro.exists():
+            return None
+        try:
+            filtro = FiltroBloom.carica(file_filtro)
+        except FiltroNonValido as e:
+            log_callback(str(e), LOG_WARNING)
+            return None
+        # Indici scritti prima dell'impronta delle chiavi: filtro mai valido
+        impronta = indice.intestazione.get('impronta_chiavi')
+        if (impronta is None
+                or filtro.info.get('indice_impronta') != impronta
+                or filtro.info.get('indice_n_chiavi') != len(indice)):
+            stale_msg = (
+                self.t.proc_bloom_stale if self.t
+                else "⚠️ {file}: filtro non corrispondente all'indice, ignorato"
+            ).format(file=file_filtro.name)
+            log_callback(stale_msg, LOG_WARNING)
+            return None
+        return filtro
+    
+    def compila_filtro_bloom(
+        self,
+        file_indice: Path,
+        log_callback: Callable[[str, str], None],
+        tasso_fp: Optional[float] = None
+    ) -> Path:
+        """
+        Costruisce e salva il filtro di Bloom di un indice ISBN.
+        
+        Args:
+            file_indice: Indice ISBN (.isbnidx)
+            log_callback: Funzione per logging (message, level)
+            tasso_fp: Tasso di falsi positivi (default: config.BLOOM_TASSO_FALSI_POSITIVI)
+        
+        Returns:
+            Percorso del filtro creato (indice + config.SUFFIX_BLOOM)
+        """
+        if tasso_fp is None:
+            tasso_fp = self.config.BLOOM_TASSO_FALSI_POSITIVI
+        try:
+            indice = IndiceIsbn(file_indice)
+        except IndiceNonValido as e:
+            raise Exception(str(e))
+        
+        filtro = costruisci_da_indice(indice, tasso_fp)
+        file_filtro = file_indice.with_name(file_indice.name + self.config.SUFFIX_BLOOM)
+        filtro.salva(file_filtro)
+        
+        built_msg = (
+            self.t.proc_bloom_built if self.t
+            else "🧮 Filtro Bloom creato: {file} ({size} KB, {hashes} hash, falsi positivi {fp:.2%})"
+        ).format(
+            file=file_filtro.name,
+            size=len(filtro.bit) // 1024,
+            hashes=filtro.n_hash,
+            fp=tasso_fp
+        )
+        log_callback(built_msg, LOG_SUCCESS)
+        return file_filtro
+    
+    def compila_indice(
+        self,
+        files: List[Path],
+        output: Path,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        bloom: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Compila uno o più cataloghi in un file indice ISBN ordinato.
+        
+        L'indice può poi essere usato al posto dei cataloghi come file di
+        confronto (stesso risultato, senza rileggere i workbook).
+        
+        Args:
+            files: Cataloghi da compilare (.xlsx/.xls)
+            output: File indice da creare (estensione config.SUFFIX_INDICE)
+            log_callback: Funzione per logging (message, level)
+            progress_callback: Funzione per progress bar (current, total)
+            bloom: Crea anche il filtro di Bloom affiancato all'indice
+        
+        Returns:
+            Intestazione dell'indice (conteggi, impronte, data di creazione)
+        """
+        files = self._espandi_archivi(files, log_callback)
+        parti = []
+        impronte = []
+        for idx, file in enumerate(files):
+            search_msg = f"{self.t.proc_searching_in if self.t else 'Ricerca in'}: {file.name}"
+            log_callback(search_msg, LOG_INFO)
+            if progress_callback:
+                progress_callback(int(90 * idx / len(files)), 100)
+            
+            impronte.append(impronta_file(file))
+            for nome, chiavi in self._chiavi_file_confronto(file, log_callback):
+                parti.append((file.name, nome, chiavi))
+        
+        intestazione = scrivi_indice(output, parti, impronte, self.config.MAX_ISBN_LENGTH)
+        
+        if progress_callback:
+            progress_callback(100, 100)
+        
+        built_msg = (
+            self.t.proc_index_built if self.t
+            else "📇 Indice creato: {file} ({count} ISBN unici da {rows} righe)"
+        ).format(
+            file=Path(output).name,
+            count=intestazione['n_chiavi'],
+            rows=intestazione['n_righe_sorgente']
+        )
+        log_callback(built_msg, LOG_SUCCESS)
+        
+        if bloom:
+            self.compila_filtro_bloom(Path(output), log_callback)
+        return intestazione
+    
+    def _chiavi_file_confronto(
+        self,
+        file: Path,
+        log_callback: Callable[[str, str], None],
+        streaming: Optional[bool] = None
+    ) -> List[Tuple[str, pd.Series]]:
+        """
+        Estrae le chiavi ISBN normalizzate da ogni foglio di un file di confronto.
+        
+        Per i .xlsx usa il lettore in streaming (se abilitato) e ripiega su
+        pandas/openpyxl quando il file ha una struttura insolita.
+        
+        Args:
+            streaming: Usa il lettore in streaming (default: config.LETTORE_XLSX_STREAMING)
+        
+        Returns:
+            Lista di (nome foglio, Serie di ISBN validi)
+        """
+        if streaming is None:
+            streaming = self.config.LETTORE_XLSX_STREAMING
+        if streaming and file.suffix.lower() == '.xlsx':
+            try:
+                return self._chiavi_xlsx_streaming(file, log_callback)
+            except XlsxNonSupportato as e:
+                fallback_msg = (
+                    self.t.proc_stream_reader_fallback if self.t
+                    else "  {file}: lettura veloce non possibile ({reason}), uso lettore standard"
+                ).format(file=file.name, reason=e)
+                log_callback(fallback_msg, LOG_INFO)
+        return self._chiavi_excel(file, log_callback)
+    
+    def _chiavi_xlsx_streaming(
+        self,
+        file: Path,
+        log_callback: Callable[[str, str], None]
+    ) -> List[Tuple[str, pd.Series]]:
+        """Legge solo la colonna ISBN di ogni foglio dall'XML del file .xlsx"""
+        risultati = []
+        with LettoreXlsx(self._sorgente(file)) as lettore:
+            for nome, colonna in self._colonne_isbn_xlsx(lettore, file, log_callback):
+                valori = lettore.colonna(nome, colonna.indice, colonna.riga_intestazione)
+                risultati.append((nome, estrai_chiavi_isbn(valori, self.config)))
+        return risultati
+    
+    def _chiavi_excel(
+        self,
+        file: Path,
+        log_callback: Callable[[str, str], None]
+    ) -> List[Tuple[str, pd.Series]]:
+        """Legge la colonna ISBN di ogni foglio con pandas (openpyxl/xlrd)"""
+        risultati = []
+        with pd.ExcelFile(self._sorgente(file)) as xls:
+            for nome in xls.sheet_names:
+                if nome.lower() == self.config.SHEET_PARAMETRI:
+                    continue
+                
+                # OTTIMIZZAZIONE: individua la colonna ISBN da un campione di righe
+                colonna = individua_colonna_isbn(xls, nome, self.config)
+                if colonna is None:
+                    continue
+                self._log_colonna_rilevata(file, nome, colonna, log_callback)
+                
+                # Carica SOLO la colonna ISBN (risparmio enorme di memoria!)
+                df_isbn_only = xls.parse(
+                    nome,
+                    header=colonna.riga_intestazione,
+                    usecols=[colonna.indice],
+                    dtype=str
+                )
+                
+                # Normalizza e filtra validi, separando le celle multi-valore
+                risultati.append(
+                    (nome, estrai_chiavi_isbn(df_isbn_only.iloc[:, 0], self.config))
+                )
+        return risultati
+    
+    def _log_colonna_rilevata(
+        self,
+        file: Path,
+        foglio: str,
+        colonna: ColonnaIsbn,
+        log_callback: Callable[[str, str], None]
+    ) -> None:
+        """Segnala le colonne ISBN riconosciute dal contenuto invece che dal nome"""
+        if not colonna.da_contenuto:
+            return
+        msg = (
+            self.t.proc_isbn_column_by_content if self.t
+            else "🔎 {file} [{sheet}]: colonna ISBN riconosciuta dal contenuto (colonna {column})"
+        ).format(file=file.name, sheet=foglio, column=colonna.indice + 1)
+        log_callback(msg, LOG_INFO)
+
+
+class _ChiaviAnticipate:
+    """
+    Chiavi dei file di confronto estratte in processi separati mentre il
+    processo principale carica la worklist (PianoEsecuzione.sovrapposta).
+    
+    L'avanzamento (0-70%) conta insieme worklist e file di confronto
+    pronti; ogni file pronto viene segnalato nel log appena termina.
+    """
+    
+    def __init__(
+        self,
+        processor: DataProcessor,
+        files: List[Path],
+        piano: PianoEsecuzione,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]]
+    ):
+        self.t = processor.t
+        self._log = log_callback
+        self._progress = progress_callback
+        self._lock = threading.Lock()
+        self._worklist_pronta = False
+        self._pronte = 0
+        
+        da_leggere = [f for f in files if not processor._precompilato(f)]
+        # Prima i file più grandi: il più lento non resta per ultimo da solo
+        da_leggere.sort(key=lambda f: piano.costi.get(f, dimensione_input(f)), reverse=True)
+        self._pool = ProcessPoolExecutor(max_workers=piano.workers)
+        self.letture: Dict[Future, Path] = {
+            self._pool.submit(
+                _chiavi_file_in_processo, processor.config, processor.t, file, piano.streaming
+            ): file
+            for file in da_leggere
+        }
+        for lettura in self.letture:
+            lettura.add_done_callback(self._lettura_finita)
+    
+    def worklist_pronta(self) -> None:
+        """Segnala la fine del caricamento della worklist"""
+        with self._lock:
+            self._worklist_pronta = True
+            mancanti = len(self.letture) - self._pronte
+            self._avanzamento()
+        if mancanti:
+            wait_msg = (
+                self.t.proc_pipeline_waiting if self.t
+                else "⏳ Worklist pronta, in attesa di {count} file di confronto"
+            ).format(count=mancanti)
+            self._log(wait_msg, LOG_INFO)
+    
+    def completate(self) -> Iterator[Tuple[Path, List[Tuple[str, pd.Series]], List[Tuple[str, str]]]]:
+        """(file, chiavi per foglio, messaggi di log) nell'ordine di completamento"""
+        for lettura in as_completed(self.letture):
+            parti, messaggi = lettura.result()
+            yield self.letture[lettura], parti, messaggi
+    
+    def close(self) -> None:
+        """Annulla le letture non iniziate e chiude i processi"""
+        for lettura in self.letture:
+            lettura.cancel()
+        self._pool.shutdown(wait=True)
+    
+    def _lettura_finita(self, lettura: Future) -> None:
+        # Chiamato dal thread di gestione del pool
+        if lettura.cancelled() or lettura.exception() is not None:
+            return
+        with self._lock:
+            self._pronte += 1
+            ready_msg = (
+                self.t.proc_pipeline_ready if self.t
+                else "📥 {file}: chiavi pronte ({done}/{total})"
+            ).format(file=self.letture[lettura].name, done=self._pronte, total=len(self.letture))
+            self._log(ready_msg, LOG_INFO)
+            self._avanzamento()
+    
+    def _avanzamento(self) -> None:
+        if self._progress:
+            fatti = int(self._worklist_pronta) + self._pronte
+            self._progress(int(70 * fatti / (1 + len(self.letture))), 100)
+
+
+def _chiavi_file_in_processo(
+    config: AppConfig,
+    t: Optional[Translations],
+    file: Path,
+    streaming: bool
+) -> Tuple[List[Tuple[str, pd.Series]], List[Tuple[str, str]]]:
+    """
+    Legge le chiavi di un file di confronto in un processo separato.
+    
+    Returns:
+        Tupla (chiavi per foglio, messaggi di log da riemettere)
+    """
+    processor = DataProcessor(config)
+    if t:
+        processor.set_translations(t)
+    messaggi: List[Tuple[str, str]] = []
+    parti = processor._chiavi_file_confronto(
+        file, lambda messaggio, livello: messaggi.append((messaggio, livello)), streaming
+    )
+    return parti, messaggi
+
+
+def _match_file_in_processo(
+    config: AppConfig,
+    t: Optional[Translations],
+    file: Path,
+    streaming: bool
+) -> Tuple[np.ndarray, int, List[Tuple[str, str]]]:
+    """
+    Legge un file di confronto e lo confronta con il set di riferimento
+    condiviso (vedi shared_keys.collega_riferimento).
+    
+    Returns:
+        Tupla (posizioni trovate nel riferimento, righe con match, messaggi di log)
+    """
+    riferimento = riferimento_collegato()
+    parti, messaggi = _chiavi_file_in_processo(config, t, file, streaming)
+    
+    posizioni_trovate = []
+    file_matches = 0
+    for _, chiavi in parti:
+        codici = codifica_chiavi_isbn(chiavi.to_numpy(), config.MAX_ISBN_LENGTH)
+        presenti, posizioni = posizioni_presenti(riferimento, codici)
+        file_matches += int(presenti.sum())
+        posizioni_trovate.append(posizioni[presenti])
+    
+    if posizioni_trovate:
+        return np.unique(np.concatenate(posizioni_trovate)), file_matches, messaggi
+    return np.empty(0, dtype=np.intp), file_matches, messaggi
+
+
+def _testo_cella(valore: Any) -> Optional[str]:
+    """Valore di una cella openpyxl come stringa, come lo legge pandas con dtype=str"""
+    if valore is None:
+        return None
+    if isinstance(valore, float) and valore.is_integer():
+        return str(int(valore))
+    return str(valore)
+
+
+def _intestazioni_univoche(valori: List[Any]) -> List[str]:
+    """Intestazioni come le rende pandas: vuote 'Unnamed: n', ripetute 'nome.1', 'nome.2', ..."""
+    risultato: List[str] = []
+    for n, valore in enumerate(valori):
+        nome = f"Unnamed: {n}" if valore is None or pd.isna(valore) else str(valore)
+        base, k = nome, 0
+        while nome in risultato:
+            k += 1
+            nome = f"{base}.{k}"
+        risultato.append(nome)
+    return risultato
+
+
+def _blocchi_righe(righe: Iterator[tuple], intestazioni: List[str], dimensione: int) -> Iterator[pd.DataFrame]:
+    """Righe openpyxl (values_only) in DataFrame di al più dimensione righe, con le intestazioni date"""
+    larghezza = len(intestazioni)
+    blocco: List[List[Optional[str]]] = []
+    for riga in righe:
+        valori = [_testo_cella(valore) for valore in riga[:larghezza]]
+        valori += [None] * (larghezza - len(valori))
+        blocco.append(valori)
+        if len(blocco) == dimensione:
+            yield pd.DataFrame(blocco, columns=intestazioni)
+            blocco = []
+    if blocco:
+        yield pd.DataFrame(blocco, columns=intestazioni)
+
+
+# Caratteri non ammessi nei nomi dei fogli Excel (e dei file, su Windows)
+_CARATTERI_NOME_PARTE = str.maketrans({c: '_' for c in '[]:*?/\\<>|"'})
+
+
+def _nomi_fogli_univoci(parti: List[Tuple[str, pd.DataFrame]]) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    Nomi delle parti validi come nomi di foglio (e di file): caratteri
+    non ammessi sostituiti, al massimo 31 caratteri, unici senza
+    distinzione tra maiuscole e minuscole (come in Excel).
+    """
+    usati = set()
+    risultato = []
+    for nome, df in parti:
+        base = nome.translate(_CARATTERI_NOME_PARTE).strip("' ")[:31] or '_'
+        nome, n = base, 1
+        while nome.lower() in usati:
+            n += 1
+            nome = f"{base[:31 - len(str(n)) - 1]}_{n}"
+        usati.add(nome.lower())
+        risultato.append((nome, df))
+    return risultato
+
+
+def _intervalli_righe(righe: int, n_segmenti: int) -> List[Tuple[int, Optional[int]]]:
+    """Divide le righe Excel 1..righe in n_segmenti intervalli [da, a); l'ultimo è aperto"""
+    passo = -(-righe // n_segmenti)
+    intervalli: List[Tuple[int, Optional[int]]] = [
+        (1 + i * passo, 1 + (i + 1) * passo) for i in range(n_segmenti)
+    ]
+    # Le dimensioni dichiarate possono essere imprecise: l'ultimo legge fino alla fine
+    intervalli[-1] = (intervalli[-1][0], None)
+    return intervalli
+
+
+def _match_segmento_in_processo(
+    config: AppConfig,
+    file: Path,
+    colonne: List[Tuple[str, ColonnaIsbn]],
+    righe: Tuple[int, Optional[int]]
+) -> Tuple[np.ndarray, int]:
+    """
+    Confronta un intervallo di righe di un .xlsx con il set di riferimento
+    condiviso (vedi shared_keys.collega_riferimento).
+    
+    Args:
+        colonne: (foglio, colonna ISBN) rilevate dal processo principale
+        righe: Intervallo [da, a) di righe Excel, vedi LettoreXlsx.colonna
+    
+    Returns:
+        Tupla (posizioni trovate nel riferimento, righe con match)
+    """
+    riferimento = riferimento_collegato()
+    posizioni_trovate = [np.empty(0, dtype=np.intp)]
+    file_matches = 0
+    with LettoreXlsx(sorgente_input(file)) as lettore:
+        for nome, colonna in colonne:
+            valori = lettore.colonna(nome, colonna.indice, colonna.riga_intestazione, righe)
+            chiavi = estrai_chiavi_isbn(valori, config)
+            codici = codifica_chiavi_isbn(chiavi.to_numpy(), config.MAX_ISBN_LENGTH)
+            presenti, posizioni = posizioni_presenti(riferimento, codici)
+            file_matches += int(presenti.sum())
+            posizioni_trovate.append(posizioni[presenti])
+    return np.unique(np.concatenate(posizioni_trovate)), file_matches
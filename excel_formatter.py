@@ -5,10 +5,12 @@ Applica lo stile dell'app Sebina Plus: colori, larghezze, altezze
 Aggiornato per supportare localizzazione
 """
 from pathlib import Path
-from openpyxl import load_workbook
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Alignment, Font, NamedStyle
 from openpyxl.utils import get_column_letter
-from typing import Callable, Optional
+from typing import Callable, Iterable, List, Optional, Tuple
 from config import AppConfig
 from localization import Translations
 
@@ -97,6 +99,163 @@ def formatta_excel_isbn(
         raise
 
 
+def scrivi_excel_streaming(
+    filepath: Path,
+    fogli: Iterable[Tuple[str, pd.DataFrame]],
+    config: AppConfig,
+    log_callback: Callable[[str, str], None],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    t: Optional[Translations] = None
+) -> None:
+    """
+    Scrive e formatta un file Excel in un solo passaggio, in streaming.
+    
+    Stesso risultato di to_excel + formatta_excel_isbn, ma con un
+    workbook openpyxl in sola scrittura: le righe vengono scritte su disco
+    man mano, con lo stile già applicato, e il file non viene mai tenuto
+    (né riletto) interamente in memoria.
+    
+    Args:
+        filepath: File Excel da creare
+        fogli: Tuple (nome foglio, righe da scrivere)
+        config: Configurazione applicazione
+        log_callback: Funzione per logging (message, level)
+        progress_callback: Funzione per progress bar (current, total), da 80 a 100
+        t: Traduzioni (opzionale)
+    """
+    fogli = list(fogli)
+    scrittore = ScrittoreExcelStreaming(config, log_callback, t=t)
+    try:
+        for n, (nome, df) in enumerate(fogli):
+            scrittore.aggiungi_foglio(nome, list(df.columns))
+            scrittore.aggiungi_righe(df)
+            
+            if progress_callback:
+                progress_callback(80 + 20 * (n + 1) // len(fogli), 100)
+    except Exception as e:
+        error_msg = f"{t.error_formatting if t else '❌ Errore formattazione'}: {str(e)}"
+        log_callback(error_msg, "ERROR")
+        raise
+    scrittore.salva(filepath)
+
+
+class ScrittoreExcelStreaming:
+    """
+    Workbook openpyxl in sola scrittura, già formattato, a cui aggiungere
+    fogli e righe a blocchi: solo la riga corrente resta in memoria.
+    
+    Un foglio che supera max_righe continua in un nuovo foglio con lo
+    stesso nome e un numero (nome_2, nome_3, ...).
+    
+    Esempio:
+        >>> scrittore = ScrittoreExcelStreaming(config, log)
+        >>> scrittore.aggiungi_foglio("risultati", ["ISBN", "Titolo"])
+        >>> for blocco in blocchi:
+        ...     scrittore.aggiungi_righe(blocco)
+        >>> scrittore.salva(Path("output.xlsx"))
+    """
+    
+    def __init__(
+        self,
+        config: AppConfig,
+        log_callback: Callable[[str, str], None],
+        max_righe: Optional[int] = None,
+        t: Optional[Translations] = None
+    ):
+        self.config = config
+        self.log_callback = log_callback
+        self.max_righe = max(1, min(max_righe or config.OUTPUT_MAX_RIGHE_FOGLIO, 1_048_575))
+        self.t = t
+        self.wb = Workbook(write_only=True)
+        _registra_stili_globali(self.wb, config)
+        self.n_righe = 0
+        self._ws = None
+        self._nome = ''
+        self._intestazioni: List[str] = []
+        self._parte = 1
+        self._riga = 0
+    
+    def aggiungi_foglio(self, nome: str, colonne: List[str]) -> None:
+        """Nuovo foglio con le intestazioni indicate (le righe seguenti vanno qui)"""
+        self._nome = nome
+        self._intestazioni = [_abbreviazione(col, self.config) for col in colonne]
+        self._parte = 1
+        self._nuovo_foglio(nome)
+    
+    def aggiungi_righe(self, df: pd.DataFrame) -> None:
+        """Aggiunge le righe al foglio corrente (stesse colonne di aggiungi_foglio)"""
+        ws = self._ws
+        for riga in df.itertuples(index=False, name=None):
+            if self._riga > self.max_righe:
+                self._parte += 1
+                self._nuovo_foglio(f"{self._nome[:31 - len(str(self._parte)) - 1]}_{self._parte}")
+                ws = self._ws
+            self._riga += 1
+            ws.row_dimensions[self._riga].height = self.config.EXCEL_ROW_HEIGHT_DATA
+            ws.append([
+                _cella(ws, None if valore is None or valore is pd.NA or valore != valore else valore,
+                       "normal_style")
+                for valore in riga
+            ])
+            # Riga già scritta: la sua altezza non serve più in memoria
+            del ws.row_dimensions[self._riga]
+        self.n_righe += len(df)
+    
+    def salva(self, filepath: Path) -> None:
+        t = self.t
+        try:
+            save_msg = t.proc_saving_format if t else "Salvataggio formattazione..."
+            self.log_callback(save_msg, "INFO")
+            self.wb.save(str(filepath))
+            
+            complete_msg = t.proc_format_complete if t else "✅ Formattazione completata"
+            self.log_callback(complete_msg, "SUCCESS")
+        except PermissionError:
+            if t:
+                error_msg = t.error_file_open_excel.format(filename=filepath.name)
+            else:
+                error_msg = f"Il file '{filepath.name}' è aperto in Excel.\nChiudilo e riprova l'operazione."
+            raise PermissionError(error_msg)
+        except Exception as e:
+            error_msg = f"{t.error_formatting if t else '❌ Errore formattazione'}: {str(e)}"
+            self.log_callback(error_msg, "ERROR")
+            raise
+    
+    def scarta(self) -> None:
+        """Chiude il workbook senza salvarlo (righe già scritte nei file temporanei rimosse)"""
+        for ws in self.wb.worksheets:
+            if not ws.closed:
+                ws.close()
+            if ws._writer is not None:
+                ws._writer.cleanup()
+    
+    def _nuovo_foglio(self, nome: str) -> None:
+        t = self.t
+        sheet_msg = f"  {t.proc_formatting_sheet if t else 'Formattazione foglio'}: {nome}"
+        self.log_callback(sheet_msg, "INFO")
+        
+        ws = self.wb.create_sheet(title=nome)
+        ws.page_setup.orientation = 'landscape'
+        ws.page_setup.paperSize = 9  # A4
+        ws.freeze_panes = 'A2'
+        ws.sheet_view.zoomScale = self.config.EXCEL_ZOOM
+        
+        # Larghezze e altezze vanno impostate prima di scrivere le righe
+        for col_idx, valore in enumerate(self._intestazioni, 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = _larghezza_colonna(valore, self.config)
+        
+        ws.row_dimensions[1].height = self.config.EXCEL_ROW_HEIGHT_HEADER
+        ws.append([_cella(ws, valore, "header_style") for valore in self._intestazioni])
+        self._ws = ws
+        self._riga = 1
+
+
+def _cella(ws, valore, stile: str) -> WriteOnlyCell:
+    cella = WriteOnlyCell(ws, value=valore)
+    cella.style = stile
+    return cella
+
+
 def _registra_stili_globali(wb, config: AppConfig) -> None:
     """Registra stili riutilizzabili (come Sebina Plus)"""
     stili = {
@@ -136,11 +295,16 @@ def _applica_abbreviazioni(ws, max_col: int, config: AppConfig) -> None:
     for col_idx in range(1, max_col + 1):
         cell = ws.cell(row=1, column=col_idx)
         if cell.value:
-            header_lower = str(cell.value).lower().strip()
-            
-            # Cerca se c'è un'abbreviazione configurata
-            if header_lower in config.ABBREV:
-                cell.value = config.ABBREV[header_lower]
+            cell.value = _abbreviazione(cell.value, config)
+
+
+def _abbreviazione(valore, config: AppConfig):
+    """Abbreviazione configurata per un'intestazione (o l'intestazione stessa)"""
+    if not valore:
+        return valore
+    header_lower = str(valore).lower().strip()
+    # Cerca se c'è un'abbreviazione configurata
+    return config.ABBREV.get(header_lower, valore)
 
 
 def _formatta_header(ws, max_col: int, config: AppConfig) -> None:
@@ -162,26 +326,25 @@ def _formatta_larghezze_colonne(ws, max_col: int, config: AppConfig) -> None:
     - Colonne ISBN: 18 caratteri
     - Altre colonne: 15 caratteri (default)
     """
-    from utils import is_isbn_column_name  # Import locale per evitare dipendenze circolari
-    
     # Applica larghezze
     for col_idx in range(1, max_col + 1):
         col_letter = get_column_letter(col_idx)
         header_val = ws.cell(row=1, column=col_idx).value
-        
-        if header_val and is_isbn_column_name(str(header_val), config):
-            # Colonne ISBN
-            ws.column_dimensions[col_letter].width = config.EXCEL_COLUMN_WIDTH_ISBN
-        elif header_val:
-            # Cerca larghezza specifica
-            header_lower = str(header_val).lower().strip()
-            
-            if header_lower in config.LARGHEZZE:
-                ws.column_dimensions[col_letter].width = config.LARGHEZZE[header_lower]
-            else:
-                ws.column_dimensions[col_letter].width = config.LARGHEZZE_DEFAULT
-        else:
-            ws.column_dimensions[col_letter].width = config.LARGHEZZE_DEFAULT
+        ws.column_dimensions[col_letter].width = _larghezza_colonna(header_val, config)
+
+
+def _larghezza_colonna(header_val, config: AppConfig) -> float:
+    """Larghezza di una colonna in base alla sua intestazione"""
+    from utils import is_isbn_column_name  # Import locale per evitare dipendenze circolari
+    
+    if header_val and is_isbn_column_name(str(header_val), config):
+        # Colonne ISBN
+        return config.EXCEL_COLUMN_WIDTH_ISBN
+    if header_val:
+        # Cerca larghezza specifica
+        header_lower = str(header_val).lower().strip()
+        return config.LARGHEZZE.get(header_lower, config.LARGHEZZE_DEFAULT)
+    return config.LARGHEZZE_DEFAULT
 
 
 def _formatta_righe_dati(ws, max_row: int, max_col: int, config: AppConfig) -> None:
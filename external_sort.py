@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Ordinamento esterno (sort/merge su disco) per chiavi ISBN
+
+Le chiavi (ISBN codificati in uint64) vengono accumulate insieme a un
+valore intero, ordinate a blocchi e scritte in file "run" su disco locale.
+La fusione k-way dei run restituisce blocchi ordinati per (chiave, valore)
+in cui un gruppo di chiavi uguali non viene mai diviso tra due blocchi:
+dedup e join si fanno quindi blocco per blocco con operazioni vettoriali,
+con memoria limitata alla dimensione dei blocchi.
+"""
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+
+
+DTYPE_RUN = np.dtype([('chiave', '<u8'), ('valore', '<i8')])
+"""Elemento di un run: chiave ISBN codificata + valore (es. id riga, -1 = catalogo)"""
+
+
+class ScrittoreRun:
+    """
+    Accumula coppie (chiave, valore) e le scrive su disco in run ordinati.
+
+    Esempio:
+        >>> scrittore = ScrittoreRun(cartella, "wl", max_elementi=1_000_000)
+        >>> scrittore.aggiungi(chiavi, valori)
+        >>> run = scrittore.chiudi()
+    """
+
+    def __init__(self, cartella: Path, prefisso: str, max_elementi: int):
+        self.cartella = Path(cartella)
+        self.prefisso = prefisso
+        self.max_elementi = max(1, max_elementi)
+        self.run: List[Path] = []
+        self.n_elementi = 0
+        self._buffer: List[np.ndarray] = []
+        self._nel_buffer = 0
+
+    def aggiungi(self, chiavi: np.ndarray, valori: np.ndarray) -> None:
+        """Aggiunge un blocco di coppie; scrive un run quando il buffer è pieno."""
+        blocco = np.empty(len(chiavi), dtype=DTYPE_RUN)
+        blocco['chiave'] = chiavi
+        blocco['valore'] = valori
+        self._buffer.append(blocco)
+        self._nel_buffer += len(blocco)
+        self.n_elementi += len(blocco)
+        if self._nel_buffer >= self.max_elementi:
+            self._scarica()
+
+    def _scarica(self) -> None:
+        if not self._nel_buffer:
+            return
+        dati = np.concatenate(self._buffer)
+        self._buffer = []
+        self._nel_buffer = 0
+        dati = dati[np.lexsort((dati['valore'], dati['chiave']))]
+        path = self.cartella / f"{self.prefisso}_{len(self.run):05d}.run"
+        dati.tofile(path)
+        self.run.append(path)
+
+    def chiudi(self) -> List[Path]:
+        """Scrive l'ultimo run e restituisce l'elenco dei file."""
+        self._scarica()
+        return self.run
+
+
+def unisci_run(run: List[Path], elementi_per_blocco: int) -> Iterator[np.ndarray]:
+    """
+    Fusione k-way vettorizzata di run ordinati.
+
+    A ogni passo legge un blocco da ogni run e restituisce tutti gli
+    elementi con chiave strettamente minore della più piccola "ultima
+    chiave" tra i blocchi non finali: nessun run può ancora contenere
+    quelle chiavi, quindi ogni gruppo di chiavi uguali esce intero.
+
+    Args:
+        run: File run scritti da ScrittoreRun
+        elementi_per_blocco: Elementi letti per run a ogni passo
+
+    Yields:
+        Array DTYPE_RUN ordinati per (chiave, valore)
+    """
+    mappe = [np.memmap(p, dtype=DTYPE_RUN, mode='r') for p in run if p.stat().st_size]
+    posizioni = [0] * len(mappe)
+    passo = max(1, elementi_per_blocco)
+
+    while True:
+        attivi = [i for i, m in enumerate(mappe) if posizioni[i] < len(m)]
+        if not attivi:
+            return
+
+        blocchi = {i: mappe[i][posizioni[i]:posizioni[i] + passo] for i in attivi}
+        non_finali = [i for i in attivi if posizioni[i] + len(blocchi[i]) < len(mappe[i])]
+
+        if non_finali:
+            limite = min(blocchi[i]['chiave'][-1] for i in non_finali)
+            tagli = {i: int(np.searchsorted(blocchi[i]['chiave'], limite, side='left'))
+                     for i in attivi}
+        else:
+            tagli = {i: len(blocchi[i]) for i in attivi}
+
+        if not any(tagli.values()):
+            # Un gruppo di chiavi uguali è più lungo del blocco: allarga il passo
+            passo *= 2
+            continue
+
+        parti = [np.asarray(blocchi[i][:tagli[i]]) for i in attivi if tagli[i]]
+        for i in attivi:
+            posizioni[i] += tagli[i]
+        uniti = np.concatenate(parti)
+        yield uniti[np.lexsort((uniti['valore'], uniti['chiave']))]
+        passo = max(1, elementi_per_blocco)
@@ -8,12 +8,17 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 import threading
+import time
 import platform
 import subprocess
+import zipfile
 
 from config import AppConfig
 from data_processor import DataProcessor
+from job_queue import CodaConfronti, LavoroConfronto
+from planner import StimaFile, memoria_lettura, stima_file, trova_file_identici
 from localization import get_translations, Translations
+from zip_bundle import elenca_archivio, membro_archivio
 
 
 class ISBNMatcherApp:
@@ -35,11 +40,18 @@ class ISBNMatcherApp:
         self.root.minsize(800, 700)
         
         self.files: List[Path] = []
+        self.ispezioni: Dict[Path, StimaFile] = {}
+        self.file_identici: Dict[Path, Path] = {}
         self.output_file: Optional[Path] = None
         self.processing_thread: Optional[threading.Thread] = None
         self.stop_processing = threading.Event()
+        # Confronti accodati: eseguiti uno dopo l'altro, chiavi di confronto in cache
+        self.coda = CodaConfronti(self.processor, self.log, self.update_progress)
+        self.queue_thread: Optional[threading.Thread] = None
         
         self.modalita = tk.StringVar(value=self.config.MODE_MATCH)
+        # Worklist in testa all'elenco: più di una = confronto batch
+        self.n_worklist = tk.IntVar(value=1)
         
         self.setup_ui()
     
@@ -180,11 +192,69 @@ class ISBNMatcherApp:
             bg="#f8fafc",
             fg="#64748b"
         ).pack(anchor=tk.W, padx=22)
+        
+        # Radio button ENTRAMBI
+        both_frame = tk.Frame(radio_container, bg="#f8fafc")
+        both_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(20, 0))
+        
+        tk.Radiobutton(
+            both_frame,
+            text=self.t.mode_both,
+            variable=self.modalita,
+            value=self.config.MODE_ENTRAMBI,
+            font=("Arial", 10, "bold"),
+            bg="#f8fafc",
+            fg="#1e293b",
+            selectcolor="#f8fafc",
+            activebackground="#f8fafc",
+            activeforeground="#1e293b",
+            cursor="hand2",
+            command=self._on_mode_change
+        ).pack(anchor=tk.W)
+        
+        tk.Label(
+            both_frame,
+            text=self.t.mode_both_desc,
+            font=("Arial", 9),
+            bg="#f8fafc",
+            fg="#64748b"
+        ).pack(anchor=tk.W, padx=22)
+        
+        # Radio button INVERSO
+        reverse_frame = tk.Frame(radio_container, bg="#f8fafc")
+        reverse_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(20, 0))
+        
+        tk.Radiobutton(
+            reverse_frame,
+            text=self.t.mode_reverse,
+            variable=self.modalita,
+            value=self.config.MODE_INVERSO,
+            font=("Arial", 10, "bold"),
+            bg="#f8fafc",
+            fg="#1e293b",
+            selectcolor="#f8fafc",
+            activebackground="#f8fafc",
+            activeforeground="#1e293b",
+            cursor="hand2",
+            command=self._on_mode_change
+        ).pack(anchor=tk.W)
+        
+        tk.Label(
+            reverse_frame,
+            text=self.t.mode_reverse_desc,
+            font=("Arial", 9),
+            bg="#f8fafc",
+            fg="#64748b"
+        ).pack(anchor=tk.W, padx=22)
     
     def _on_mode_change(self):
         """Callback quando cambia la modalità"""
         if self.modalita.get() == self.config.MODE_MATCH:
             self.log(self.t.log_mode_match, "INFO")
+        elif self.modalita.get() == self.config.MODE_ENTRAMBI:
+            self.log(self.t.log_mode_both, "INFO")
+        elif self.modalita.get() == self.config.MODE_INVERSO:
+            self.log(self.t.log_mode_reverse, "INFO")
         else:
             self.log(self.t.log_mode_non_match, "WARNING")
     
@@ -210,6 +280,13 @@ class ISBNMatcherApp:
                 font=("Arial", 10, "bold"), bg="#f8fafc", 
                 fg="#3b82f6").pack(side=tk.LEFT)
         
+        tk.Spinbox(title_frame, from_=1, to=99, width=3,
+                   textvariable=self.n_worklist, state='readonly',
+                   command=self._on_worklist_count_change).pack(side=tk.RIGHT)
+        tk.Label(title_frame, text=f"{self.t.batch_worklists_label} ",
+                font=("Arial", 10), bg="#f8fafc",
+                fg="#64748b").pack(side=tk.RIGHT)
+        
         # Pulsanti
         btn_frame = tk.Frame(file_frame, bg="#f8fafc")
         btn_frame.pack(fill=tk.X, pady=(0, 10))
@@ -274,11 +351,21 @@ class ISBNMatcherApp:
                                            tk.DISABLED, ("Arial", 13, "bold"), 20, 8)
         self.process_btn.pack(side=tk.LEFT, padx=8)
         
+        self.enqueue_btn = self.create_btn(center, self.t.btn_enqueue,
+                                           self.enqueue_jobs, "#6366f1",
+                                           tk.DISABLED, ("Arial", 13, "bold"), 20, 8)
+        self.enqueue_btn.pack(side=tk.LEFT, padx=8)
+        
         self.open_btn = self.create_btn(center, self.t.btn_open_output,
                                         self.open_output_file, "#10b981",
                                         tk.DISABLED, ("Arial", 13, "bold"), 20, 8)
         self.open_btn.pack(side=tk.LEFT, padx=8)
         
+        self.lookup_btn = self.create_btn(center, self.t.btn_quick_lookup,
+                                          self.show_quick_lookup, "#0ea5e9",
+                                          tk.NORMAL, ("Arial", 13, "bold"), 20, 8)
+        self.lookup_btn.pack(side=tk.LEFT, padx=8)
+        
         # Progress bar
         progress_frame = tk.Frame(action_frame, bg="#f8fafc")
         progress_frame.pack(fill=tk.X, pady=(10, 0))
@@ -313,6 +400,11 @@ class ISBNMatcherApp:
                                  padx=10, pady=3, cursor="hand2", relief=tk.FLAT)
         clear_log_btn.pack(side=tk.LEFT)
     
+    def _on_worklist_count_change(self):
+        """Callback quando cambia il numero di worklist (batch)"""
+        self.refresh_file_list()
+        self.update_buttons()
+    
     def create_btn(self, parent, text, command, bg, state=tk.NORMAL,
                    font=("Arial", 10, "bold"), padx=20, pady=8):
         return tk.Button(parent, text=text, command=command, bg=bg,
@@ -362,20 +454,75 @@ class ISBNMatcherApp:
         files = filedialog.askopenfilenames(
             title=self.t.btn_add_files,
             filetypes=[("File Excel", "*.xlsx *.xls"), 
+                      ("Indice ISBN", f"*{self.config.SUFFIX_INDICE}"),
+                      ("Storico ISBN", f"*{self.config.SUFFIX_STORICO}"),
+                      ("Archivio ZIP", f"*{self.config.SUFFIX_ARCHIVIO}"),
                       (self.t.info_title, "*.*")]
         )
         
         added = 0
         for file in files:
-            path = Path(file)
-            if path not in self.files:
-                self.files.append(path)
-                added += 1
+            for path in self._espandi_archivio(Path(file)):
+                if path not in self.files:
+                    self.files.append(path)
+                    added += 1
         
         if added > 0:
             self.refresh_file_list()
             self.update_buttons()
             self.log(f"{added} {self.t.log_files_added}", "SUCCESS")
+            self.inspect_files()
+    
+    def _espandi_archivio(self, path: Path) -> List[Path]:
+        """Un archivio .zip diventa l'elenco dei file Excel che contiene"""
+        if path.suffix.lower() != self.config.SUFFIX_ARCHIVIO:
+            return [path]
+        try:
+            membri = elenca_archivio(path, self.config.SUFFISSI_EXCEL)
+        except (zipfile.BadZipFile, OSError) as e:
+            self.log(f"{path.name}: {e}", "ERROR")
+            return []
+        self.log(self.t.proc_archive_members.format(archive=path.name, count=len(membri)),
+                 "INFO" if membri else "WARNING")
+        return membri
+    
+    def _nome_file(self, path: Path) -> str:
+        """Nome mostrato nell'elenco (archivio › file per i file dentro un .zip)"""
+        membro = membro_archivio(path)
+        if membro is None:
+            return path.name
+        return f"{membro[0].name} › {membro[1]}"
+    
+    def inspect_files(self):
+        """Ispezione preliminare dei file nuovi in background (solo metadati e campione)"""
+        nuovi = [f for f in self.files if f not in self.ispezioni]
+        tutti = self.files.copy()
+        self.processor.set_translations(self.t)
+        
+        def _ispeziona():
+            stime = []
+            for path in nuovi:
+                try:
+                    stime.append(stima_file(path, self.config, rileva_isbn=True))
+                except Exception as e:
+                    self.log(f"{path.name}: {e}", "WARNING")
+            try:
+                identici = trova_file_identici(tutti)
+            except OSError:
+                identici = {}
+            for stima in stime:
+                for riga, livello in self.processor.descrivi_ispezione(
+                        stima, identici.get(stima.path)):
+                    self.log(riga, livello)
+            
+            def _aggiorna():
+                for stima in stime:
+                    self.ispezioni[stima.path] = stima
+                self.file_identici = identici
+                self.refresh_file_list()
+            self.root.after(0, _aggiorna)
+        
+        threading.Thread(target=_ispeziona, daemon=True).start()
     
     def remove_selected(self):
         selections = self.file_listbox.curselection()
@@ -386,9 +533,11 @@ class ISBNMatcherApp:
             self.refresh_file_list()
             self.update_buttons()
             self.log(f"{self.t.log_file_removed}: {removed_file}", "INFO")
+            self.inspect_files()
     
     def clear_files(self):
         self.files.clear()
+        self.file_identici = {}
         self.file_listbox.delete(0, tk.END)
         self.update_buttons()
         self.log(self.t.log_files_cleared, "INFO")
@@ -416,17 +565,38 @@ class ISBNMatcherApp:
     def refresh_file_list(self):
         self.file_listbox.delete(0, tk.END)
         for idx, path in enumerate(self.files):
-            if idx == 0:
-                self.file_listbox.insert(tk.END, 
-                    f"{path.name}  {self.t.worklist_label}")
+            if idx < self.n_worklist.get():
+                testo = f"{self._nome_file(path)}  {self.t.worklist_label}"
             else:
-                self.file_listbox.insert(tk.END, path.name)
+                testo = self._nome_file(path)
+            
+            stima = self.ispezioni.get(path)
+            if stima is not None:
+                fogli_isbn = (len(stima.fogli) if stima.indice
+                              else sum(1 for f in stima.fogli if f.colonna_isbn))
+                costo = memoria_lettura(stima, self.config.LETTORE_XLSX_STREAMING, self.config)
+                testo += "  — " + self.t.inspect_list_summary.format(
+                    rows=stima.righe,
+                    isbn=fogli_isbn,
+                    sheets=len(stima.fogli),
+                    cost=max(1, costo // (1024 * 1024))
+                )
+            if path in self.file_identici:
+                testo += "  — " + self.t.inspect_list_identical.format(
+                    original=self.file_identici[path].name
+                )
+            self.file_listbox.insert(tk.END, testo)
     
     def update_buttons(self):
         state = tk.NORMAL if self.files else tk.DISABLED
         self.clear_btn.config(state=state)
         self.remove_sel_btn.config(state=state)
-        self.process_btn.config(state=tk.NORMAL if len(self.files) >= 2 else tk.DISABLED)
+        pronti = len(self.files) > self.n_worklist.get()
+        in_corso = self.processing_thread is not None and self.processing_thread.is_alive()
+        self.process_btn.config(
+            state=tk.NORMAL if pronti and not in_corso and not self.coda.attiva else tk.DISABLED
+        )
+        self.enqueue_btn.config(state=tk.NORMAL if pronti and not in_corso else tk.DISABLED)
         
         selection = self.file_listbox.curselection()
         if selection and len(self.files) > 1:
@@ -443,8 +613,12 @@ class ISBNMatcherApp:
         if len(self.files) < 2:
             messagebox.showerror(self.t.error_title, self.t.error_min_files)
             return
+        if len(self.files) <= self.n_worklist.get():
+            messagebox.showerror(self.t.error_title, self.t.error_batch_files)
+            return
         
         self.process_btn.config(state=tk.DISABLED)
+        self.enqueue_btn.config(state=tk.DISABLED)
         self.add_btn.config(state=tk.DISABLED)
         
         self.processing_thread = threading.Thread(
@@ -460,6 +634,22 @@ class ISBNMatcherApp:
             # Passa le traduzioni al processor
             self.processor.set_translations(self.t)
             
+            n_worklist = self.n_worklist.get()
+            if modalita == self.config.MODE_INVERSO:
+                result = self.processor.process_inverso_isbn(
+                    files, self.log, self.update_progress, n_worklist=n_worklist
+                )
+                self.root.after(0, lambda: self.show_success(result))
+                return
+            
+            if n_worklist > 1:
+                risultati = self.processor.process_batch_isbn(
+                    files[:n_worklist], files[n_worklist:], self.log, self.update_progress,
+                    modalita=modalita
+                )
+                self.root.after(0, lambda: self.show_batch_success(risultati))
+                return
+            
             result = self.processor.process_confronto_isbn(
                 files, self.log, self.update_progress, modalita=modalita
             )
@@ -468,8 +658,39 @@ class ISBNMatcherApp:
             error_msg = str(e)
             self.root.after(0, lambda: self.show_error(error_msg))
     
+    def enqueue_jobs(self):
+        """Accoda un confronto per ogni worklist in testa all'elenco (con i file di confronto attuali)"""
+        if len(self.files) <= self.n_worklist.get():
+            messagebox.showerror(self.t.error_title, self.t.error_batch_files)
+            return
+        
+        n_worklist = self.n_worklist.get()
+        lavori = [
+            LavoroConfronto(worklist, self.files[n_worklist:], self.modalita.get())
+            for worklist in self.files[:n_worklist]
+        ]
+        
+        # Passa le traduzioni al processor
+        self.processor.set_translations(self.t)
+        avvia = self.coda.accoda(lavori)
+        self.log(self.t.queue_added.format(count=len(lavori), pending=self.coda.in_attesa), "INFO")
+        
+        if avvia:
+            self.process_btn.config(state=tk.DISABLED)
+            self.queue_thread = threading.Thread(target=self.execute_queue, daemon=True)
+            self.queue_thread.start()
+    
+    def execute_queue(self):
+        try:
+            lavori = self.coda.esegui()
+            self.root.after(0, lambda: self.show_queue_success(lavori))
+        except Exception as e:
+            error_msg = str(e)
+            self.root.after(0, lambda: self.show_error(error_msg))
+    
     def show_success(self, result: Dict[str, Any]):
         self.process_btn.config(state=tk.NORMAL)
+        self.enqueue_btn.config(state=tk.NORMAL)
         self.add_btn.config(state=tk.NORMAL)
         self.output_file = result['output']
         self.open_btn.config(state=tk.NORMAL)
@@ -477,6 +698,12 @@ class ISBNMatcherApp:
         if result['modalita'] == self.config.MODE_MATCH:
             titolo = self.t.success_title_match
             emoji_risultato = "✅"
+        elif result['modalita'] == self.config.MODE_ENTRAMBI:
+            titolo = self.t.success_title_both
+            emoji_risultato = "✅"
+        elif result['modalita'] == self.config.MODE_INVERSO:
+            titolo = self.t.success_title_reverse
+            emoji_risultato = "↩️"
         else:
             titolo = self.t.success_title_non_match
             emoji_risultato = "❌"
@@ -485,14 +712,61 @@ class ISBNMatcherApp:
         msg += f"📚 {self.t.success_worklist_isbn}: {result['isbn_wl']}\n"
         if result.get('duplicati_rimossi', 0) > 0:
             msg += f"🗑️ {self.t.success_duplicates_removed}: {result['duplicati_rimossi']}\n"
-        msg += f"{emoji_risultato} {self.t.success_results}: {result['match_trovati']}\n"
+        if result['modalita'] == self.config.MODE_ENTRAMBI:
+            msg += f"✅ {self.t.proc_results_match}: {result['match_trovati']}\n"
+            msg += f"❌ {self.t.proc_results_non_match}: {result['non_match_trovati']}\n"
+        else:
+            msg += f"{emoji_risultato} {self.t.success_results}: {result['match_trovati']}\n"
         msg += f"📊 {self.t.success_files_processed}: {result['files_elaborati']}"
         
         self.log(self.t.log_processing_complete, "SUCCESS")
         messagebox.showinfo(titolo, msg)
     
+    def show_batch_success(self, risultati: List[Dict[str, Any]]):
+        self.process_btn.config(state=tk.NORMAL)
+        self.enqueue_btn.config(state=tk.NORMAL)
+        self.add_btn.config(state=tk.NORMAL)
+        riusciti = [r for r in risultati if 'errore' not in r]
+        if riusciti:
+            self.output_file = riusciti[0]['output']
+            self.open_btn.config(state=tk.NORMAL)
+        
+        righe = []
+        for r in risultati:
+            if 'errore' in r:
+                righe.append(f"❌ {r['worklist'].name}: {r['errore']}")
+            else:
+                righe.append("✅ " + self.t.success_batch_line.format(
+                    file=r['output'].name, results=r['match_trovati']
+                ))
+        
+        self.log(self.t.log_processing_complete, "SUCCESS" if riusciti else "WARNING")
+        messagebox.showinfo(self.t.success_title_batch, "\n".join(righe))
+    
+    def show_queue_success(self, lavori: List[LavoroConfronto]):
+        self.update_buttons()
+        riusciti = [l for l in lavori if l.risultato is not None]
+        if riusciti:
+            self.output_file = riusciti[-1].risultato['output']
+            self.open_btn.config(state=tk.NORMAL)
+        
+        righe = []
+        for lavoro in lavori:
+            if lavoro.risultato is None:
+                righe.append(f"❌ {lavoro.worklist.name}: {lavoro.errore}")
+            else:
+                righe.append("✅ " + self.t.success_queue_line.format(
+                    file=lavoro.risultato['output'].name,
+                    results=lavoro.risultato['match_trovati'],
+                    seconds=lavoro.secondi_totali
+                ))
+        
+        self.log(self.t.log_processing_complete, "SUCCESS" if riusciti else "WARNING")
+        messagebox.showinfo(self.t.success_title_queue, "\n".join(righe))
+    
     def show_error(self, error: str):
         self.process_btn.config(state=tk.NORMAL)
+        self.enqueue_btn.config(state=tk.NORMAL)
         self.add_btn.config(state=tk.NORMAL)
         self.log(f"{self.t.error_title}: {error}", "ERROR")
         messagebox.showerror(self.t.error_title, 
@@ -522,16 +796,106 @@ class ISBNMatcherApp:
         """Gestisce il drag & drop di file"""
         files = self.root.tk.splitlist(event.data)
         added = 0
+        accettati = (*self.config.SUFFISSI_EXCEL, self.config.SUFFIX_INDICE,
+                     self.config.SUFFIX_STORICO, self.config.SUFFIX_ARCHIVIO)
         for file in files:
             path = Path(file.strip('{}'))
-            if path.suffix.lower() in ['.xlsx', '.xls'] and path not in self.files:
-                self.files.append(path)
-                added += 1
+            if path.suffix.lower() not in accettati:
+                continue
+            for membro in self._espandi_archivio(path):
+                if membro not in self.files:
+                    self.files.append(membro)
+                    added += 1
         
         if added > 0:
             self.refresh_file_list()
             self.update_buttons()
             self.log(f"{added} {self.t.log_files_added}", "SUCCESS")
+            self.inspect_files()
+    
+    def show_quick_lookup(self):
+        """Finestra di ricerca rapida degli ISBN incollati negli indici e storici dell'elenco"""
+        window = tk.Toplevel(self.root)
+        window.title(self.t.lookup_title)
+        window.geometry("760x520")
+        window.transient(self.root)
+        
+        content = tk.Frame(window, bg="#f8fafc", padx=15, pady=15)
+        content.pack(fill=tk.BOTH, expand=True)
+        
+        tk.Label(content, text=self.t.lookup_hint, font=("Arial", 10),
+                bg="#f8fafc", fg="#64748b", justify=tk.LEFT,
+                wraplength=720).pack(anchor=tk.W, pady=(0, 8))
+        
+        input_text = scrolledtext.ScrolledText(content, height=6, font=("Consolas", 10),
+                                               relief=tk.SOLID, bd=1, wrap=tk.WORD)
+        input_text.pack(fill=tk.X)
+        input_text.focus_set()
+        
+        controls = tk.Frame(content, bg="#f8fafc")
+        controls.pack(fill=tk.X, pady=8)
+        status = tk.Label(controls, text="", font=("Arial", 9), bg="#f8fafc", fg="#64748b")
+        
+        colonne = ('isbn', 'esito', 'provenienza')
+        tree = ttk.Treeview(content, columns=colonne, show='headings', height=12)
+        for colonna, titolo, larghezza in zip(
+                colonne,
+                (self.t.lookup_col_isbn, self.t.lookup_col_result, self.t.lookup_col_source),
+                (150, 110, 460)):
+            tree.heading(colonna, text=titolo)
+            tree.column(colonna, width=larghezza, anchor=tk.W)
+        tree.pack(fill=tk.BOTH, expand=True)
+        
+        # Indici e storici aperti una volta per finestra, riaperti solo se
+        # l'elenco dei file cambia
+        aperta = {'files': None, 'ricerca': None}
+        
+        def _chiudi_ricerca():
+            if aperta['ricerca'] is not None:
+                aperta['ricerca'].close()
+            aperta['files'] = aperta['ricerca'] = None
+        
+        def _ricerca():
+            from quick_lookup import RicercaRapida
+            
+            if aperta['ricerca'] is None or aperta['files'] != self.files:
+                _chiudi_ricerca()
+                aperta['ricerca'] = RicercaRapida(self.files, self.config)
+                aperta['files'] = list(self.files)
+            return aperta['ricerca']
+        
+        def _cerca(event=None):
+            tree.delete(*tree.get_children())
+            try:
+                ricerca = _ricerca()
+                if not len(ricerca):
+                    status.config(text=self.t.lookup_no_sources, fg="#ef4444")
+                    return "break"
+                inizio = time.perf_counter()
+                esiti = ricerca.cerca(input_text.get("1.0", tk.END))
+                ms = (time.perf_counter() - inizio) * 1000
+            except Exception as e:
+                status.config(text=str(e), fg="#ef4444")
+                return "break"
+            
+            for esito in esiti:
+                if not esito.valido:
+                    risultato = self.t.lookup_invalid
+                elif esito.trovato:
+                    risultato = self.t.lookup_found
+                else:
+                    risultato = self.t.lookup_not_found
+                tree.insert('', tk.END, values=(esito.isbn, risultato, "; ".join(esito.provenienze)))
+            status.config(text=self.t.lookup_summary.format(
+                found=sum(1 for e in esiti if e.trovato), count=len(esiti), ms=ms
+            ), fg="#64748b")
+            return "break"
+        
+        self.create_btn(controls, self.t.lookup_search, _cerca, "#2563eb").pack(side=tk.LEFT)
+        status.pack(side=tk.LEFT, padx=10)
+        input_text.bind('<Control-Return>', _cerca)
+        # <Destroy> arriva anche per ogni widget figlio: solo la finestra chiude
+        window.bind('<Destroy>', lambda e: _chiudi_ricerca() if e.widget is window else None)
     
     def show_help(self):
         """Mostra la finestra di aiuto"""
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Indice ISBN precompilato e mappato in memoria
+
+Un file indice contiene gli ISBN normalizzati di uno o più cataloghi,
+ordinati e a larghezza fissa, preceduti da una piccola intestazione JSON
+(impronte dei file sorgente, conteggi, impronta delle chiavi, data di
+creazione).
+
+Il file viene aperto con np.memmap: nessun parsing, lookup con
+np.searchsorted, e la page cache del sistema operativo è condivisa da
+tutti i processi che aprono lo stesso indice.
+
+Formato:
+    MAGIC (8 byte) | lunghezza intestazione (uint32 LE) | intestazione JSON
+    | padding fino a multiplo di ALLINEAMENTO
+    | chiavi: n * larghezza byte (ASCII, ordinate, uniche)
+    | sorgenti: n * uint16 LE (indice in intestazione['sorgenti'])
+"""
+import hashlib
+import json
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+MAGIC = b'ISBNIDX1'
+VERSIONE = 1
+ALLINEAMENTO = 64
+MAX_SORGENTI = np.iinfo(np.uint16).max
+
+
+class IndiceNonValido(Exception):
+    """Il file non è un indice ISBN valido"""
+
+
+def scrivi_indice(
+    output: Path,
+    parti: Iterable[Tuple[str, str, pd.Series]],
+    impronte: List[Dict[str, Any]],
+    larghezza: int
+) -> Dict[str, Any]:
+    """
+    Scrive un file indice a partire dalle chiavi estratte dai cataloghi.
+
+    Args:
+        output: Percorso del file indice da creare
+        parti: Tuple (nome file, nome foglio, Serie di ISBN normalizzati)
+        impronte: Impronte dei file sorgente (vedi utils.impronta_file)
+        larghezza: Larghezza fissa delle chiavi (config.MAX_ISBN_LENGTH)
+
+    Returns:
+        Intestazione scritta nel file
+    """
+    sorgenti: List[Dict[str, str]] = []
+    blocchi_chiavi = []
+    blocchi_sorgenti = []
+    for nome_file, foglio, chiavi in parti:
+        if len(sorgenti) >= MAX_SORGENTI:
+            raise IndiceNonValido(f"Troppi fogli sorgente (massimo {MAX_SORGENTI})")
+        blocchi_chiavi.append(np.asarray(chiavi.to_numpy(), dtype=f'S{larghezza}'))
+        blocchi_sorgenti.append(np.full(len(chiavi), len(sorgenti), dtype='<u2'))
+        sorgenti.append({'file': nome_file, 'foglio': foglio})
+
+    if blocchi_chiavi:
+        tutte = np.concatenate(blocchi_chiavi)
+        origini = np.concatenate(blocchi_sorgenti)
+    else:
+        tutte = np.empty(0, dtype=f'S{larghezza}')
+        origini = np.empty(0, dtype='<u2')
+
+    # np.unique ordina e restituisce la prima occorrenza di ogni chiave
+    chiavi_uniche, prime = np.unique(tutte, return_index=True)
+
+    intestazione = {
+        'versione': VERSIONE,
+        'larghezza': larghezza,
+        'n_chiavi': int(len(chiavi_uniche)),
+        'n_righe_sorgente': int(len(tutte)),
+        # Impronta del contenuto: identifica l'indice meglio di 'creato',
+        # che ha la risoluzione del secondo
+        'impronta_chiavi': hashlib.sha256(chiavi_uniche.tobytes()).hexdigest(),
+        'creato': datetime.now().isoformat(timespec='seconds'),
+        'impronte': impronte,
+        'sorgenti': sorgenti,
+    }
+    dati_intestazione = json.dumps(intestazione, ensure_ascii=False).encode('utf-8')
+    inizio_dati = _allinea(len(MAGIC) + 4 + len(dati_intestazione))
+
+    output = Path(output)
+    temporaneo = output.with_name(output.name + '.tmp')
+    with open(temporaneo, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(dati_intestazione)))
+        f.write(dati_intestazione)
+        f.write(b'\0' * (inizio_dati - f.tell()))
+        f.write(chiavi_uniche.tobytes())
+        f.write(origini[prime].astype('<u2').tobytes())
+    temporaneo.replace(output)
+    return intestazione
+
+
+def leggi_intestazione(path: Path) -> Tuple[Dict[str, Any], int]:
+    """
+    Legge l'intestazione di un file indice senza mappare le chiavi.
+
+    Returns:
+        Tupla (intestazione, offset dei dati)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise IndiceNonValido(f"{Path(path).name}: non è un indice ISBN")
+        (lunghezza,) = struct.unpack('<I', f.read(4))
+        try:
+            intestazione = json.loads(f.read(lunghezza).decode('utf-8'))
+        except ValueError as e:
+            raise IndiceNonValido(f"{Path(path).name}: intestazione danneggiata ({e})")
+    if intestazione.get('versione') != VERSIONE:
+        raise IndiceNonValido(
+            f"{Path(path).name}: versione indice {intestazione.get('versione')} non supportata"
+        )
+    return intestazione, _allinea(len(MAGIC) + 4 + lunghezza)
+
+
+class IndiceIsbn:
+    """
+    Indice ISBN aperto in sola lettura tramite memory-mapping.
+
+    Esempio:
+        >>> indice = IndiceIsbn(Path("catalogo.isbnidx"))
+        >>> indice.contiene(np.array(["9788804668237"]))
+        array([ True])
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.intestazione, offset = leggi_intestazione(self.path)
+        self.larghezza: int = self.intestazione['larghezza']
+        n = self.intestazione['n_chiavi']
+
+        dimensione_attesa = offset + n * (self.larghezza + 2)
+        if self.path.stat().st_size < dimensione_attesa:
+            raise IndiceNonValido(f"{self.path.name}: file troncato")
+
+        if n:
+            self.chiavi = np.memmap(self.path, dtype=f'S{self.larghezza}', mode='r',
+                                    offset=offset, shape=(n,))
+            self._sorgenti = np.memmap(self.path, dtype='<u2', mode='r',
+                                       offset=offset + n * self.larghezza, shape=(n,))
+        else:
+            self.chiavi = np.empty(0, dtype=f'S{self.larghezza}')
+            self._sorgenti = np.empty(0, dtype='<u2')
+
+    def __len__(self) -> int:
+        return len(self.chiavi)
+
+    @property
+    def sorgenti(self) -> List[Dict[str, str]]:
+        return self.intestazione['sorgenti']
+
+    def _posizioni(self, chiavi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Posizioni di inserimento e maschera di presenza (ricerca binaria vettorizzata)."""
+        cercate = np.asarray(chiavi, dtype=f'S{self.larghezza}')
+        if not len(self.chiavi) or not len(cercate):
+            return np.zeros(len(cercate), dtype=np.intp), np.zeros(len(cercate), dtype=bool)
+        posizioni = np.searchsorted(self.chiavi, cercate)
+        limitate = np.minimum(posizioni, len(self.chiavi) - 1)
+        return limitate, self.chiavi[limitate] == cercate
+
+    def contiene(self, chiavi: Any) -> np.ndarray:
+        """
+        Verifica la presenza di più ISBN in un colpo solo.
+
+        Args:
+            chiavi: Sequenza di ISBN normalizzati (str)
+
+        Returns:
+            Array booleano allineato alle chiavi
+        """
+        return self._posizioni(chiavi)[1]
+
+    def sorgente_di(self, chiavi: Any) -> List[Optional[Dict[str, str]]]:
+        """File e foglio in cui ogni ISBN è stato visto per primo (None se assente)."""
+        posizioni, presenti = self._posizioni(chiavi)
+        sorgenti = self.sorgenti
+        return [sorgenti[self._sorgenti[p]] if ok else None
+                for p, ok in zip(posizioni, presenti)]
+
+
+def _allinea(n: int) -> int:
+    return (n + ALLINEAMENTO - 1) // ALLINEAMENTO * ALLINEAMENTO
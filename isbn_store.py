@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Storico ISBN persistente (SQLite)
+
+Raccoglie gli ISBN di tutti gli export caricati nel tempo, con file,
+foglio e data di ogni export, in un unico database locale: domande come
+"quali di questi ISBN erano in un export di quest'anno" diventano una
+query, senza rileggere centinaia di workbook. Un file storico può essere
+usato come file di confronto (come un indice .isbnidx).
+
+Schema:
+    esportazioni(id, file, foglio, data, caricato, sha256)
+    isbn(chiave, esportazione)   chiave primaria (chiave, esportazione)
+
+Le chiavi sono gli ISBN normalizzati codificati come interi (vedi
+utils.codifica_chiavi_isbn): la tabella isbn è WITHOUT ROWID, quindi la
+chiave primaria è anche l'indice su cui lavorano le ricerche. I
+confronti sono fatti in SQL: le chiavi cercate vengono caricate in una
+tabella temporanea e unite all'indice.
+"""
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+VERSIONE_STORICO = 1
+BLOCCO_INSERIMENTI = 50_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS esportazioni (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    foglio TEXT NOT NULL,
+    data TEXT NOT NULL,
+    caricato TEXT NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS esportazioni_sha256 ON esportazioni (sha256);
+CREATE INDEX IF NOT EXISTS esportazioni_data ON esportazioni (data);
+CREATE TABLE IF NOT EXISTS isbn (
+    chiave INTEGER NOT NULL,
+    esportazione INTEGER NOT NULL REFERENCES esportazioni (id),
+    PRIMARY KEY (chiave, esportazione)
+) WITHOUT ROWID;
+"""
+
+# Filtro per data degli export (date ISO: confronto tra stringhe)
+_FILTRO_DATA = "(:dal IS NULL OR e.data >= :dal) AND (:al IS NULL OR e.data <= :al)"
+
+
+class StoricoNonValido(Exception):
+    """Il file non è uno storico ISBN valido"""
+
+
+class StoricoIsbn:
+    """
+    Storico ISBN su SQLite.
+
+    Esempio:
+        >>> with StoricoIsbn(Path("storico.isbndb")) as storico:
+        ...     storico.aggiungi("export.xlsx", [("Foglio1", codici)], "2024-05-01", sha)
+        ...     storico.presenti(codici_worklist, dal="2024-01-01")
+    """
+
+    def __init__(self, path: Path, crea: bool = True):
+        """
+        Args:
+            path: File dello storico
+            crea: Crea il file (e lo schema) se non esiste; altrimenti
+                StoricoNonValido
+        """
+        self.path = Path(path)
+        if not crea and not self.path.is_file():
+            raise StoricoNonValido(f"{self.path.name}: file non trovato")
+        try:
+            self._db = sqlite3.connect(self.path)
+            versione = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if versione not in (0, VERSIONE_STORICO):
+                raise StoricoNonValido(f"{self.path.name}: versione storico {versione} non supportata")
+            if versione == 0:
+                if not crea:
+                    raise StoricoNonValido(f"{self.path.name}: non è uno storico ISBN")
+                self._db.executescript(_SCHEMA)
+                self._db.execute(f"PRAGMA user_version = {VERSIONE_STORICO}")
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+        except sqlite3.DatabaseError as e:
+            raise StoricoNonValido(f"{self.path.name}: {e}")
+
+    def __enter__(self) -> 'StoricoIsbn':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ------------------------------------------------------------------
+    # Caricamento
+    # ------------------------------------------------------------------
+
+    def caricato(self, sha256: str) -> bool:
+        """True se un file con questo contenuto è già stato caricato"""
+        riga = self._db.execute(
+            "SELECT 1 FROM esportazioni WHERE sha256 = ? LIMIT 1", (sha256,)
+        ).fetchone()
+        return riga is not None
+
+    def aggiungi(
+        self,
+        file: str,
+        parti: Iterable[Tuple[str, np.ndarray]],
+        data: str,
+        sha256: str
+    ) -> int:
+        """
+        Aggiunge gli ISBN di un export, un foglio alla volta, in un'unica
+        transazione (inserimenti a blocchi di BLOCCO_INSERIMENTI).
+
+        Args:
+            file: Nome del file di export
+            parti: Tuple (nome foglio, chiavi uint64)
+            data: Data dell'export (ISO, AAAA-MM-GG)
+            sha256: Impronta del contenuto (vedi utils.impronta_file)
+
+        Returns:
+            Chiavi inserite (uniche per foglio)
+        """
+        caricato = datetime.now().isoformat(timespec='seconds')
+        inserite = 0
+        with self._db:
+            for foglio, codici in parti:
+                cursore = self._db.execute(
+                    "INSERT INTO esportazioni (file, foglio, data, caricato, sha256) VALUES (?, ?, ?, ?, ?)",
+                    (file, foglio, data, caricato, sha256)
+                )
+                esportazione = cursore.lastrowid
+                codici = np.unique(np.asarray(codici, dtype=np.uint64))
+                for inizio in range(0, len(codici), BLOCCO_INSERIMENTI):
+                    blocco = codici[inizio:inizio + BLOCCO_INSERIMENTI].astype(np.int64).tolist()
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO isbn (chiave, esportazione) VALUES (?, ?)",
+                        ((chiave, esportazione) for chiave in blocco)
+                    )
+                inserite += len(codici)
+        return inserite
+
+    # ------------------------------------------------------------------
+    # Interrogazioni
+    # ------------------------------------------------------------------
+
+    def presenti(
+        self,
+        codici: np.ndarray,
+        dal: Optional[str] = None,
+        al: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Maschera delle chiavi presenti in almeno un export (del periodo).
+
+        Args:
+            codici: Chiavi uint64 da cercare
+            dal, al: Date ISO estremi inclusi (None = nessun limite)
+        """
+        trovate = np.zeros(len(codici), dtype=bool)
+        if not len(codici):
+            return trovate
+        with self._richiesta(codici):
+            posizioni = self._db.execute(
+                "SELECT r.posizione FROM temp.richiesta r WHERE EXISTS ("
+                " SELECT 1 FROM isbn i JOIN esportazioni e ON e.id = i.esportazione"
+                f" WHERE i.chiave = r.chiave AND {_FILTRO_DATA})",
+                {'dal': dal, 'al': al}
+            ).fetchall()
+        trovate[np.array([p for p, in posizioni], dtype=np.intp)] = True
+        return trovate
+
+    def chiavi(self, dal: Optional[str] = None, al: Optional[str] = None) -> np.ndarray:
+        """Tutte le chiavi (del periodo), uint64 ordinate e uniche"""
+        if dal is None and al is None:
+            cursore = self._db.execute("SELECT DISTINCT chiave FROM isbn ORDER BY chiave")
+        else:
+            cursore = self._db.execute(
+                "SELECT DISTINCT i.chiave FROM isbn i JOIN esportazioni e ON e.id = i.esportazione"
+                f" WHERE {_FILTRO_DATA} ORDER BY i.chiave",
+                {'dal': dal, 'al': al}
+            )
+        return np.fromiter((chiave for chiave, in cursore), dtype=np.int64).astype(np.uint64)
+
+    def assenti(
+        self,
+        codici: np.ndarray,
+        dal: Optional[str] = None,
+        al: Optional[str] = None,
+        righe_per_blocco: int = BLOCCO_INSERIMENTI
+    ) -> Iterator[List[Tuple[int, str, str, str]]]:
+        """
+        Chiavi dello storico (del periodo) assenti da codici, a blocchi.
+
+        I codici vanno in una tabella temporanea e il confronto è una
+        NOT EXISTS in SQL letta con fetchmany: la memoria non cresce con
+        la dimensione dello storico. Una riga per chiave, con l'export più
+        recente (del periodo) in cui compare.
+
+        Args:
+            codici: Chiavi uint64 di riferimento
+            dal, al: Date ISO estremi inclusi (None = nessun limite)
+            righe_per_blocco: Righe per blocco restituito
+
+        Yields:
+            Liste di tuple (chiave come int64, file, foglio, data), per chiave
+        """
+        cursore = None
+        try:
+            self._db.execute("CREATE TEMP TABLE riferimento (chiave INTEGER PRIMARY KEY)")
+            riferimento = np.asarray(codici, dtype=np.uint64).astype(np.int64)
+            for inizio in range(0, len(riferimento), BLOCCO_INSERIMENTI):
+                blocco = riferimento[inizio:inizio + BLOCCO_INSERIMENTI].tolist()
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO temp.riferimento (chiave) VALUES (?)",
+                    ((chiave,) for chiave in blocco)
+                )
+            # Con MAX() le colonne non aggregate vengono dalla riga del massimo
+            cursore = self._db.execute(
+                "SELECT i.chiave, e.file, e.foglio, MAX(e.data)"
+                " FROM isbn i JOIN esportazioni e ON e.id = i.esportazione"
+                f" WHERE {_FILTRO_DATA} AND NOT EXISTS ("
+                " SELECT 1 FROM temp.riferimento r WHERE r.chiave = i.chiave)"
+                " GROUP BY i.chiave ORDER BY i.chiave",
+                {'dal': dal, 'al': al}
+            )
+            while True:
+                righe = cursore.fetchmany(righe_per_blocco)
+                if not righe:
+                    return
+                yield righe
+        finally:
+            if cursore is not None:
+                cursore.close()
+            self._db.execute("DROP TABLE IF EXISTS temp.riferimento")
+            self._db.commit()
+
+    def provenienze(
+        self,
+        codici: np.ndarray,
+        dal: Optional[str] = None,
+        al: Optional[str] = None
+    ) -> List[Tuple[int, str, str, str]]:
+        """
+        Export in cui compare ogni chiave cercata.
+
+        Returns:
+            Tuple (posizione della chiave in codici, file, foglio, data),
+            per posizione e data
+        """
+        if not len(codici):
+            return []
+        with self._richiesta(codici):
+            return self._db.execute(
+                "SELECT r.posizione, e.file, e.foglio, e.data FROM temp.richiesta r"
+                " JOIN isbn i ON i.chiave = r.chiave"
+                " JOIN esportazioni e ON e.id = i.esportazione"
+                f" WHERE {_FILTRO_DATA} ORDER BY r.posizione, e.data",
+                {'dal': dal, 'al': al}
+            ).fetchall()
+
+    def riepilogo(self) -> Dict[str, Any]:
+        """Numero di export (file e fogli), chiavi uniche e intervallo di date"""
+        file, fogli, prima, ultima = self._db.execute(
+            "SELECT COUNT(DISTINCT sha256), COUNT(*), MIN(data), MAX(data) FROM esportazioni"
+        ).fetchone()
+        n_chiavi = self._db.execute(
+            "SELECT COUNT(*) FROM (SELECT DISTINCT chiave FROM isbn)"
+        ).fetchone()[0]
+        return {'file': file, 'fogli': fogli, 'chiavi': n_chiavi, 'dal': prima, 'al': ultima}
+
+    def _richiesta(self, codici: np.ndarray) -> '_TabellaRichiesta':
+        return _TabellaRichiesta(self._db, codici)
+
+
+class _TabellaRichiesta:
+    """Chiavi cercate in una tabella temporanea (posizione, chiave), eliminata all'uscita"""
+
+    def __init__(self, db: sqlite3.Connection, codici: np.ndarray):
+        self._db = db
+        self._codici = np.asarray(codici, dtype=np.uint64).astype(np.int64)
+
+    def __enter__(self) -> None:
+        self._db.execute(
+            "CREATE TEMP TABLE richiesta (posizione INTEGER PRIMARY KEY, chiave INTEGER NOT NULL)"
+        )
+        for inizio in range(0, len(self._codici), BLOCCO_INSERIMENTI):
+            blocco = self._codici[inizio:inizio + BLOCCO_INSERIMENTI].tolist()
+            self._db.executemany(
+                "INSERT INTO temp.richiesta (posizione, chiave) VALUES (?, ?)",
+                enumerate(blocco, inizio)
+            )
+
+    def __exit__(self, *exc) -> None:
+        self._db.execute("DROP TABLE temp.richiesta")
+        self._db.commit()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Coda dei confronti di una sessione
+
+Nella GUI si possono accodare più confronti (worklist e modalità diverse)
+mentre uno è in corso: vengono eseguiti uno dopo l'altro dallo stesso
+thread, con DataProcessor.process_batch_isbn. Le chiavi dei file di
+confronto già letti restano in memoria tra un lavoro e l'altro, in una
+cache LRU per file (key_cache.CacheChiavi) con un limite di memoria
+(config.CODA_CACHE_MB): un lavoro legge solo i file di confronto nuovi,
+cambiati o usciti dalla cache.
+
+Per ogni lavoro vengono registrati i tempi: lettura delle chiavi di
+confronto e durata totale.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from data_processor import LOG_ERROR, LOG_INFO, LOG_SUCCESS, LOG_WARNING, DataProcessor
+from key_cache import CacheChiavi
+from zip_bundle import espandi_archivi
+
+
+@dataclass
+class LavoroConfronto:
+    """Un confronto in coda: una worklist con i suoi file di confronto"""
+
+    worklist: Path
+    """Worklist da confrontare"""
+
+    files_confronto: List[Path]
+    """File di confronto (cataloghi, indici, storici, archivi)"""
+
+    modalita: str
+    """Modalità del confronto (config.MODE_*)"""
+
+    risultato: Optional[Dict[str, Any]] = None
+    """Dict di process_batch_isbn per la worklist (a lavoro eseguito)"""
+
+    errore: str = ''
+    """Messaggio d'errore se il lavoro non è riuscito"""
+
+    secondi_chiavi: float = 0.0
+    """Tempo per le chiavi dei file di confronto (lettura o cache)"""
+
+    secondi_totali: float = 0.0
+    """Durata totale del lavoro"""
+
+    file_da_cache: int = 0
+    """File di confronto le cui chiavi erano già in memoria"""
+
+
+class CodaConfronti:
+    """
+    Lavori eseguiti uno dopo l'altro, con le chiavi di confronto in cache.
+
+    Esempio:
+        >>> coda = CodaConfronti(processor, log)
+        >>> if coda.accoda([LavoroConfronto(Path("wl.xlsx"), [Path("catalogo.xlsx")], "MATCH")]):
+        ...     threading.Thread(target=coda.esegui, daemon=True).start()
+    """
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        log_callback: Callable[[str, str], None],
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        self.processor = processor
+        self.config = processor.config
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.cache = CacheChiavi(self.config.CODA_CACHE_MB * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._in_attesa: Deque[LavoroConfronto] = deque()
+        self._attiva = False
+        self._eseguiti = 0
+
+    @property
+    def in_attesa(self) -> int:
+        with self._lock:
+            return len(self._in_attesa)
+
+    @property
+    def attiva(self) -> bool:
+        with self._lock:
+            return self._attiva
+
+    def accoda(self, lavori: List[LavoroConfronto]) -> bool:
+        """
+        Aggiunge lavori alla coda.
+
+        Returns:
+            True se nessuno sta eseguendo la coda: il chiamante deve
+            avviare esegui (di solito in un thread)
+        """
+        with self._lock:
+            self._in_attesa.extend(lavori)
+            avvia = not self._attiva
+            self._attiva = True
+        return avvia
+
+    def esegui(
+        self,
+        al_termine: Optional[Callable[[LavoroConfronto], None]] = None
+    ) -> List[LavoroConfronto]:
+        """
+        Esegue i lavori in coda, compresi quelli aggiunti nel frattempo,
+        finché la coda è vuota.
+
+        Args:
+            al_termine: Chiamata dopo ogni lavoro (riuscito o no)
+
+        Returns:
+            Lavori eseguiti, nell'ordine
+        """
+        eseguiti = []
+        while True:
+            with self._lock:
+                if not self._in_attesa:
+                    self._attiva = False
+                    return eseguiti
+                lavoro = self._in_attesa.popleft()
+                self._eseguiti += 1
+                indice, in_attesa = self._eseguiti, len(self._in_attesa)
+
+            t = self.processor.t
+            self.log_callback((
+                t.queue_job_start if t else "🧾 Lavoro {index}: {file} ({pending} in attesa)"
+            ).format(index=indice, file=lavoro.worklist.name, pending=in_attesa), LOG_INFO)
+            self._esegui_lavoro(lavoro)
+            eseguiti.append(lavoro)
+            if al_termine:
+                al_termine(lavoro)
+
+    def _esegui_lavoro(self, lavoro: LavoroConfronto) -> None:
+        inizio = time.perf_counter()
+        files_confronto = lavoro.files_confronto
+        try:
+            files_confronto = espandi_archivi(lavoro.files_confronto, self.config.SUFFISSI_EXCEL)
+            if lavoro.modalita == self.config.MODE_INVERSO:
+                # I file di confronto vengono letti a blocchi: nessuna chiave in cache
+                lavoro.risultato = self.processor.process_inverso_isbn(
+                    [lavoro.worklist] + files_confronto, self.log_callback, self.progress_callback
+                )
+            else:
+                chiavi, lavoro.file_da_cache = self._chiavi_confronto(files_confronto)
+                lavoro.secondi_chiavi = time.perf_counter() - inizio
+                risultato = self.processor.process_batch_isbn(
+                    [lavoro.worklist], files_confronto, self.log_callback, self.progress_callback,
+                    modalita=lavoro.modalita,
+                    confronto=chiavi
+                )[0]
+                if 'errore' in risultato:
+                    lavoro.errore = risultato['errore']
+                else:
+                    lavoro.risultato = risultato
+        except MemoryError:
+            # Chiavi in cache rilasciate prima di segnalare l'errore
+            self.cache = CacheChiavi(self.cache.limite_byte)
+            lavoro.errore = "MemoryError"
+            self.log_callback(f"{lavoro.worklist.name}: {lavoro.errore}", LOG_ERROR)
+        except Exception as e:
+            lavoro.errore = str(e)
+            self.log_callback(f"{lavoro.worklist.name}: {e}", LOG_ERROR)
+        lavoro.secondi_totali = time.perf_counter() - inizio
+
+        t = self.processor.t
+        self.log_callback((
+            t.queue_job_time if t
+            else "⏱️ {file}: {seconds:.1f} s (chiavi di confronto: {keys:.1f} s, {cached} di {files} file dalla cache)"
+        ).format(
+            file=lavoro.worklist.name, seconds=lavoro.secondi_totali, keys=lavoro.secondi_chiavi,
+            cached=lavoro.file_da_cache, files=len(files_confronto)
+        ), LOG_WARNING if lavoro.errore else LOG_SUCCESS)
+
+    def _chiavi_confronto(self, files: List[Path]) -> Tuple[np.ndarray, int]:
+        """
+        Chiavi di tutti i file di confronto (vedi CacheChiavi.chiavi_confronto).
+
+        Returns:
+            Tupla (chiavi uint64 ordinate e uniche, file trovati in cache)
+        """
+        chiavi, da_cache = self.cache.chiavi_confronto(self.processor, files, self.log_callback)
+
+        t = self.processor.t
+        self.log_callback((
+            t.queue_cache if t
+            else "🗃️ File di confronto: {cached} dalla cache, {read} letti ({size} MB in cache)"
+        ).format(
+            cached=da_cache, read=len(files) - da_cache,
+            size=self.cache.occupazione // (1024 * 1024)
+        ), LOG_INFO)
+        return chiavi, da_cache
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Cache delle chiavi dei file di confronto
+
+Chiavi (uint64 ordinate e uniche) per file, valide finché non cambiano
+l'impronta rapida del file (reconcile_state.impronta_rapida) e le
+impostazioni con cui vengono lette (reconcile_state.impostazioni_chiavi):
+si leggono solo i file nuovi, cambiati o usciti dalla cache.
+
+In memoria vale un limite di byte: oltre il limite escono i file usati
+meno di recente. Con una cartella le chiavi vengono salvate anche su
+disco (un .npz per file) e restano valide tra un avvio e l'altro.
+
+Usata dalla coda dei confronti della GUI (job_queue, solo memoria) e
+dalle cartelle osservate (watch_folder, memoria e disco).
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from reconcile_state import impostazioni_chiavi, impronta_rapida
+
+
+class CacheChiavi:
+    """
+    Chiavi dei file di confronto per file, con limite di memoria e
+    (facoltativa) copia su disco.
+
+    Esempio:
+        >>> cache = CacheChiavi(512 * 1024 * 1024)
+        >>> chiavi, da_cache = cache.chiavi_confronto(processor, [Path("catalogo.xlsx")], log)
+    """
+
+    def __init__(self, limite_byte: int, cartella: Optional[Path] = None):
+        self.limite_byte = limite_byte
+        self.cartella = Path(cartella) if cartella is not None else None
+        self._voci: 'OrderedDict[Path, Tuple[Dict[str, Any], np.ndarray]]' = OrderedDict()
+        self.occupazione = 0
+
+    def __len__(self) -> int:
+        return len(self._voci)
+
+    def chiavi_confronto(
+        self,
+        processor: Any,
+        files: List[Path],
+        log_callback: Callable[[str, str], None]
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Chiavi di tutti i file di confronto: dalla cache o lette (con
+        DataProcessor.chiavi_per_file) se nuove, cambiate o uscite dalla cache.
+
+        Returns:
+            Tupla (chiavi uint64 ordinate e uniche, file trovati in cache)
+        """
+        impostazioni = impostazioni_chiavi(processor.config)
+        impronte = {f: {**impronta_rapida(f), 'impostazioni': impostazioni} for f in files}
+        per_file: Dict[Path, np.ndarray] = {}
+        da_leggere = []
+        for file, impronta in impronte.items():
+            chiavi = self.cerca(file, impronta)
+            if chiavi is None:
+                da_leggere.append(file)
+            else:
+                per_file[file] = chiavi
+
+        if da_leggere:
+            for file, chiavi in processor.chiavi_per_file(da_leggere, log_callback):
+                per_file[file] = chiavi
+                self.aggiungi(file, impronte[file], chiavi)
+
+        blocchi = [np.empty(0, dtype=np.uint64)] + [per_file[f] for f in files]
+        return np.unique(np.concatenate(blocchi)), len(files) - len(da_leggere)
+
+    def cerca(self, file: Path, impronta: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Chiavi del file se in cache e non cambiato (il file diventa il più recente)"""
+        voce = self._voci.get(file)
+        if voce is not None and voce[0] == impronta:
+            self._voci.move_to_end(file)
+            return voce[1]
+        if self.cartella is None:
+            return None
+        chiavi = self._carica(file, impronta)
+        if chiavi is not None:
+            self._memorizza(file, impronta, chiavi)
+        return chiavi
+
+    def aggiungi(self, file: Path, impronta: Dict[str, Any], chiavi: np.ndarray) -> None:
+        """Aggiunge (o sostituisce) le chiavi di un file; più grandi del limite: solo su disco"""
+        self._memorizza(file, impronta, chiavi)
+        if self.cartella is not None:
+            self._salva(file, impronta, chiavi)
+
+    def rimuovi(self, file: Path) -> None:
+        voce = self._voci.pop(file, None)
+        if voce is not None:
+            self.occupazione -= voce[1].nbytes
+
+    def svuota_memoria(self) -> None:
+        """Rilascia le chiavi in memoria (quelle su disco restano)"""
+        self._voci.clear()
+        self.occupazione = 0
+
+    def mantieni(self, files: List[Path]) -> None:
+        """Toglie dalla cache (memoria e disco) i file non più tra quelli indicati"""
+        for file in [f for f in self._voci if f not in files]:
+            self.rimuovi(file)
+        if self.cartella is None or not self.cartella.is_dir():
+            return
+        nomi = {self._file_cache(f).name for f in files}
+        for salvato in self.cartella.glob('*.npz'):
+            if salvato.name not in nomi:
+                salvato.unlink(missing_ok=True)
+
+    def _memorizza(self, file: Path, impronta: Dict[str, Any], chiavi: np.ndarray) -> None:
+        self.rimuovi(file)
+        if chiavi.nbytes > self.limite_byte:
+            return
+        self._voci[file] = (impronta, chiavi)
+        self.occupazione += chiavi.nbytes
+        while self.occupazione > self.limite_byte:
+            _, (_, uscite) = self._voci.popitem(last=False)
+            self.occupazione -= uscite.nbytes
+
+    def _file_cache(self, file: Path) -> Path:
+        nome = hashlib.sha1(str(Path(file).resolve()).encode('utf-8')).hexdigest()[:20]
+        return self.cartella / f"{nome}.npz"
+
+    def _carica(self, file: Path, impronta: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Chiavi salvate per il file, se l'impronta coincide (file danneggiato: eliminato)"""
+        percorso = self._file_cache(file)
+        try:
+            with np.load(percorso, allow_pickle=False) as dati:
+                if json.loads(dati['impronta'].tobytes().decode('utf-8')) != impronta:
+                    return None
+                return dati['chiavi']
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Troncato o danneggiato (BadZipFile, EOFError, ...): le chiavi
+            # vengono rilette e la cache riscritta
+            percorso.unlink(missing_ok=True)
+            return None
+
+    def _salva(self, file: Path, impronta: Dict[str, Any], chiavi: np.ndarray) -> None:
+        self.cartella.mkdir(parents=True, exist_ok=True)
+        destinazione = self._file_cache(file)
+        temporaneo = destinazione.with_name(destinazione.name + '.tmp')
+        with open(temporaneo, 'wb') as f:
+            np.savez(
+                f,
+                chiavi=np.asarray(chiavi, dtype=np.uint64),
+                impronta=np.frombuffer(json.dumps(impronta).encode('utf-8'), dtype=np.uint8),
+            )
+        temporaneo.replace(destinazione)
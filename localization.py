@@ -23,6 +23,10 @@ class Translations:
     mode_match_desc: str
     mode_non_match: str
     mode_non_match_desc: str
+    mode_both: str
+    mode_both_desc: str
+    mode_reverse: str
+    mode_reverse_desc: str
     
     # File section
     files_loaded: str
@@ -34,10 +38,13 @@ class Translations:
     btn_move_up: str
     btn_move_down: str
     worklist_label: str
+    batch_worklists_label: str
     
     # Action buttons
     btn_process: str
     btn_open_output: str
+    btn_quick_lookup: str
+    btn_enqueue: str
     processing_label: str
     
     # Log section
@@ -67,6 +74,8 @@ class Translations:
     log_first_file_info: str
     log_mode_match: str
     log_mode_non_match: str
+    log_mode_both: str
+    log_mode_reverse: str
     log_files_added: str
     log_file_removed: str
     log_files_cleared: str
@@ -78,6 +87,10 @@ class Translations:
     # Processing messages
     proc_mode_match: str
     proc_mode_non_match: str
+    proc_mode_both: str
+    proc_mode_reverse: str
+    proc_reverse_reference: str
+    proc_reverse_file: str
     proc_start_comparison: str
     proc_worklist_file: str
     proc_worklist_rows: str
@@ -92,17 +105,99 @@ class Translations:
     proc_worklist_unique: str
     proc_duplicates_removed_label: str
     proc_results_found: str
+    proc_results_match: str
+    proc_results_non_match: str
+    proc_results_reverse: str
     proc_saving_format: str
     proc_format_complete: str
     proc_formatting_sheet: str
+    proc_duplicates_report: str
+    proc_output_streaming: str
+    proc_output_split_sheets: str
+    proc_output_split_files: str
+    proc_output_group_missing: str
+    proc_multi_value_extracted: str
+    proc_isbn_column_by_content: str
+    proc_stream_reader_fallback: str
+    proc_index_opened: str
+    proc_index_built: str
+    proc_bloom_prefilter: str
+    proc_bloom_stale: str
+    proc_bloom_built: str
+    proc_plan: str
+    proc_plan_detail: str
+    plan_reason_in_memory: str
+    plan_reason_streaming: str
+    plan_reason_two_phase: str
+    plan_reason_out_of_core: str
+    plan_reason_forced: str
+    proc_identical_file_skipped: str
+    proc_segmented_read: str
+    proc_prefetch: str
+    proc_pipeline: str
+    proc_pipeline_ready: str
+    proc_pipeline_waiting: str
+    proc_archive_members: str
+    proc_incremental_state: str
+    proc_incremental: str
+    proc_incremental_invalid: str
+    proc_incremental_sources_changed: str
+    proc_incremental_settings_changed: str
+    proc_service: str
+    proc_service_result: str
+    proc_service_unavailable: str
+    proc_service_incompatible: str
+    service_loaded: str
+    service_listening: str
+    proc_batch_start: str
+    proc_batch_worklist: str
+    proc_batch_done: str
+    watch_started: str
+    watch_locked: str
+    watch_job: str
+    watch_job_done: str
+    watch_cache: str
+    queue_added: str
+    queue_job_start: str
+    queue_cache: str
+    queue_job_time: str
+    proc_store_opened: str
+    proc_store_period: str
+    proc_store_skipped: str
+    proc_store_loaded: str
+    proc_store_summary: str
+    lookup_title: str
+    lookup_hint: str
+    lookup_search: str
+    lookup_col_isbn: str
+    lookup_col_result: str
+    lookup_col_source: str
+    lookup_found: str
+    lookup_not_found: str
+    lookup_invalid: str
+    lookup_summary: str
+    lookup_no_sources: str
+    inspect_file: str
+    inspect_index: str
+    inspect_sheet: str
+    inspect_estimated: str
+    inspect_isbn_column: str
+    inspect_isbn_by_content: str
+    inspect_no_isbn: str
+    inspect_identical: str
+    inspect_list_summary: str
+    inspect_list_identical: str
+    proc_out_of_core_retry: str
+    proc_out_of_core_runs: str
     
     # Error messages
     error_title: str
     error_occurred: str
     error_min_files: str
+    error_batch_files: str
     error_no_isbn_worklist: str
-    error_no_isbn_column: str
     error_no_matches: str
+    error_reverse_none: str
     error_all_matched: str
     error_open_file: str
     error_file_open_excel: str
@@ -113,11 +208,17 @@ class Translations:
     # Success messages
     success_title_match: str
     success_title_non_match: str
+    success_title_both: str
+    success_title_reverse: str
     success_file_saved: str
     success_worklist_isbn: str
     success_duplicates_removed: str
     success_results: str
     success_files_processed: str
+    success_title_batch: str
+    success_batch_line: str
+    success_title_queue: str
+    success_queue_line: str
     
     # Warning messages
     warning_title: str
@@ -144,6 +245,10 @@ IT = Translations(
     mode_match_desc="ISBN presenti negli altri file",
     mode_non_match="❌ Trova NON CORRISPONDENZE",
     mode_non_match_desc="ISBN non presenti negli altri file",
+    mode_both="🔀 Trova ENTRAMBI",
+    mode_both_desc="Corrispondenze e non corrispondenze in un solo confronto",
+    mode_reverse="↩️ Trova ASSENTI dalla worklist",
+    mode_reverse_desc="ISBN dei file di confronto che non sono nella worklist",
     
     # File section
     files_loaded="📁 File Caricati",
@@ -155,10 +260,13 @@ IT = Translations(
     btn_move_up="⬆️ Su",
     btn_move_down="⬇️ Giù",
     worklist_label="[WORKLIST]",
+    batch_worklists_label="Worklist in testa all'elenco:",
     
     # Action buttons
     btn_process="⚡ ELABORA FILE",
     btn_open_output="📂 APRI OUTPUT",
+    btn_quick_lookup="🔎 Ricerca rapida",
+    btn_enqueue="➕ Accoda",
     processing_label="Elaborazione",
     
     # Log section
@@ -207,7 +315,11 @@ IT = Translations(
     help_isbn_columns_content="""L'app riconosce automaticamente colonne con nomi come:
 • ISBN, Codice ISBN, Cod. ISBN
 • EAN, Codice EAN
-• Codice, Barcode""",
+• Codice, Barcode
+
+Se l'intestazione non è riconosciuta, la colonna viene individuata
+dal contenuto (ISBN con cifra di controllo valida nelle prime righe),
+anche se sopra l'intestazione ci sono righe di titolo.""",
     
     help_troubleshooting="❌ RISOLUZIONE PROBLEMI",
     help_troubleshooting_content="""• Se il file non si apre: chiudi Excel e riprova
@@ -221,6 +333,8 @@ IT = Translations(
     log_first_file_info="💡 Il PRIMO file caricato sarà la worklist di riferimento",
     log_mode_match="🔍 Modalità: TROVA CORRISPONDENZE",
     log_mode_non_match="🔍 Modalità: TROVA NON CORRISPONDENZE",
+    log_mode_both="🔍 Modalità: CORRISPONDENZE E NON CORRISPONDENZE",
+    log_mode_reverse="🔍 Modalità: ISBN DEI FILE DI CONFRONTO ASSENTI DALLA WORKLIST",
     log_files_added="file aggiunti",
     log_file_removed="Rimosso",
     log_files_cleared="Lista file svuotata",
@@ -232,6 +346,10 @@ IT = Translations(
     # Processing messages
     proc_mode_match="🔍 Modalità: TROVA CORRISPONDENZE",
     proc_mode_non_match="🔍 Modalità: TROVA NON CORRISPONDENZE",
+    proc_mode_both="🔍 Modalità: CORRISPONDENZE E NON CORRISPONDENZE",
+    proc_mode_reverse="🔍 Modalità: ISBN DEI FILE DI CONFRONTO ASSENTI DALLA WORKLIST",
+    proc_reverse_reference="↩️ Chiavi worklist: {count} ISBN unici, cercati nei file di confronto",
+    proc_reverse_file="  ↩️ {file}: {rows} righe con ISBN assenti dalla worklist",
     proc_start_comparison="Inizio confronto ISBN",
     proc_worklist_file="File Worklist",
     proc_worklist_rows="righe totali",
@@ -246,17 +364,99 @@ IT = Translations(
     proc_worklist_unique="• ISBN worklist (unici)",
     proc_duplicates_removed_label="• Duplicati rimossi",
     proc_results_found="trovati",
+    proc_results_match="Corrispondenze",
+    proc_results_non_match="Non corrispondenze",
+    proc_results_reverse="Righe con ISBN assenti dalla worklist",
     proc_saving_format="Salvataggio formattazione...",
     proc_format_complete="✅ Formattazione completata",
     proc_formatting_sheet="Formattazione foglio",
+    proc_duplicates_report="📑 Report duplicati: {count} ISBN nel foglio '{sheet}'",
+    proc_output_streaming="📝 Scrittura e formattazione in streaming di {rows} righe",
+    proc_output_split_sheets="📑 Output diviso in {parts} fogli",
+    proc_output_split_files="📑 Output diviso in {parts} file",
+    proc_output_group_missing="⚠️ Colonna '{column}' non presente nei risultati: output non diviso per gruppo",
+    proc_multi_value_extracted="🔀 Estratti {count} ISBN aggiuntivi da celle multi-valore",
+    proc_isbn_column_by_content="🔎 {file} [{sheet}]: colonna ISBN riconosciuta dal contenuto (colonna {column})",
+    proc_stream_reader_fallback="  {file}: lettura veloce non possibile ({reason}), uso lettore standard",
+    proc_index_opened="📇 Indice {file}: {count} ISBN da {sources} fogli (creato {created})",
+    proc_index_built="📇 Indice creato: {file} ({count} ISBN unici da {rows} righe)",
+    proc_bloom_prefilter="🧮 Prefiltro Bloom: {candidates}/{total} candidati da confermare",
+    proc_bloom_stale="⚠️ {file}: filtro non corrispondente all'indice, ignorato",
+    proc_bloom_built="🧮 Filtro Bloom creato: {file} ({size} KB, {hashes} hash, falsi positivi {fp:.2%})",
+    proc_plan="🧭 Strategia {strategy}: {reason}",
+    proc_plan_detail="   Stima worklist {worklist} MB, chiavi {keys} MB, lettura confronto {compare} MB (budget {budget} MB) - {workers} processi di lettura su {cpus} CPU",
+    plan_reason_in_memory="tutti i dati entrano nel budget di memoria",
+    plan_reason_streaming="worklist in memoria, file di confronto letti un foglio alla volta solo nella colonna ISBN",
+    plan_reason_two_phase="la worklist completa non entra in memoria: prima le chiavi, poi le sole righe selezionate",
+    plan_reason_out_of_core="le chiavi non entrano in memoria: ordinamento a blocchi su disco",
+    plan_reason_forced="strategia impostata dal chiamante",
+    proc_identical_file_skipped="⏭️ {file}: identico a {original}, ignorato",
+    proc_segmented_read="✂️ {file}: {rows} righe lette in {segments} intervalli paralleli",
+    proc_prefetch="📥 Lettura anticipata di {count} file (fino a {budget} MB in memoria)",
+    proc_pipeline="🔀 Chiavi dei file di confronto estratte durante il caricamento della worklist ({workers} processi)",
+    proc_pipeline_ready="📥 {file}: chiavi pronte ({done}/{total})",
+    proc_pipeline_waiting="⏳ Worklist pronta, in attesa di {count} file di confronto",
+    proc_archive_members="🗜️ {archive}: {count} file Excel letti dall'archivio",
+    proc_incremental_state="🔁 Confronto incrementale, stato: {file}",
+    proc_incremental="🔁 Incrementale: {checked} chiavi nuove o modificate verificate, {kept} dallo stato precedente, {removed} non più in worklist",
+    proc_incremental_invalid="⚠️ Stato precedente non utilizzabile ({reason}): confronto completo",
+    proc_incremental_sources_changed="🔁 File di confronto cambiati dall'ultima riconciliazione: rilettura completa",
+    proc_incremental_settings_changed="🔁 Impostazioni di lettura delle chiavi cambiate dall'ultima riconciliazione: rilettura completa",
+    proc_service="🛰️ Confronto tramite il servizio {address} (chiavi caricate il {loaded})",
+    proc_service_result="🛰️ Servizio: {found} di {count} chiavi trovate in {seconds:.2f} s",
+    proc_service_unavailable="⚠️ Servizio non disponibile ({reason}): confronto locale",
+    proc_service_incompatible="⚠️ Il servizio ha caricato file di confronto diversi o con altre impostazioni: confronto locale",
+    service_loaded="🛰️ Servizio: {count} chiavi caricate da {files} file",
+    service_listening="🛰️ Servizio in ascolto su {address} (Ctrl+C per terminare)",
+    proc_batch_start="📦 Batch: {worklists} worklist confrontate con {files} file di confronto letti una volta",
+    proc_batch_worklist="📦 Worklist {index}/{count}: {file}",
+    proc_batch_done="📦 Batch completato: {ok} di {count} worklist in {seconds:.1f} s",
+    watch_started="👀 Osservo {worklists} e {comparison}; output in {output} (Ctrl+C per terminare)",
+    watch_locked="Un altro osservatore usa già {folder} (se non è attivo elimina {lock})",
+    watch_job="👀 {worklists} worklist da confrontare ({time})",
+    watch_job_done="👀 Lavoro completato: {ok} di {count} output in {folder}",
+    watch_cache="🗃️ File di confronto: {cached} dalla cache, {read} da leggere",
+    queue_added="🧾 {count} lavori aggiunti alla coda ({pending} in attesa)",
+    queue_job_start="🧾 Lavoro {index}: {file} ({pending} in attesa)",
+    queue_cache="🗃️ File di confronto: {cached} dalla cache, {read} letti ({size} MB in cache)",
+    queue_job_time="⏱️ {file}: {seconds:.1f} s (chiavi di confronto: {keys:.1f} s, {cached} di {files} file dalla cache)",
+    proc_store_opened="🗄️ Storico {file}: {count} ISBN da {exports} export ({first} – {last})",
+    proc_store_period="🗄️ Solo gli export dal {first} al {last}",
+    proc_store_skipped="🗄️ {file}: già nello storico",
+    proc_store_loaded="🗄️ {file}: {count} ISBN aggiunti (export del {date})",
+    proc_store_summary="🗄️ Storico {file}: {count} ISBN unici da {exports} export ({first} – {last})",
+    lookup_title="🔎 Ricerca rapida ISBN",
+    lookup_hint="Incolla gli ISBN (separati da a capo, virgole, punti e virgola o spazi) e premi Cerca (Ctrl+Invio). La ricerca usa gli indici (.isbnidx) e gli storici (.isbndb) dell'elenco file: nessun workbook viene letto.",
+    lookup_search="Cerca",
+    lookup_col_isbn="ISBN",
+    lookup_col_result="Esito",
+    lookup_col_source="Presente in",
+    lookup_found="✅ Trovato",
+    lookup_not_found="❌ Non trovato",
+    lookup_invalid="⚠️ Non valido",
+    lookup_summary="{found} di {count} ISBN trovati in {ms:.1f} ms",
+    lookup_no_sources="Nessun indice (.isbnidx) o storico (.isbndb) nell'elenco file: crea un indice dai cataloghi per le ricerche rapide",
+    inspect_file="📄 {file}: {sheets} fogli, {rows} righe, lettura ~{cost} MB",
+    inspect_index="📇 {file}: indice con {rows} ISBN",
+    inspect_sheet="   [{sheet}] {rows} righe × {columns} colonne{estimated} - {isbn}",
+    inspect_estimated=" (stima)",
+    inspect_isbn_column="ISBN in colonna {column}, intestazione alla riga {header}",
+    inspect_isbn_by_content="ISBN in colonna {column} (dal contenuto)",
+    inspect_no_isbn="nessuna colonna ISBN",
+    inspect_identical="   ⏭️ Identico a {original}: verrà letto una volta sola",
+    inspect_list_summary="{rows} righe · ISBN in {isbn}/{sheets} fogli · ~{cost} MB",
+    inspect_list_identical="identico a {original}",
+    proc_out_of_core_retry="💽 Memoria insufficiente: ripeto l'elaborazione su disco",
+    proc_out_of_core_runs="💽 {count} chiavi ordinate in {runs} blocchi su disco",
     
     # Error messages
     error_title="Errore",
     error_occurred="❌ Si è verificato un errore:\n\n",
     error_min_files="Servono almeno 2 file per il confronto",
+    error_batch_files="Servono almeno una worklist e un file di confronto",
     error_no_isbn_worklist="Nessuna colonna ISBN trovata nel file worklist",
-    error_no_isbn_column="Colonna ISBN non trovata nella worklist",
     error_no_matches="Nessun match trovato tra la worklist e gli altri file",
+    error_reverse_none="Tutti gli ISBN dei file di confronto sono presenti nella worklist",
     error_all_matched="Tutti gli ISBN della worklist hanno match negli altri file",
     error_open_file="Impossibile aprire il file",
     error_file_open_excel="Il file '{filename}' è aperto in Excel.\nChiudilo e riprova l'operazione.",
@@ -267,11 +467,17 @@ IT = Translations(
     # Success messages
     success_title_match="✅ Corrispondenze trovate",
     success_title_non_match="❌ Non corrispondenze trovate",
+    success_title_both="🔀 Corrispondenze e non corrispondenze",
+    success_title_reverse="↩️ ISBN assenti dalla worklist",
     success_file_saved="📁 File salvato",
     success_worklist_isbn="📚 ISBN unici worklist",
     success_duplicates_removed="🗑️ Duplicati rimossi",
     success_results="Risultati",
     success_files_processed="📊 File elaborati",
+    success_title_batch="📦 Batch completato",
+    success_batch_line="{file}: {results} risultati",
+    success_title_queue="🧾 Coda completata",
+    success_queue_line="{file}: {results} risultati in {seconds:.1f} s",
     
     # Warning messages
     warning_title="Attenzione",
@@ -305,6 +511,10 @@ EN = Translations(
     mode_match_desc="ISBNs present in other files",
     mode_non_match="❌ Find NON-MATCHES",
     mode_non_match_desc="ISBNs not present in other files",
+    mode_both="🔀 Find BOTH",
+    mode_both_desc="Matches and non-matches from a single comparison",
+    mode_reverse="↩️ Find MISSING from worklist",
+    mode_reverse_desc="ISBNs in the comparison files that are not in the worklist",
     
     # File section
     files_loaded="📁 Loaded Files",
@@ -316,10 +526,13 @@ EN = Translations(
     btn_move_up="⬆️ Up",
     btn_move_down="⬇️ Down",
     worklist_label="[WORKLIST]",
+    batch_worklists_label="Worklists at the top of the list:",
     
     # Action buttons
     btn_process="⚡ PROCESS FILES",
     btn_open_output="📂 OPEN OUTPUT",
+    btn_quick_lookup="🔎 Quick lookup",
+    btn_enqueue="➕ Add to queue",
     processing_label="Processing",
     
     # Log section
@@ -368,7 +581,11 @@ EN = Translations(
     help_isbn_columns_content="""The app automatically recognizes columns with names like:
 • ISBN, ISBN Code, ISBN Cod.
 • EAN, EAN Code
-• Code, Barcode""",
+• Code, Barcode
+
+If no header is recognized, the column is detected from its content
+(ISBNs with a valid check digit in the first rows), even when title
+rows sit above the header.""",
     
     help_troubleshooting="❌ TROUBLESHOOTING",
     help_troubleshooting_content="""• If the file won't open: close Excel and try again
@@ -382,6 +599,8 @@ EN = Translations(
     log_first_file_info="💡 The FIRST file loaded will be the reference worklist",
     log_mode_match="🔍 Mode: FIND MATCHES",
     log_mode_non_match="🔍 Mode: FIND NON-MATCHES",
+    log_mode_both="🔍 Mode: MATCHES AND NON-MATCHES",
+    log_mode_reverse="🔍 Mode: COMPARISON-FILE ISBNS MISSING FROM THE WORKLIST",
     log_files_added="files added",
     log_file_removed="Removed",
     log_files_cleared="File list cleared",
@@ -393,11 +612,15 @@ EN = Translations(
     # Processing messages
     proc_mode_match="🔍 Mode: FIND MATCHES",
     proc_mode_non_match="🔍 Mode: FIND NON-MATCHES",
+    proc_mode_both="🔍 Mode: MATCHES AND NON-MATCHES",
+    proc_mode_reverse="🔍 Mode: COMPARISON-FILE ISBNS MISSING FROM THE WORKLIST",
+    proc_reverse_reference="↩️ Worklist keys: {count} unique ISBNs, looked up in the comparison files",
+    proc_reverse_file="  ↩️ {file}: {rows} rows with ISBNs missing from the worklist",
     proc_start_comparison="Starting ISBN comparison",
     proc_worklist_file="Worklist File",
     proc_worklist_rows="total rows",
     proc_duplicates_detected="⚠️ Worklist",
-    proc_duplicates_removed="Detected {duplicates} duplicates (will be removed)",
+    proc_duplicates_removed="Detected {duplicati} duplicates (will be removed)",
     proc_unique_isbn="✅ Unique ISBNs in worklist",
     proc_reference_set="📦 Reference set created",
     proc_searching_in="Searching in",
@@ -407,17 +630,99 @@ EN = Translations(
     proc_worklist_unique="• Worklist ISBN (unique)",
     proc_duplicates_removed_label="• Duplicates removed",
     proc_results_found="found",
+    proc_results_match="Matches",
+    proc_results_non_match="Non-matches",
+    proc_results_reverse="Rows with ISBNs missing from the worklist",
     proc_saving_format="Saving formatting...",
     proc_format_complete="✅ Formatting completed",
     proc_formatting_sheet="Formatting sheet",
+    proc_duplicates_report="📑 Duplicates report: {count} ISBNs in sheet '{sheet}'",
+    proc_output_streaming="📝 Streaming write and formatting of {rows} rows",
+    proc_output_split_sheets="📑 Output split into {parts} sheets",
+    proc_output_split_files="📑 Output split into {parts} files",
+    proc_output_group_missing="⚠️ Column '{column}' not found in the results: output not split by group",
+    proc_multi_value_extracted="🔀 Extracted {count} additional ISBNs from multi-value cells",
+    proc_isbn_column_by_content="🔎 {file} [{sheet}]: ISBN column detected from content (column {column})",
+    proc_stream_reader_fallback="  {file}: fast reader not available ({reason}), using standard reader",
+    proc_index_opened="📇 Index {file}: {count} ISBNs from {sources} sheets (built {created})",
+    proc_index_built="📇 Index built: {file} ({count} unique ISBNs from {rows} rows)",
+    proc_bloom_prefilter="🧮 Bloom prefilter: {candidates}/{total} candidates to confirm",
+    proc_bloom_stale="⚠️ {file}: filter does not match the index, ignored",
+    proc_bloom_built="🧮 Bloom filter built: {file} ({size} KB, {hashes} hashes, false positives {fp:.2%})",
+    proc_plan="🧭 Strategy {strategy}: {reason}",
+    proc_plan_detail="   Estimated worklist {worklist} MB, keys {keys} MB, comparison reading {compare} MB (budget {budget} MB) - {workers} reader processes on {cpus} CPUs",
+    plan_reason_in_memory="all data fits in the memory budget",
+    plan_reason_streaming="worklist in memory, comparison files read one sheet at a time, ISBN column only",
+    plan_reason_two_phase="the full worklist does not fit in memory: keys first, then only the selected rows",
+    plan_reason_out_of_core="the keys do not fit in memory: sorted in blocks on disk",
+    plan_reason_forced="strategy set by the caller",
+    proc_identical_file_skipped="⏭️ {file}: identical to {original}, skipped",
+    proc_segmented_read="✂️ {file}: {rows} rows read in {segments} parallel ranges",
+    proc_prefetch="📥 Reading {count} files ahead (up to {budget} MB in memory)",
+    proc_pipeline="🔀 Comparison file keys extracted while the worklist loads ({workers} processes)",
+    proc_pipeline_ready="📥 {file}: keys ready ({done}/{total})",
+    proc_pipeline_waiting="⏳ Worklist ready, waiting for {count} comparison files",
+    proc_archive_members="🗜️ {archive}: {count} Excel files read from the archive",
+    proc_incremental_state="🔁 Incremental comparison, state: {file}",
+    proc_incremental="🔁 Incremental: {checked} new or changed keys checked, {kept} from the previous state, {removed} no longer in the worklist",
+    proc_incremental_invalid="⚠️ Previous state not usable ({reason}): full comparison",
+    proc_incremental_sources_changed="🔁 Comparison files changed since the last reconciliation: full re-read",
+    proc_incremental_settings_changed="🔁 Key reading settings changed since the last reconciliation: full re-read",
+    proc_service="🛰️ Comparing through the service {address} (keys loaded on {loaded})",
+    proc_service_result="🛰️ Service: {found} of {count} keys found in {seconds:.2f} s",
+    proc_service_unavailable="⚠️ Service not available ({reason}): local comparison",
+    proc_service_incompatible="⚠️ The service loaded different comparison files or settings: local comparison",
+    service_loaded="🛰️ Service: {count} keys loaded from {files} files",
+    service_listening="🛰️ Service listening on {address} (Ctrl+C to stop)",
+    proc_batch_start="📦 Batch: {worklists} worklists compared with {files} comparison files read once",
+    proc_batch_worklist="📦 Worklist {index}/{count}: {file}",
+    proc_batch_done="📦 Batch completed: {ok} of {count} worklists in {seconds:.1f} s",
+    watch_started="👀 Watching {worklists} and {comparison}; output in {output} (Ctrl+C to stop)",
+    watch_locked="Another watcher is already using {folder} (if none is running, delete {lock})",
+    watch_job="👀 {worklists} worklists to compare ({time})",
+    watch_job_done="👀 Job completed: {ok} of {count} outputs in {folder}",
+    watch_cache="🗃️ Comparison files: {cached} from the cache, {read} to read",
+    queue_added="🧾 {count} jobs added to the queue ({pending} waiting)",
+    queue_job_start="🧾 Job {index}: {file} ({pending} waiting)",
+    queue_cache="🗃️ Comparison files: {cached} from the cache, {read} read ({size} MB cached)",
+    queue_job_time="⏱️ {file}: {seconds:.1f} s (comparison keys: {keys:.1f} s, {cached} of {files} files from the cache)",
+    proc_store_opened="🗄️ Store {file}: {count} ISBNs from {exports} exports ({first} – {last})",
+    proc_store_period="🗄️ Only exports from {first} to {last}",
+    proc_store_skipped="🗄️ {file}: already in the store",
+    proc_store_loaded="🗄️ {file}: {count} ISBNs added (export of {date})",
+    proc_store_summary="🗄️ Store {file}: {count} unique ISBNs from {exports} exports ({first} – {last})",
+    lookup_title="🔎 Quick ISBN lookup",
+    lookup_hint="Paste the ISBNs (separated by new lines, commas, semicolons or spaces) and press Search (Ctrl+Enter). The lookup uses the indexes (.isbnidx) and stores (.isbndb) in the file list: no workbook is read.",
+    lookup_search="Search",
+    lookup_col_isbn="ISBN",
+    lookup_col_result="Result",
+    lookup_col_source="Found in",
+    lookup_found="✅ Found",
+    lookup_not_found="❌ Not found",
+    lookup_invalid="⚠️ Invalid",
+    lookup_summary="{found} of {count} ISBNs found in {ms:.1f} ms",
+    lookup_no_sources="No index (.isbnidx) or store (.isbndb) in the file list: build an index from the catalogues for quick lookups",
+    inspect_file="📄 {file}: {sheets} sheets, {rows} rows, reading ~{cost} MB",
+    inspect_index="📇 {file}: index with {rows} ISBNs",
+    inspect_sheet="   [{sheet}] {rows} rows × {columns} columns{estimated} - {isbn}",
+    inspect_estimated=" (estimated)",
+    inspect_isbn_column="ISBN in column {column}, header on row {header}",
+    inspect_isbn_by_content="ISBN in column {column} (from content)",
+    inspect_no_isbn="no ISBN column",
+    inspect_identical="   ⏭️ Identical to {original}: it will be read only once",
+    inspect_list_summary="{rows} rows · ISBN in {isbn}/{sheets} sheets · ~{cost} MB",
+    inspect_list_identical="identical to {original}",
+    proc_out_of_core_retry="💽 Out of memory: retrying with on-disk processing",
+    proc_out_of_core_runs="💽 {count} keys sorted into {runs} runs on disk",
     
     # Error messages
     error_title="Error",
     error_occurred="❌ An error occurred:\n\n",
     error_min_files="At least 2 files are required for comparison",
+    error_batch_files="At least one worklist and one comparison file are required",
     error_no_isbn_worklist="No ISBN column found in worklist file",
-    error_no_isbn_column="ISBN column not found in worklist",
     error_no_matches="No matches found between worklist and other files",
+    error_reverse_none="Every ISBN in the comparison files is in the worklist",
     error_all_matched="All worklist ISBNs have matches in other files",
     error_open_file="Cannot open file",
     error_file_open_excel="The file '{filename}' is open in Excel.\nClose it and try again.",
@@ -428,11 +733,17 @@ EN = Translations(
     # Success messages
     success_title_match="✅ Matches found",
     success_title_non_match="❌ Non-matches found",
+    success_title_both="🔀 Matches and non-matches",
+    success_title_reverse="↩️ ISBNs missing from the worklist",
     success_file_saved="📁 File saved",
     success_worklist_isbn="📚 Unique worklist ISBNs",
     success_duplicates_removed="🗑️ Duplicates removed",
     success_results="Results",
     success_files_processed="📊 Files processed",
+    success_title_batch="📦 Batch completed",
+    success_batch_line="{file}: {results} results",
+    success_title_queue="🧾 Queue completed",
+    success_queue_line="{file}: {results} results in {seconds:.1f} s",
     
     # Warning messages
     warning_title="Warning",
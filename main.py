@@ -3,32 +3,39 @@
 ISBN Matcher - File di avvio dell'applicazione
 """
 import sys
-import tkinter as tk
-from tkinter import messagebox
-from gui import ISBNMatcherApp
+import multiprocessing
 from localization import get_translations
 
-# Tentativo di importare tkinterdnd2 con fallback
-try:
-    from tkinterdnd2 import TkinterDnD
-    DRAG_DROP_AVAILABLE = True
-except ImportError:
-    DRAG_DROP_AVAILABLE = False
-    print("⚠️ Attenzione: tkinterdnd2 non disponibile. Drag & Drop disabilitato.")
-
 def main():
     """Entry point dell'applicazione"""
+    # Con argomenti: modalità riga di comando (nessuna finestra, Tk non serve)
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    
+    import tkinter as tk
+    from tkinter import messagebox
+    from gui import ISBNMatcherApp
+    
+    # Tentativo di importare tkinterdnd2 con fallback
+    try:
+        from tkinterdnd2 import TkinterDnD
+        drag_drop_available = True
+    except ImportError:
+        drag_drop_available = False
+        print("⚠️ Attenzione: tkinterdnd2 non disponibile. Drag & Drop disabilitato.")
+    
     # Crea la finestra principale con o senza drag & drop
-    if DRAG_DROP_AVAILABLE:
+    if drag_drop_available:
         root = TkinterDnD.Tk()
     else:
         root = tk.Tk()
     
     try:
-        app = ISBNMatcherApp(root, drag_drop_enabled=DRAG_DROP_AVAILABLE)
+        app = ISBNMatcherApp(root, drag_drop_enabled=drag_drop_available)
         
         # Avvisa l'utente se manca il drag & drop
-        if not DRAG_DROP_AVAILABLE:
+        if not drag_drop_available:
             # Usa le traduzioni dalla lingua corrente dell'app
             t = get_translations(app.current_lang.get())
             root.after(1000, lambda: messagebox.showwarning(
@@ -45,4 +52,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Necessario per i processi di lettura paralleli negli eseguibili Windows
+    multiprocessing.freeze_support()
     main()
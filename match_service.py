@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Servizio di confronto locale con i cataloghi già in memoria
+
+Un processo di lunga durata carica una volta le chiavi dei file di
+confronto (cataloghi .xlsx o indici .isbnidx) e risponde alle richieste
+di GUI, CLI e script: il client invia le chiavi ISBN normalizzate della
+propria worklist e riceve quelle presenti. Le chiavi vengono ricaricate
+quando i file sorgente cambiano (controllo periodico e a ogni richiesta).
+
+Protocollo: una riga JSON per richiesta e una per risposta, su TCP
+("host:porta") o socket Unix ("unix:/percorso"):
+
+    {"comando": "stato"}
+        -> {"ok": true, "sorgenti": [{"file", "percorso", "dimensione", "modificato"}],
+            "impostazioni": {...}, "chiavi": n, "caricato": data}
+    {"comando": "confronta", "chiavi": ["9788804668237", ...]}
+        -> {"ok": true, "trovate": [posizioni delle chiavi presenti]}
+
+Il servizio non prevede autenticazione: per default ascolta solo su
+127.0.0.1; per renderlo raggiungibile da altri PC va indicato
+esplicitamente un indirizzo di rete.
+"""
+import json
+import socket
+import socketserver
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import numpy as np
+
+from data_processor import LOG_ERROR, LOG_INFO, LOG_SUCCESS, DataProcessor
+from reconcile_state import impostazioni_chiavi, impronta_rapida
+from shared_keys import posizioni_presenti
+from config import AppConfig
+from utils import codifica_chiavi_isbn
+
+
+INDIRIZZO_PREDEFINITO = "127.0.0.1:8765"
+PREFISSO_UNIX = "unix:"
+TIMEOUT_RISPOSTA = 300.0
+
+
+class ServizioNonDisponibile(Exception):
+    """Il servizio non risponde o non può soddisfare la richiesta"""
+
+
+def analizza_indirizzo(indirizzo: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """
+    Famiglia di socket e indirizzo da "host:porta" o "unix:/percorso".
+
+    Raises:
+        ValueError: indirizzo non valido o socket Unix non disponibili
+    """
+    if indirizzo.startswith(PREFISSO_UNIX):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Socket Unix non disponibili su questo sistema")
+        return socket.AF_UNIX, indirizzo[len(PREFISSO_UNIX):]
+    host, _, porta = indirizzo.rpartition(':')
+    if not host or not porta.isdigit():
+        raise ValueError(f"Indirizzo non valido: {indirizzo} (atteso host:porta o unix:/percorso)")
+    return socket.AF_INET, (host, int(porta))
+
+
+class ServizioConfronto:
+    """
+    Chiavi dei file di confronto in memoria, ricaricate quando cambiano.
+
+    Esempio:
+        >>> servizio = ServizioConfronto(processor, [Path("catalogo.xlsx")], log)
+        >>> servizio.confronta(np.array(["9788804668237"], dtype=object))
+        array([ True])
+    """
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        files: List[Path],
+        log_callback: Callable[[str, str], None]
+    ):
+        self.processor = processor
+        self.files = [Path(f) for f in files]
+        self.log_callback = log_callback
+        self._lock = threading.Lock()
+        self._ricarica = threading.Lock()
+        self._chiavi = np.empty(0, dtype=np.uint64)
+        self._impronte: List[Dict[str, Any]] = []
+        self._impostazioni: Dict[str, Any] = {}
+        self.caricato = ''
+        self.aggiorna(forza=True)
+
+    def aggiorna(self, forza: bool = False) -> bool:
+        """
+        Ricarica le chiavi se i file sorgente sono cambiati.
+
+        Le richieste in corso continuano a usare le chiavi precedenti fino
+        alla fine del caricamento; se un caricamento è già in corso (e non
+        si forza) non ne viene avviato un altro.
+
+        Returns:
+            True se le chiavi sono state ricaricate
+        """
+        if not self._ricarica.acquire(blocking=forza):
+            return False
+        try:
+            impronte = [impronta_rapida(f) for f in self.files]
+            if not forza and impronte == self._impronte:
+                return False
+
+            impostazioni = impostazioni_chiavi(self.processor.config)
+            chiavi = self.processor.chiavi_confronto(self.files, self.log_callback)
+
+            with self._lock:
+                self._chiavi = chiavi
+                self._impronte = impronte
+                self._impostazioni = impostazioni
+                self.caricato = datetime.now().isoformat(timespec='seconds')
+            t = self.processor.t
+            loaded_msg = (
+                t.service_loaded if t
+                else "🛰️ Servizio: {count} chiavi caricate da {files} file"
+            ).format(count=len(chiavi), files=len(self.files))
+            self.log_callback(loaded_msg, LOG_SUCCESS)
+            return True
+        finally:
+            self._ricarica.release()
+
+    def stato(self) -> Dict[str, Any]:
+        """
+        Sorgenti caricate (nome e impronta rapida), impostazioni con cui
+        sono state lette le chiavi, numero di chiavi e data di caricamento
+        """
+        with self._lock:
+            return {
+                'sorgenti': [{'file': Path(i['percorso']).name, **i} for i in self._impronte],
+                'impostazioni': self._impostazioni,
+                'chiavi': int(len(self._chiavi)),
+                'caricato': self.caricato,
+            }
+
+    def confronta(self, chiavi: np.ndarray) -> np.ndarray:
+        """Maschera delle chiavi ISBN normalizzate presenti nei file di confronto"""
+        with self._lock:
+            riferimento = self._chiavi
+        codici = codifica_chiavi_isbn(chiavi, self.processor.config.MAX_ISBN_LENGTH)
+        return posizioni_presenti(riferimento, codici)[0]
+
+    def controlla_periodicamente(self, intervallo: float, fine: threading.Event) -> None:
+        """Ciclo del thread di controllo: ricarica quando i sorgenti cambiano"""
+        while not fine.wait(intervallo):
+            try:
+                self.aggiorna()
+            except Exception as e:
+                self.log_callback(f"🛰️ {e}", LOG_ERROR)
+
+
+class _GestoreRichieste(socketserver.StreamRequestHandler):
+    """Una connessione: richieste JSON una per riga fino alla chiusura"""
+
+    def handle(self) -> None:
+        servizio: ServizioConfronto = self.server.servizio
+        for riga in self.rfile:
+            try:
+                richiesta = json.loads(riga)
+                comando = richiesta.get('comando')
+                if comando in ('stato', 'confronta'):
+                    # Sorgenti cambiati dall'ultimo controllo: prima si ricarica
+                    servizio.aggiorna()
+                if comando == 'stato':
+                    risposta = {'ok': True, **servizio.stato()}
+                elif comando == 'confronta':
+                    chiavi = np.asarray(richiesta.get('chiavi', []), dtype=object)
+                    trovate = np.flatnonzero(servizio.confronta(chiavi))
+                    risposta = {'ok': True, 'trovate': trovate.tolist()}
+                else:
+                    risposta = {'ok': False, 'errore': f"comando sconosciuto: {comando}"}
+            except Exception as e:
+                risposta = {'ok': False, 'errore': str(e)}
+            self.wfile.write(json.dumps(risposta).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _ServerTcp(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _ServerUnix(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def avvia_servizio(
+    servizio: ServizioConfronto,
+    indirizzo: str,
+    intervallo_controllo: float
+) -> None:
+    """
+    Risponde alle richieste fino a KeyboardInterrupt.
+
+    Args:
+        servizio: Chiavi caricate (vedi ServizioConfronto)
+        indirizzo: "host:porta" o "unix:/percorso"
+        intervallo_controllo: Secondi tra due controlli dei file sorgente
+    """
+    famiglia, indirizzo_socket = analizza_indirizzo(indirizzo)
+    if famiglia == socket.AF_INET:
+        server = _ServerTcp(indirizzo_socket, _GestoreRichieste)
+    else:
+        Path(indirizzo_socket).unlink(missing_ok=True)
+        server = _ServerUnix(indirizzo_socket, _GestoreRichieste)
+    server.servizio = servizio
+
+    fine = threading.Event()
+    threading.Thread(
+        target=servizio.controlla_periodicamente, args=(intervallo_controllo, fine), daemon=True
+    ).start()
+    t = servizio.processor.t
+    listening_msg = (
+        t.service_listening if t else "🛰️ Servizio in ascolto su {address} (Ctrl+C per terminare)"
+    ).format(address=indirizzo)
+    servizio.log_callback(listening_msg, LOG_INFO)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fine.set()
+        server.server_close()
+        if famiglia != socket.AF_INET:
+            Path(indirizzo_socket).unlink(missing_ok=True)
+
+
+class ClientServizio:
+    """
+    Client del servizio di confronto (una connessione per richiesta).
+
+    Esempio:
+        >>> client = ClientServizio("127.0.0.1:8765")
+        >>> client.confronta(np.array(["9788804668237"], dtype=object))
+        array([ True])
+    """
+
+    def __init__(self, indirizzo: str, timeout: float = 2.0):
+        self.indirizzo = indirizzo
+        self.timeout = timeout
+
+    def _richiesta(self, richiesta: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            famiglia, indirizzo_socket = analizza_indirizzo(self.indirizzo)
+            with socket.socket(famiglia, socket.SOCK_STREAM) as s:
+                s.settimeout(self.timeout)
+                s.connect(indirizzo_socket)
+                s.settimeout(TIMEOUT_RISPOSTA)
+                with s.makefile('rwb') as stream:
+                    stream.write(json.dumps(richiesta).encode('utf-8') + b'\n')
+                    stream.flush()
+                    riga = stream.readline()
+            risposta = json.loads(riga) if riga else None
+        except (OSError, ValueError) as e:
+            raise ServizioNonDisponibile(str(e))
+        if not risposta or not risposta.get('ok'):
+            raise ServizioNonDisponibile((risposta or {}).get('errore', 'nessuna risposta'))
+        return risposta
+
+    def stato(self) -> Dict[str, Any]:
+        """Sorgenti, numero di chiavi e data di caricamento del servizio"""
+        return self._richiesta({'comando': 'stato'})
+
+    def confronta(self, chiavi: np.ndarray) -> np.ndarray:
+        """Maschera delle chiavi ISBN normalizzate presenti nei cataloghi del servizio"""
+        risposta = self._richiesta({'comando': 'confronta', 'chiavi': [str(c) for c in chiavi]})
+        trovate = np.zeros(len(chiavi), dtype=bool)
+        trovate[np.asarray(risposta['trovate'], dtype=np.intp)] = True
+        return trovate
+
+    def compatibile(self, files: List[Path], config: AppConfig) -> bool:
+        """
+        True se il servizio ha caricato gli stessi file (percorso, dimensione
+        e data di modifica, vedi impronta_rapida) con le stesse impostazioni
+        di lettura delle chiavi (es. intervallo di date degli storici)
+        """
+        stato = self.stato()
+        sorgenti = {(s['percorso'], s['dimensione'], s['modificato']) for s in stato['sorgenti']}
+        richiesti = {(i['percorso'], i['dimensione'], i['modificato'])
+                     for i in map(impronta_rapida, files)}
+        return sorgenti == richiesti and stato.get('impostazioni') == impostazioni_chiavi(config)
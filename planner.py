@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+Pianificazione dell'esecuzione in base alla memoria disponibile
+
+Prima di leggere i dati stima la memoria necessaria dalle dimensioni dei
+file e dai record <dimension> dei fogli (nessuna cella viene letta), la
+confronta con il budget e sceglie la strategia:
+
+    IN_MEMORIA  worklist completa in memoria, lettori come da configurazione
+    STREAMING   worklist in memoria, file di confronto letti solo nella
+                colonna ISBN, un file alla volta
+    DUE_FASI    prima le sole chiavi worklist, poi le righe selezionate
+    SU_DISCO    chiavi ordinate su disco a blocchi (external_sort)
+
+e il numero di processi paralleli per la lettura dei file di confronto.
+
+Le stesse stime, con la colonna ISBN rilevata su un campione di righe,
+formano l'ispezione preliminare mostrata nella GUI e nella CLI.
+"""
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import AppConfig
+from external_sort import DTYPE_RUN
+from isbn_index import IndiceNonValido, leggi_intestazione
+from isbn_store import StoricoIsbn, StoricoNonValido
+from utils import (
+    ColonnaIsbn,
+    impronta_file,
+    individua_colonna_isbn,
+    memoria_disponibile,
+    rileva_colonna_isbn
+)
+from xlsx_stream import LettoreXlsx, XlsxNonSupportato
+from zip_bundle import dimensione_input, sorgente_input
+
+
+MB = 1024 * 1024
+
+
+@dataclass
+class StimaFoglio:
+    """Dimensioni di un foglio lette dai metadati (o stimate)"""
+
+    nome: str
+    righe: int
+    colonne: int
+    stimata: bool = False
+    """True se le dimensioni sono ricavate dalla dimensione del file"""
+
+    colonna_isbn: Optional[ColonnaIsbn] = None
+    """Colonna ISBN rilevata (solo con stima_file(..., rileva_isbn=True))"""
+
+    @property
+    def celle(self) -> int:
+        return self.righe * self.colonne
+
+
+@dataclass
+class StimaFile:
+    """Dimensioni di un file di input"""
+
+    path: Path
+    dimensione: int
+    fogli: List[StimaFoglio] = field(default_factory=list)
+    indice: bool = False
+    """True per gli indici ISBN precompilati (letti con memory-mapping)"""
+
+    ispezionata: bool = False
+    """True se per ogni foglio è stata cercata la colonna ISBN"""
+
+    @property
+    def righe(self) -> int:
+        return sum(f.righe for f in self.fogli)
+
+    @property
+    def celle(self) -> int:
+        return sum(f.celle for f in self.fogli)
+
+    @property
+    def streaming(self) -> bool:
+        """Il file può essere letto dal lettore .xlsx in streaming"""
+        return self.path.suffix.lower() == '.xlsx'
+
+
+@dataclass
+class PianoEsecuzione:
+    """Strategia scelta dal pianificatore e stime che l'hanno determinata"""
+
+    strategia: str
+    workers: int
+    streaming: bool
+    """Lettore in streaming per i .xlsx di confronto"""
+
+    elementi_run: int
+    """Chiavi per blocco ordinato (strategie DUE_FASI e SU_DISCO)"""
+
+    budget: int
+    memoria_worklist: int
+    memoria_chiavi: int
+    memoria_confronto: int
+    cpu: int
+    forzata: bool = False
+    """Strategia imposta dal chiamante invece che scelta dalle stime"""
+
+    costi: Dict[Path, int] = field(default_factory=dict)
+    """Memoria stimata per la lettura di ogni file di confronto (ordine di esecuzione)"""
+
+    segmenti: Dict[Path, int] = field(default_factory=dict)
+    """Intervalli di righe letti in parallelo per i fogli molto grandi (assente = 1)"""
+
+    sovrapposta: bool = False
+    """Chiavi dei file di confronto estratte in altri processi durante il caricamento della worklist"""
+
+    precaricamento: int = 0
+    """Byte disponibili per la lettura anticipata dei file di input (prefetch)"""
+
+
+def budget_memoria(config: AppConfig) -> int:
+    """Byte utilizzabili dal confronto (config.BUDGET_MEMORIA_MB o metà della memoria libera)"""
+    if config.BUDGET_MEMORIA_MB > 0:
+        return config.BUDGET_MEMORIA_MB * MB
+    disponibile = memoria_disponibile()
+    if disponibile is None:
+        return config.BUDGET_MEMORIA_DEFAULT_MB * MB
+    return disponibile // 2
+
+
+def stima_file(path: Path, config: AppConfig, rileva_isbn: bool = False) -> StimaFile:
+    """
+    Legge le dimensioni dei fogli dai metadati del file.
+
+    Per i .xlsx usa i record <dimension>; per gli altri formati (e quando
+    il record manca) le dimensioni vengono stimate dai byte del file.
+
+    Args:
+        path: File da stimare
+        config: Configurazione applicazione
+        rileva_isbn: Cerca anche la colonna ISBN di ogni foglio, leggendo
+            solo config.RIGHE_CAMPIONE_ISBN righe
+    """
+    path = Path(path)
+    stima = StimaFile(path=path, dimensione=dimensione_input(path), ispezionata=rileva_isbn)
+
+    if path.suffix.lower() == config.SUFFIX_INDICE:
+        stima.indice = True
+        try:
+            intestazione, _ = leggi_intestazione(path)
+            stima.fogli.append(StimaFoglio(path.name, intestazione['n_chiavi'], 1))
+        except IndiceNonValido:
+            pass
+        return stima
+
+    if path.suffix.lower() == config.SUFFIX_STORICO:
+        stima.indice = True
+        try:
+            with StoricoIsbn(path, crea=False) as storico:
+                stima.fogli.append(StimaFoglio(path.name, storico.riepilogo()['chiavi'], 1))
+        except StoricoNonValido:
+            pass
+        return stima
+
+    if stima.streaming:
+        try:
+            with LettoreXlsx(sorgente_input(path)) as lettore:
+                for nome in lettore.sheet_names:
+                    if nome.lower() == config.SHEET_PARAMETRI:
+                        continue
+                    dimensioni = lettore.dimensioni(nome)
+                    if dimensioni is not None:
+                        foglio = StimaFoglio(nome, *dimensioni)
+                    else:
+                        celle = lettore.dimensione_xml(nome) // config.BYTE_XML_PER_CELLA
+                        foglio = StimaFoglio(
+                            nome, max(1, celle // config.COLONNE_STIMATE),
+                            config.COLONNE_STIMATE, stimata=True
+                        )
+                    if rileva_isbn:
+                        campione = lettore.campione(nome, config.RIGHE_CAMPIONE_ISBN)
+                        foglio.colonna_isbn = rileva_colonna_isbn(campione, config)
+                    stima.fogli.append(foglio)
+            return stima
+        except XlsxNonSupportato:
+            stima.fogli = []
+
+    # Formati senza record di dimensione: stima dai byte del file
+    celle = int(stima.dimensione * config.FATTORE_ESPANSIONE_XLSX) // config.BYTE_PER_CELLA
+    righe = max(1, celle // config.COLONNE_STIMATE)
+    if not rileva_isbn:
+        stima.fogli.append(StimaFoglio(path.name, righe, config.COLONNE_STIMATE, stimata=True))
+        return stima
+
+    with pd.ExcelFile(sorgente_input(path)) as xls:
+        fogli = [n for n in xls.sheet_names if n.lower() != config.SHEET_PARAMETRI]
+        for nome in fogli:
+            stima.fogli.append(StimaFoglio(
+                nome, max(1, righe // len(fogli)), config.COLONNE_STIMATE, stimata=True,
+                colonna_isbn=individua_colonna_isbn(xls, nome, config)
+            ))
+    return stima
+
+
+def trova_file_identici(files: List[Path]) -> Dict[Path, Path]:
+    """
+    Individua i file con contenuto identico (stesso SHA-256).
+
+    L'impronta viene calcolata solo per i file con la stessa dimensione
+    di almeno un altro file.
+
+    Returns:
+        Dict copia -> primo file identico nell'elenco
+    """
+    per_dimensione: Dict[int, List[Path]] = {}
+    for file in files:
+        per_dimensione.setdefault(dimensione_input(file), []).append(file)
+
+    identici: Dict[Path, Path] = {}
+    for gruppo in per_dimensione.values():
+        if len(gruppo) < 2:
+            continue
+        visti: Dict[str, Path] = {}
+        for file in gruppo:
+            sha = impronta_file(file)['sha256']
+            if sha in visti:
+                identici[file] = visti[sha]
+            else:
+                visti[sha] = file
+    return identici
+
+
+def memoria_lettura(stima: StimaFile, streaming: bool, config: AppConfig) -> int:
+    """Memoria di picco stimata per leggere le chiavi di un file"""
+    if stima.indice:
+        return 0
+    if streaming and stima.streaming:
+        return stima.righe * config.BYTE_PER_CHIAVE
+    return stima.righe * config.BYTE_PER_CHIAVE + stima.celle * config.BYTE_PER_CELLA
+
+
+def memoria_run(elementi: int) -> int:
+    """
+    Memoria di picco per ordinare un run di elementi DTYPE_RUN
+    (external_sort.ScrittoreRun): blocchi accumulati e concatenati, indici
+    di np.lexsort e copia ordinata.
+    """
+    return elementi * (2 * DTYPE_RUN.itemsize + np.dtype(np.intp).itemsize)
+
+
+def pianifica(
+    stime: List[StimaFile],
+    config: AppConfig,
+    strategia: Optional[str] = None
+) -> PianoEsecuzione:
+    """
+    Sceglie strategia e numero di processi per un confronto.
+
+    Args:
+        stime: Stime dei file (il primo è la worklist), vedi stima_file
+        config: Configurazione applicazione
+        strategia: Impone una strategia (config.STRATEGIA_*), None = automatica
+
+    Returns:
+        PianoEsecuzione con strategia, processi e stime in byte
+    """
+    worklist, confronti = stime[0], stime[1:]
+    budget = budget_memoria(config)
+    cpu = os.cpu_count() or 1
+
+    memoria_worklist = worklist.celle * config.BYTE_PER_CELLA
+    memoria_chiavi = worklist.righe * config.BYTE_PER_CHIAVE
+    picchi = [memoria_lettura(s, config.LETTORE_XLSX_STREAMING, config) for s in confronti]
+    picchi_streaming = [memoria_lettura(s, True, config) for s in confronti]
+    confronto = max(picchi, default=0)
+    confronto_streaming = max(picchi_streaming, default=0)
+
+    # DUE_FASI ordina tutte le chiavi (worklist e confronto) in un solo blocco
+    elementi_totali = sum(s.righe for s in stime)
+    memoria_blocco_unico = memoria_run(elementi_totali + 1)
+
+    forzata = strategia is not None
+    if strategia is None:
+        if memoria_worklist + memoria_chiavi + confronto <= budget:
+            strategia = config.STRATEGIA_IN_MEMORIA
+        elif memoria_worklist + memoria_chiavi + confronto_streaming <= budget:
+            strategia = config.STRATEGIA_STREAMING
+        elif 2 * memoria_chiavi + memoria_blocco_unico + confronto_streaming <= budget:
+            strategia = config.STRATEGIA_DUE_FASI
+        else:
+            strategia = config.STRATEGIA_SU_DISCO
+
+    streaming = config.LETTORE_XLSX_STREAMING or strategia != config.STRATEGIA_IN_MEMORIA
+    elementi_run = max(1 << 16, budget // 4 // DTYPE_RUN.itemsize)
+    if strategia == config.STRATEGIA_IN_MEMORIA:
+        occupata = memoria_worklist + memoria_chiavi
+    elif strategia == config.STRATEGIA_STREAMING:
+        occupata = budget
+    elif (strategia == config.STRATEGIA_DUE_FASI
+            and 2 * memoria_chiavi + memoria_blocco_unico <= budget):
+        # Tutte le chiavi in un solo blocco ordinato: nessuna fusione su disco
+        elementi_run = max(elementi_run, elementi_totali + 1)
+        occupata = 2 * memoria_chiavi + memoria_blocco_unico
+    else:
+        # SU_DISCO (o DUE_FASI imposta oltre il budget): blocchi limitati e fusione
+        occupata = 2 * elementi_run * DTYPE_RUN.itemsize
+    if streaming:
+        picchi = picchi_streaming
+
+    # Fogli .xlsx molto grandi: la colonna ISBN viene letta a intervalli di
+    # righe da più processi (solo lettore in streaming)
+    segmenti: Dict[Path, int] = {}
+    if streaming and cpu > 1 and strategia == config.STRATEGIA_IN_MEMORIA:
+        for s in confronti:
+            righe = max((f.righe for f in s.fogli), default=0)
+            if not s.indice and s.streaming and righe >= 2 * config.RIGHE_PER_SEGMENTO:
+                segmenti[s.path] = min(cpu, -(-righe // config.RIGHE_PER_SEGMENTO))
+
+    # Processi di lettura: limitati da CPU, letture (file o intervalli) e memoria residua
+    da_leggere = [p // segmenti.get(s.path, 1)
+                  for s, p in zip(confronti, picchi) for _ in range(segmenti.get(s.path, 1))
+                  if not s.indice]
+    workers = 1
+    if (len(da_leggere) > 1 and strategia != config.STRATEGIA_STREAMING
+            and sum(s.dimensione for s in confronti) >= config.SOGLIA_PARALLELO_MB * MB):
+        limite = config.MAX_WORKERS or cpu
+        per_worker = max(max(da_leggere), 1)
+        workers = max(1, min(cpu, limite, len(da_leggere), (budget - occupata) // per_worker))
+    if workers < 2:
+        segmenti = {}
+
+    # Worklist grande: le chiavi dei file di confronto vengono estratte in altri
+    # processi mentre questo carica la worklist, e restano in memoria fino al confronto
+    sovrapposta = False
+    file_da_leggere = [p for s, p in zip(confronti, picchi) if not s.indice]
+    chiavi_confronto = sum(s.righe for s in confronti if not s.indice) * config.BYTE_PER_CHIAVE
+    if (strategia == config.STRATEGIA_IN_MEMORIA and cpu > 1 and file_da_leggere
+            and worklist.righe >= config.SOGLIA_SOVRAPPOSIZIONE_RIGHE):
+        per_worker = max(max(file_da_leggere), 1)
+        disponibile = budget - occupata - chiavi_confronto
+        if disponibile >= per_worker:
+            sovrapposta = True
+            segmenti = {}
+            occupata += chiavi_confronto
+            limite = config.MAX_WORKERS or cpu
+            workers = max(1, min(cpu - 1, limite, len(file_da_leggere), disponibile // per_worker))
+
+    # Lettura anticipata: solo con la memoria lasciata libera dalla lettura corrente
+    precaricamento = min(config.PRECARICAMENTO_MB * MB,
+                         budget - occupata - max(picchi, default=0) * workers)
+
+    return PianoEsecuzione(
+        strategia=strategia,
+        workers=int(workers),
+        streaming=streaming,
+        elementi_run=int(elementi_run),
+        budget=budget,
+        memoria_worklist=memoria_worklist,
+        memoria_chiavi=memoria_chiavi,
+        memoria_confronto=max(picchi, default=0),
+        cpu=cpu,
+        forzata=forzata,
+        costi={s.path: p for s, p in zip(confronti, picchi)},
+        segmenti=segmenti,
+        sovrapposta=sovrapposta,
+        precaricamento=max(0, int(precaricamento)),
+    )
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Ricerca rapida di pochi ISBN incollati (senza creare una worklist)
+
+Il testo incollato (es. da un'email) viene diviso con config.ISBN_SPLIT_RE
+e normalizzato; ogni ISBN viene cercato negli indici (.isbnidx, mappati in
+memoria) e negli storici (.isbndb) indicati, con file e foglio in cui
+compare. Nessun workbook viene letto: indici e storici restano aperti tra
+una ricerca e l'altra, quindi la risposta è una ricerca binaria o una
+query sull'indice.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from config import AppConfig
+from isbn_index import IndiceIsbn, IndiceNonValido
+from isbn_store import StoricoIsbn, StoricoNonValido
+from utils import codifica_chiavi_isbn, normalizza_isbn, valida_isbn
+
+
+@dataclass
+class EsitoRicerca:
+    """Esito della ricerca di un ISBN"""
+
+    testo: str
+    """ISBN come incollato"""
+
+    isbn: str
+    """ISBN normalizzato"""
+
+    valido: bool
+    """Lunghezza ISBN valida (ISBN non validi non vengono cercati)"""
+
+    provenienze: List[str] = field(default_factory=list)
+    """Dove compare: "sorgente: file › foglio" (con la data per gli storici)"""
+
+    @property
+    def trovato(self) -> bool:
+        return bool(self.provenienze)
+
+
+def dividi_isbn(testo: str, config: AppConfig) -> List[Tuple[str, str]]:
+    """
+    ISBN di un testo incollato, nell'ordine e senza ripetizioni.
+
+    Returns:
+        Tuple (testo originale, ISBN normalizzato)
+    """
+    visti = set()
+    risultato = []
+    for parte in config.ISBN_SPLIT_RE.split(testo):
+        isbn = normalizza_isbn(parte, config)
+        if isbn and isbn not in visti:
+            visti.add(isbn)
+            risultato.append((parte.strip(), isbn))
+    return risultato
+
+
+class RicercaRapida:
+    """
+    Indici e storici aperti una volta, interrogati a ogni ricerca.
+
+    Esempio:
+        >>> with RicercaRapida([Path("catalogo.isbnidx")], config) as ricerca:
+        ...     for esito in ricerca.cerca("978-88-04-66823-7, 8804668237"):
+        ...         print(esito.isbn, esito.provenienze)
+    """
+
+    def __init__(self, sorgenti: List[Path], config: AppConfig):
+        """
+        Args:
+            sorgenti: Indici (config.SUFFIX_INDICE) e storici
+                (config.SUFFIX_STORICO); gli altri file vengono ignorati
+                (vedi ignorati)
+
+        Raises:
+            Exception: indice o storico non valido
+        """
+        self.config = config
+        self._sorgenti: List[Tuple[Path, Union[IndiceIsbn, StoricoIsbn]]] = []
+        self.ignorati: List[Path] = []
+        try:
+            for path in sorgenti:
+                path = Path(path)
+                suffisso = path.suffix.lower()
+                if suffisso == config.SUFFIX_INDICE:
+                    self._sorgenti.append((path, IndiceIsbn(path)))
+                elif suffisso == config.SUFFIX_STORICO:
+                    self._sorgenti.append((path, StoricoIsbn(path, crea=False)))
+                else:
+                    self.ignorati.append(path)
+        except (IndiceNonValido, StoricoNonValido) as e:
+            self.close()
+            raise Exception(str(e))
+
+    def __enter__(self) -> 'RicercaRapida':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._sorgenti)
+
+    def close(self) -> None:
+        for _, sorgente in self._sorgenti:
+            if isinstance(sorgente, StoricoIsbn):
+                sorgente.close()
+        self._sorgenti = []
+
+    def cerca(self, testo: str) -> List[EsitoRicerca]:
+        """Esito per ogni ISBN del testo (vedi dividi_isbn)"""
+        esiti = [
+            EsitoRicerca(originale, isbn, valida_isbn(isbn, self.config))
+            for originale, isbn in dividi_isbn(testo, self.config)
+        ]
+        validi = [e for e in esiti if e.valido]
+        if not validi:
+            return esiti
+        chiavi = np.array([e.isbn for e in validi], dtype=object)
+
+        for path, sorgente in self._sorgenti:
+            if isinstance(sorgente, IndiceIsbn):
+                for esito, origine in zip(validi, sorgente.sorgente_di(chiavi)):
+                    if origine is not None:
+                        esito.provenienze.append(f"{path.name}: {origine['file']} › {origine['foglio']}")
+            else:
+                codici = codifica_chiavi_isbn(chiavi, self.config.MAX_ISBN_LENGTH)
+                provenienze = sorgente.provenienze(
+                    codici, self.config.STORICO_DAL, self.config.STORICO_AL
+                )
+                for posizione, file, foglio, data in provenienze:
+                    validi[posizione].provenienze.append(f"{path.name}: {file} › {foglio} ({data})")
+        return esiti
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Stato di un confronto per le riconciliazioni incrementali
+
+Dopo un confronto incrementale vengono salvate, in un unico file .npz:
+
+    chiavi     chiavi worklist (uint64, vedi utils.codifica_chiavi_isbn),
+               ordinate e uniche
+    trovate    esito del confronto per ogni chiave worklist
+    confronto  chiavi dei file di confronto (uint64, ordinate e uniche)
+    meta       JSON: versione, data, impronte rapide dei file di confronto,
+               impostazioni che determinano le chiavi (impostazioni_chiavi)
+
+Alla riconciliazione successiva, se né i file di confronto né quelle
+impostazioni sono cambiati,
+solo le chiavi worklist nuove o modificate vengono cercate (ricerca
+binaria su 'confronto'): il catalogo non viene riletto.
+"""
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from config import AppConfig
+from zip_bundle import dimensione_input, percorso_su_disco
+
+
+VERSIONE_STATO = 1
+
+
+class StatoNonValido(Exception):
+    """Il file non è uno stato di confronto valido"""
+
+
+@dataclass
+class StatoConfronto:
+    """Chiavi ed esiti dell'ultima riconciliazione"""
+
+    chiavi: np.ndarray
+    trovate: np.ndarray
+    confronto: np.ndarray
+    impronte: List[Dict[str, Any]] = field(default_factory=list)
+    impostazioni: Dict[str, Any] = field(default_factory=dict)
+    """Impostazioni con cui sono state lette le chiavi (vedi impostazioni_chiavi)"""
+
+    creato: str = ''
+
+    def esito(self, codici: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Esito salvato per le chiavi indicate.
+
+        Returns:
+            Tupla (maschera delle chiavi già note, esito per chiave; False
+            per le chiavi non note)
+        """
+        if not len(self.chiavi) or not len(codici):
+            return np.zeros(len(codici), dtype=bool), np.zeros(len(codici), dtype=bool)
+        posizioni = np.minimum(np.searchsorted(self.chiavi, codici), len(self.chiavi) - 1)
+        note = self.chiavi[posizioni] == codici
+        return note, note & self.trovate[posizioni]
+
+
+def impronta_rapida(path: Path) -> Dict[str, Any]:
+    """
+    Impronta senza leggere il contenuto: percorso, dimensione e data di
+    modifica (dell'archivio, per i file dentro un .zip).
+    """
+    return {
+        'percorso': str(Path(path).resolve()),
+        'dimensione': dimensione_input(path),
+        'modificato': percorso_su_disco(path).stat().st_mtime_ns,
+    }
+
+
+def impostazioni_chiavi(config: AppConfig) -> Dict[str, Any]:
+    """
+    Impostazioni che determinano le chiavi lette dai file di confronto:
+    rilevamento della colonna ISBN, normalizzazione e intervallo di date
+    degli storici. Se cambiano, le chiavi salvate non valgono più.
+    """
+    return {
+        'varianti_isbn': list(config.VARIANTI_ISBN),
+        'righe_campione_isbn': config.RIGHE_CAMPIONE_ISBN,
+        'righe_ricerca_intestazione': config.RIGHE_RICERCA_INTESTAZIONE,
+        'soglia_rilevamento_isbn': config.SOGLIA_RILEVAMENTO_ISBN,
+        'sheet_parametri': config.SHEET_PARAMETRI,
+        'isbn_clean_re': config.ISBN_CLEAN_RE.pattern,
+        'isbn_split_re': config.ISBN_SPLIT_RE.pattern,
+        'min_isbn_length': config.MIN_ISBN_LENGTH,
+        'max_isbn_length': config.MAX_ISBN_LENGTH,
+        'storico_dal': config.STORICO_DAL,
+        'storico_al': config.STORICO_AL,
+    }
+
+
+def salva_stato(path: Path, stato: StatoConfronto) -> None:
+    """Scrive lo stato (prima in un file temporaneo, poi rinominato)"""
+    meta = {
+        'versione': VERSIONE_STATO,
+        'creato': stato.creato or datetime.now().isoformat(timespec='seconds'),
+        'impronte': stato.impronte,
+        'impostazioni': stato.impostazioni,
+    }
+    path = Path(path)
+    temporaneo = path.with_name(path.name + '.tmp')
+    with open(temporaneo, 'wb') as f:
+        np.savez(
+            f,
+            chiavi=np.asarray(stato.chiavi, dtype=np.uint64),
+            trovate=np.asarray(stato.trovate, dtype=bool),
+            confronto=np.asarray(stato.confronto, dtype=np.uint64),
+            meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode('utf-8'), dtype=np.uint8),
+        )
+    temporaneo.replace(path)
+
+
+def carica_stato(path: Path) -> StatoConfronto:
+    """Legge uno stato salvato con salva_stato"""
+    path = Path(path)
+    try:
+        with np.load(path, allow_pickle=False) as dati:
+            meta = json.loads(dati['meta'].tobytes().decode('utf-8'))
+            stato = StatoConfronto(
+                chiavi=dati['chiavi'],
+                trovate=dati['trovate'],
+                confronto=dati['confronto'],
+                impronte=meta.get('impronte', []),
+                impostazioni=meta.get('impostazioni', {}),
+                creato=meta.get('creato', ''),
+            )
+    except Exception as e:
+        # File troncato o danneggiato: np.load e zipfile sollevano errori di
+        # molti tipi (BadZipFile, EOFError, ...), tutti "stato non valido"
+        raise StatoNonValido(f"{path.name}: {e or type(e).__name__}")
+    if meta.get('versione') != VERSIONE_STATO:
+        raise StatoNonValido(f"{path.name}: versione stato {meta.get('versione')} non supportata")
+    if len(stato.chiavi) != len(stato.trovate):
+        raise StatoNonValido(f"{path.name}: file danneggiato")
+    return stato
@@ -49,7 +49,24 @@ setup(
         'excel_formatter', 
         'gui', 
         'utils', 
-        'aiuto'
+        'localization',
+        'aiuto',
+        'cli',
+        'xlsx_stream',
+        'isbn_index',
+        'isbn_store',
+        'bloom_filter',
+        'external_sort',
+        'planner',
+        'shared_keys',
+        'prefetch',
+        'zip_bundle',
+        'reconcile_state',
+        'match_service',
+        'watch_folder',
+        'quick_lookup',
+        'job_queue',
+        'key_cache'
     ],
     
     install_requires=[
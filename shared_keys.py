@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Set di riferimento condiviso tra processi (multiprocessing.shared_memory)
+
+Le chiavi della worklist, codificate in uint64 (utils.codifica_chiavi_isbn)
+e ordinate, vengono pubblicate una volta sola in un blocco di memoria
+condivisa. I processi di lettura vi si collegano senza copie e fanno il
+test di appartenenza con np.searchsorted; al processo principale tornano
+solo le posizioni delle chiavi trovate. La memoria non cresce con il
+numero di processi.
+"""
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class ChiaviCondivise:
+    """
+    Array uint64 ordinato pubblicato in memoria condivisa.
+
+    Esempio:
+        >>> with ChiaviCondivise(np.sort(codici)) as condivise:
+        ...     pool = ProcessPoolExecutor(initializer=collega_riferimento,
+        ...                                initargs=(condivise.nome, len(condivise)))
+    """
+
+    def __init__(self, chiavi_ordinate: np.ndarray):
+        chiavi_ordinate = np.ascontiguousarray(chiavi_ordinate, dtype=np.uint64)
+        self._n = len(chiavi_ordinate)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(8, chiavi_ordinate.nbytes))
+        np.ndarray(self._n, dtype=np.uint64, buffer=self._shm.buf)[:] = chiavi_ordinate
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def nome(self) -> str:
+        return self._shm.name
+
+    def __enter__(self) -> 'ChiaviCondivise':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Rilascia e distrugge il blocco condiviso."""
+        self._shm.close()
+        self._shm.unlink()
+
+
+# Collegamento del processo di lettura corrente (uno per processo)
+_collegamento: Optional[Tuple[shared_memory.SharedMemory, np.ndarray]] = None
+
+
+def collega_riferimento(nome: str, n: int) -> None:
+    """Initializer dei processi di lettura: si collega al blocco una volta sola."""
+    global _collegamento
+    try:
+        # Python 3.13+: il processo collegato non deve distruggere il blocco
+        shm = shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=nome)
+    _collegamento = (shm, np.ndarray(n, dtype=np.uint64, buffer=shm.buf))
+
+
+def riferimento_collegato() -> np.ndarray:
+    """Chiavi ordinate del blocco a cui è collegato il processo corrente."""
+    if _collegamento is None:
+        raise RuntimeError("Processo non collegato al set di riferimento")
+    return _collegamento[1]
+
+
+def posizioni_presenti(riferimento: np.ndarray, codici: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Test di appartenenza vettorizzato su chiavi ordinate.
+
+    Returns:
+        Tupla (maschera di presenza allineata ai codici, posizioni nel riferimento)
+    """
+    if not len(riferimento) or not len(codici):
+        return np.zeros(len(codici), dtype=bool), np.zeros(len(codici), dtype=np.intp)
+    posizioni = np.minimum(np.searchsorted(riferimento, codici), len(riferimento) - 1)
+    return riferimento[posizioni] == codici, posizioni
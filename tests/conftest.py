@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""Configurazione pytest: i moduli dell'applicazione sono nella radice del repository"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Confronto out-of-core: DUE_FASI e SU_DISCO danno le stesse righe di IN_MEMORIA"""
+import dataclasses
+import random
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import data_processor
+from config import AppConfig
+from data_processor import DataProcessor
+
+RIGHE_PER_FOGLIO = 5000
+ELEMENTI_RUN = 16
+
+
+def _isbn(n: int) -> str:
+    corpo = f"978{n:09d}"
+    controllo = (10 - sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(corpo)) % 10) % 10
+    return f"{corpo}{controllo}"
+
+
+def _salva(path, fogli):
+    wb = Workbook(write_only=True)
+    for nome, righe in fogli.items():
+        ws = wb.create_sheet(nome)
+        for riga in righe:
+            ws.append(riga)
+    wb.save(path)
+
+
+@pytest.fixture(scope="module")
+def file_confronto(tmp_path_factory):
+    """
+    Worklist su due fogli (il secondo con una riga titolo sopra
+    l'intestazione) con ISBN ripetuti, celle con più ISBN, righe vuote e
+    valori non validi; catalogo con circa metà degli ISBN.
+    """
+    cartella = tmp_path_factory.mktemp("su_disco")
+    casuale = random.Random(33)
+    fogli = {}
+    for n_foglio, nome in enumerate(("Ordini", "Arretrati")):
+        righe = [["Elenco arretrati"]] if n_foglio else []
+        righe.append(["Titolo", "ISBN", "Copie"])
+        for i in range(RIGHE_PER_FOGLIO):
+            scelta = casuale.random()
+            if scelta < 0.05:
+                righe.append([f"vuota {i}", None, None])
+            elif scelta < 0.08:
+                righe.append([f"non valida {i}", "non-un-isbn", i])
+            elif scelta < 0.18:
+                # Cella multi-valore: ISBN anche ripetuti da altre righe
+                valori = [_isbn(casuale.randrange(8000)) for _ in range(casuale.randint(2, 3))]
+                righe.append([f"multi {i}", "; ".join(valori), i])
+            else:
+                righe.append([f"titolo {i}", _isbn(casuale.randrange(8000)), i])
+        fogli[nome] = righe
+    worklist = cartella / "worklist.xlsx"
+    _salva(worklist, fogli)
+
+    catalogo = cartella / "catalogo.xlsx"
+    _salva(catalogo, {"Catalogo": [["EAN"]] + [[_isbn(n)] for n in range(0, 12000, 2)]})
+    return worklist, catalogo
+
+
+@pytest.fixture(scope="module")
+def risultati_in_memoria():
+    """Risultati IN_MEMORIA per modalità, calcolati una volta"""
+    return {}
+
+
+@pytest.fixture
+def run_piccoli(monkeypatch):
+    """Run di ELEMENTI_RUN chiavi e conteggio dei blocchi prodotti dalla fusione k-way"""
+    pianifica, unisci_run = data_processor.pianifica, data_processor.unisci_run
+    blocchi = []
+
+    def _pianifica(*args, **kwargs):
+        return dataclasses.replace(pianifica(*args, **kwargs), elementi_run=ELEMENTI_RUN)
+
+    def _unisci_run(run, elementi_per_blocco):
+        for blocco in unisci_run(run, elementi_per_blocco):
+            blocchi.append(len(blocco))
+            yield blocco
+
+    monkeypatch.setattr(data_processor, 'pianifica', _pianifica)
+    monkeypatch.setattr(data_processor, 'unisci_run', _unisci_run)
+    return blocchi
+
+
+def _confronta(file_confronto, modalita, strategia):
+    config = AppConfig()
+    config.RIGHE_BLOCCO_INVERSO = 700
+    risultato = DataProcessor(config).process_confronto_isbn(
+        list(file_confronto), lambda m, l: None,
+        modalita=modalita, report_duplicati=True, strategia=strategia
+    )
+    return risultato, pd.read_excel(risultato['output'], sheet_name=None, dtype=str)
+
+
+@pytest.mark.parametrize("modalita", ["MATCH", "NON_MATCH"])
+@pytest.mark.parametrize("strategia", ["DUE_FASI", "SU_DISCO"])
+def test_stesse_righe_di_in_memoria(file_confronto, risultati_in_memoria, run_piccoli, modalita, strategia):
+    if modalita not in risultati_in_memoria:
+        risultati_in_memoria[modalita] = _confronta(file_confronto, modalita, "IN_MEMORIA")
+        assert not run_piccoli
+    atteso, fogli_attesi = risultati_in_memoria[modalita]
+
+    risultato, fogli = _confronta(file_confronto, modalita, strategia)
+    # La fusione ha davvero lavorato a più passi
+    assert len(run_piccoli) > 1
+
+    assert fogli.keys() == fogli_attesi.keys()
+    for nome, df in fogli_attesi.items():
+        pd.testing.assert_frame_equal(fogli[nome], df, obj=nome)
+    for chiave in ('match_trovati', 'isbn_wl', 'duplicati_rimossi'):
+        assert risultato[chiave] == atteso[chiave]
+
+
+def test_match_e_non_match_dividono_la_worklist(file_confronto, run_piccoli):
+    _, con = _confronta(file_confronto, "MATCH", "SU_DISCO")
+    _, senza = _confronta(file_confronto, "NON_MATCH", "SU_DISCO")
+    righe = lambda fogli: {tuple(r) for df in fogli.values() if 'Titolo' in df for r in df[['Titolo', 'ISBN']].values}
+    assert righe(con) and righe(senza)
+    assert not righe(con) & righe(senza)
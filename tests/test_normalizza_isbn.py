@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Equivalenza dei motori di normalizzazione ISBN
+
+Il motore veloce (_normalizza_serie_translate) deve dare esattamente lo
+stesso risultato della catena pandas (_normalizza_serie_pandas) su ogni
+tipo di valore che può arrivare da un foglio Excel.
+"""
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import AppConfig
+from utils import (
+    _normalizza_serie_pandas,
+    _normalizza_serie_translate,
+    normalizza_serie_isbn,
+)
+
+
+@pytest.fixture
+def config() -> AppConfig:
+    return AppConfig()
+
+
+CASI = {
+    'separatori': ["978-88-04-66823-7", "978 88 04 66823 7", " 88-04-66823-X ", "978.88\t0466823\n7",
+                   "9788804668237; 9780306406157", "9788804668237/9780306406157"],
+    'minuscole': ["88-04-6682x", "x", "xX", "isbn 8804668237"],
+    'non_ascii': ["978‐88‐04‐66823‐7", "９７８８８０４６６８２３７", "ISBN: 978-88-04-66823-7 é", "ß", "ｘ",
+                  "88０4", " 9788804668237 ", "Ⅹ", "×"],
+    'mancanti': [None, np.nan, pd.NA, "", "   "],
+    'numeri': [9788804668237, 9788804668237.0, 88046682.5, 0, -1, 1e20, np.int64(9788804668237),
+               np.float64(978.0), True],
+    'testo': ["nessun isbn", "N/D", "—", "X-X-X"],
+}
+
+
+def _serie(valori, dtype=object) -> pd.Series:
+    return pd.Series(valori, dtype=dtype, index=pd.RangeIndex(10, 10 + len(valori)), name="ISBN")
+
+
+@pytest.mark.parametrize("caso", list(CASI))
+def test_translate_uguale_a_pandas(caso, config):
+    serie = _serie(CASI[caso])
+    atteso = _normalizza_serie_pandas(serie, config)
+    pd.testing.assert_series_equal(_normalizza_serie_translate(serie), atteso)
+
+
+def test_translate_uguale_a_pandas_tutti_i_casi_insieme(config):
+    serie = _serie([v for valori in CASI.values() for v in valori])
+    pd.testing.assert_series_equal(
+        _normalizza_serie_translate(serie), _normalizza_serie_pandas(serie, config)
+    )
+
+
+def test_translate_uguale_a_pandas_colonna_stringa(config):
+    """Colonne lette con dtype=str (dtype stringa di pandas, NaN compresi)"""
+    serie = _serie(CASI['separatori'] + CASI['non_ascii'] + [None], dtype="str")
+    pd.testing.assert_series_equal(
+        _normalizza_serie_translate(serie), _normalizza_serie_pandas(serie, config)
+    )
+
+
+def test_translate_uguale_a_pandas_valori_casuali(config):
+    rng = random.Random(26)
+    alfabeto = "0123456789Xx -.;/\té‐９ß"
+    valori = ["".join(rng.choice(alfabeto) for _ in range(rng.randrange(0, 20))) for _ in range(5000)]
+    serie = _serie(valori)
+    pd.testing.assert_series_equal(
+        _normalizza_serie_translate(serie), _normalizza_serie_pandas(serie, config)
+    )
+
+
+def test_translate_ripiega_su_pandas():
+    """Separatore nei dati o serie vuota: None, il chiamante usa la catena pandas"""
+    assert _normalizza_serie_translate(_serie(["978\x0088", "88"])) is None
+    assert _normalizza_serie_translate(_serie([])) is None
+
+
+def test_scelta_motore_per_dimensione(config):
+    valori = (CASI['separatori'] + CASI['mancanti'] + CASI['numeri'] + ["978\x0088"]) * 200
+    serie = _serie(valori)
+    assert len(serie) >= config.SOGLIA_NORMALIZZAZIONE_VELOCE
+    pd.testing.assert_series_equal(
+        normalizza_serie_isbn(serie, config), _normalizza_serie_pandas(serie, config)
+    )
+    piccola = serie.iloc[:10]
+    pd.testing.assert_series_equal(
+        normalizza_serie_isbn(piccola, config), _normalizza_serie_pandas(piccola, config)
+    )
+
+
+def test_pattern_personalizzato_usa_pandas(config):
+    config.ISBN_CLEAN_RE = re.compile(r'[^0-9]')
+    serie = _serie(CASI['minuscole'] * 1000)
+    pd.testing.assert_series_equal(
+        normalizza_serie_isbn(serie, config), _normalizza_serie_pandas(serie, config)
+    )
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Lettore xlsx in streaming: valori come pd.read_excel(dtype=str), ripiego su valori inattesi"""
+import datetime as dt
+import zipfile
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from xlsx_stream import LettoreXlsx, XlsxNonSupportato
+
+
+@pytest.fixture
+def file_date(tmp_path):
+    """Colonna di date salvate come date ISO (celle t="d")"""
+    wb = Workbook()
+    wb.iso_dates = True
+    ws = wb.active
+    ws.append(["ISBN", "Data"])
+    for valore in (dt.datetime(2024, 5, 1), dt.datetime(2024, 5, 1, 13, 45, 7, 250000),
+                   dt.date(2023, 1, 2), dt.time(10, 30)):
+        ws.append(["9788804668237", valore])
+    path = tmp_path / "date.xlsx"
+    wb.save(path)
+    return path
+
+
+def _sostituisci(sorgente, destinazione, vecchio: bytes, nuovo: bytes) -> None:
+    with zipfile.ZipFile(sorgente) as zin, zipfile.ZipFile(destinazione, 'w') as zout:
+        for voce in zin.infolist():
+            dati = zin.read(voce.filename)
+            if voce.filename == 'xl/worksheets/sheet1.xml':
+                assert vecchio in dati
+                dati = dati.replace(vecchio, nuovo, 1)
+            zout.writestr(voce, dati)
+
+
+def test_date_iso_come_read_excel(file_date):
+    atteso = pd.read_excel(file_date, dtype=str)["Data"].tolist()
+    with LettoreXlsx(file_date) as lettore:
+        foglio = lettore.sheet_names[0]
+        assert lettore.colonna(foglio, 1, 0).tolist() == atteso
+        assert lettore.campione(foglio, 10).iloc[1:, 1].tolist() == atteso
+
+
+@pytest.mark.parametrize("vecchio, nuovo", [
+    (b' t="d"><v>2024-05-01T00:00:00', b'><v>abc'),
+    (b'<v>2024-05-01T00:00:00', b'<v>non-una-data'),
+])
+def test_valore_inatteso_solleva_xlsx_non_supportato(file_date, tmp_path, vecchio, nuovo):
+    path = tmp_path / "danneggiato.xlsx"
+    _sostituisci(file_date, path, vecchio, nuovo)
+    with LettoreXlsx(path) as lettore:
+        foglio = lettore.sheet_names[0]
+        with pytest.raises(XlsxNonSupportato):
+            lettore.colonna(foglio, 1, 0)
+        with pytest.raises(XlsxNonSupportato):
+            lettore.campione(foglio, 10)
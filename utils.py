@@ -2,9 +2,15 @@
 """
 Funzioni di utilità per ISBN Matcher
 """
+import hashlib
+import numpy as np
 import pandas as pd
-from typing import Any, Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 from config import AppConfig
+from zip_bundle import apri_binario, dimensione_input
 
 
 def normalizza_isbn(val: Any, config: AppConfig) -> str:
@@ -54,21 +60,35 @@ def normalizza_serie_isbn(serie: pd.Series, config: AppConfig) -> pd.Series:
     """
     Normalizza un'intera colonna ISBN in un colpo solo (vettorizzato).
     Molto più veloce di .apply() su dataset con migliaia di righe.
-    
+
+    Il motore viene scelto in base alla dimensione dei dati: sotto
+    config.SOGLIA_NORMALIZZAZIONE_VELOCE si usa la catena pandas,
+    sopra si usa un unico passaggio bytes.translate (output identico).
+
     Args:
         serie: Serie pandas da normalizzare
         config: Configurazione applicazione
-    
+
     Returns:
         Serie normalizzata
-    
+
     Esempi:
         >>> s = pd.Series(["978-88-123", "88-456-X", None])
         >>> normalizza_serie_isbn(s, config)
         0    9788812345
         1    88456X
-        2    
+        2
     """
+    if (len(serie) >= config.SOGLIA_NORMALIZZAZIONE_VELOCE
+            and config.ISBN_CLEAN_RE.pattern == _ISBN_CLEAN_PATTERN_STANDARD):
+        risultato = _normalizza_serie_translate(serie)
+        if risultato is not None:
+            return risultato
+    return _normalizza_serie_pandas(serie, config)
+
+
+def _normalizza_serie_pandas(serie: pd.Series, config: AppConfig) -> pd.Series:
+    """Motore di riferimento: catena di metodi .str di pandas."""
     return (serie
             .fillna('')  # Gestisce NaN
             .astype(str)
@@ -77,6 +97,196 @@ def normalizza_serie_isbn(serie: pd.Series, config: AppConfig) -> pd.Series:
             .str.replace(config.ISBN_CLEAN_RE, '', regex=True))
 
 
+# Pattern di pulizia per cui il motore translate è equivalente alla regex
+_ISBN_CLEAN_PATTERN_STANDARD = r'[^0-9X]'
+
+# Separatore tra valori nel blocco unico (eliminato dalla tabella di pulizia)
+_SEPARATORE_BLOCCO = '\x00'
+
+# Tabella bytes: 'x' -> 'X', tutto ciò che non è cifra/X/separatore viene eliminato
+_TABELLA_ISBN = bytes.maketrans(b'x', b'X')
+_BYTE_DA_ELIMINARE = bytes(
+    b for b in range(256) if b not in b'0123456789Xx\x00'
+)
+
+
+def _normalizza_serie_translate(serie: pd.Series) -> Optional[pd.Series]:
+    """
+    Motore veloce: unisce tutti i valori in un solo blocco ASCII e lo pulisce
+    con un unico bytes.translate, poi lo ridivide.
+
+    Equivalente a _normalizza_serie_pandas con il pattern standard [^0-9X]:
+    i caratteri non ASCII non possono diventare cifre o 'X' con upper(),
+    quindi scartarli in codifica dà lo stesso risultato della regex.
+
+    Returns:
+        Serie normalizzata, o None se i dati contengono il separatore o
+        la serie è vuota (il chiamante ripiega sul motore pandas)
+    """
+    valori = serie.to_numpy(dtype=object, na_value='')
+    try:
+        blocco = _SEPARATORE_BLOCCO.join(valori)
+    except TypeError:
+        # Valori non stringa (numeri, date): stessa conversione di astype(str)
+        blocco = _SEPARATORE_BLOCCO.join(map(str, valori))
+
+    pulito = (blocco
+              .encode('ascii', 'ignore')
+              .translate(_TABELLA_ISBN, _BYTE_DA_ELIMINARE)
+              .decode('ascii')
+              .split(_SEPARATORE_BLOCCO))
+
+    if len(pulito) != len(serie):
+        return None
+    return pd.Series(pulito, index=serie.index, name=serie.name)
+
+
+def estrai_chiavi_isbn(serie: pd.Series, config: AppConfig) -> pd.Series:
+    """
+    Estrae gli ISBN validi da una colonna, separando le celle multi-valore.
+
+    Le celle che normalizzate danno un ISBN valido restano invariate.
+    Le celle troppo lunghe (es. "978-88-... ; 88-...-X" o ISBN dentro
+    un campo note) vengono divise con config.ISBN_SPLIT_RE ed esplose:
+    ogni parte valida diventa una chiave separata. Tutto vettorizzato.
+
+    Args:
+        serie: Colonna ISBN grezza
+        config: Configurazione applicazione
+
+    Returns:
+        Serie di ISBN normalizzati e validi, indicizzata con le etichette
+        delle righe di origine (ripetute per le celle multi-valore)
+
+    Esempi:
+        >>> s = pd.Series(["978-88-123-4567-8", "88-123-4567-X; 8812345670"])
+        >>> estrai_chiavi_isbn(s, config)
+        0    9788812345678
+        1       881234567X
+        1       8812345670
+    """
+    normalizzati = normalizza_serie_isbn(serie, config)
+    validi = valida_serie_isbn(normalizzati, config).to_numpy()
+    multi_valore = (normalizzati.str.len() > config.MAX_ISBN_LENGTH).to_numpy()
+    posizioni = np.arange(len(serie))
+
+    chiavi = pd.Series(normalizzati.to_numpy()[validi], index=posizioni[validi])
+
+    if multi_valore.any():
+        parti = (pd.Series(serie.to_numpy()[multi_valore], index=posizioni[multi_valore])
+                 .astype(str)
+                 .str.split(config.ISBN_SPLIT_RE)
+                 .explode())
+        parti = normalizza_serie_isbn(parti, config)
+        parti = parti[valida_serie_isbn(parti, config)]
+
+        # Stesso ISBN ripetuto nella stessa cella: una sola chiave
+        parti = parti[~pd.DataFrame({'riga': parti.index, 'isbn': parti.to_numpy()})
+                      .duplicated().to_numpy()]
+
+        chiavi = pd.concat([chiavi, parti]).sort_index(kind='stable')
+
+    chiavi.index = serie.index[chiavi.index.to_numpy(dtype=np.intp)]
+    return chiavi
+
+
+@dataclass
+class AnalisiDuplicati:
+    """Risultato di una fattorizzazione della colonna chiave (un solo passaggio hash)"""
+
+    codici: np.ndarray
+    """Codice intero per ogni riga (stesso codice = stessa chiave)"""
+
+    chiavi: np.ndarray
+    """Chiavi uniche, nell'ordine di prima comparsa"""
+
+    conteggi: np.ndarray
+    """Numero di righe per ogni chiave (indicizzato per codice)"""
+
+    prima_occorrenza: np.ndarray
+    """Maschera booleana: True sulla prima riga di ogni chiave"""
+
+    @property
+    def n_righe(self) -> int:
+        return len(self.codici)
+
+    @property
+    def n_unici(self) -> int:
+        return len(self.chiavi)
+
+    @property
+    def n_duplicati(self) -> int:
+        return self.n_righe - self.n_unici
+
+
+def analizza_duplicati(serie: pd.Series) -> AnalisiDuplicati:
+    """
+    Calcola in un unico passaggio (pd.factorize) conteggio unici,
+    maschera di prima occorrenza e conteggi per chiave.
+
+    Sostituisce la sequenza nunique() -> drop_duplicates() -> nunique().
+
+    Args:
+        serie: Serie di chiavi (ISBN normalizzati, senza valori mancanti)
+
+    Returns:
+        AnalisiDuplicati con codici, chiavi uniche e conteggi
+    """
+    codici, chiavi = pd.factorize(serie, sort=False)
+    conteggi = np.bincount(codici, minlength=len(chiavi))
+
+    # factorize assegna i codici in ordine di prima comparsa: una riga è la
+    # prima della sua chiave se il suo codice supera tutti i precedenti
+    precedenti = np.maximum.accumulate(codici)
+    prima_occorrenza = np.empty(len(codici), dtype=bool)
+    if len(codici):
+        prima_occorrenza[0] = True
+        prima_occorrenza[1:] = codici[1:] > precedenti[:-1]
+
+    return AnalisiDuplicati(
+        codici=codici,
+        chiavi=np.asarray(chiavi, dtype=object),
+        conteggi=conteggi,
+        prima_occorrenza=prima_occorrenza
+    )
+
+
+def crea_report_duplicati(
+    analisi: AnalisiDuplicati,
+    fogli: pd.Series,
+    config: AppConfig
+) -> pd.DataFrame:
+    """
+    Costruisce il report dei duplicati riusando i codici della fattorizzazione.
+
+    Args:
+        analisi: Risultato di analizza_duplicati
+        fogli: Foglio di origine di ogni riga (allineato a analisi.codici)
+        config: Configurazione applicazione
+
+    Returns:
+        DataFrame con una riga per ISBN duplicato: ISBN, righe, fogli di origine
+    """
+    col_isbn, col_righe, col_fogli = config.COLONNE_REPORT_DUPLICATI
+    righe_duplicate = analisi.conteggi[analisi.codici] > 1
+
+    if not righe_duplicate.any():
+        return pd.DataFrame(columns=[col_isbn, col_righe, col_fogli])
+
+    codici_dup = analisi.codici[righe_duplicate]
+    fogli_per_codice = (
+        pd.Series(np.asarray(fogli, dtype=object)[righe_duplicate])
+        .groupby(codici_dup, sort=True)
+        .unique()
+    )
+
+    return pd.DataFrame({
+        col_isbn: analisi.chiavi[fogli_per_codice.index],
+        col_righe: analisi.conteggi[fogli_per_codice.index],
+        col_fogli: [', '.join(map(str, f)) for f in fogli_per_codice.values],
+    })
+
+
 def valida_serie_isbn(serie: pd.Series, config: AppConfig) -> pd.Series:
     """
     Valida un'intera colonna ISBN in un colpo solo (vettorizzato).
@@ -113,28 +323,255 @@ def is_isbn_column_name(column_name: str, config: AppConfig) -> bool:
     """
     if not column_name:
         return False
-    col_norm = str(column_name).lower().strip().replace('.', '').replace(' ', '')
-    varianti_norm = [v.lower().replace('.', '').replace(' ', '') for v in config.VARIANTI_ISBN]
-    return col_norm in varianti_norm
+    col_norm = _normalizza_nome_colonna(column_name)
+    return col_norm in _varianti_isbn_normalizzate(tuple(config.VARIANTI_ISBN))
+
+
+def _normalizza_nome_colonna(nome: Any) -> str:
+    """Forma canonica di un'intestazione: minuscolo, senza punti e spazi."""
+    return str(nome).lower().strip().replace('.', '').replace(' ', '')
+
 
+@lru_cache(maxsize=8)
+def _varianti_isbn_normalizzate(varianti: Tuple[str, ...]) -> FrozenSet[str]:
+    """Lookup precompilato delle varianti ISBN (calcolato una volta per configurazione)."""
+    return frozenset(_normalizza_nome_colonna(v) for v in varianti)
 
-def trova_colonna_isbn(df: pd.DataFrame, config: AppConfig) -> Optional[str]:
+
+def verifica_checksum_isbn(isbn: str) -> bool:
     """
-    Trova la colonna ISBN in un DataFrame usando le varianti da config.
-    
+    Verifica la cifra di controllo di un ISBN normalizzato.
+
     Args:
-        df: DataFrame da analizzare
-        config: Configurazione con varianti colonne
-    
+        isbn: ISBN normalizzato (10 o 13 caratteri, solo cifre e X)
+
     Returns:
-        Nome della colonna ISBN trovata, o None se non trovata
+        True se la cifra di controllo ISBN-10 o ISBN-13/EAN-13 è corretta
+
+    Esempi:
+        >>> verifica_checksum_isbn("9788804668237")
+        True
+        >>> verifica_checksum_isbn("881234567X")
+        False
     """
-    for col in df.columns:
-        if is_isbn_column_name(col, config):
-            return col
+    if len(isbn) == 10:
+        if not isbn[:9].isdigit() or not (isbn[9].isdigit() or isbn[9] == 'X'):
+            return False
+        cifre = [int(c) for c in isbn[:9]] + [10 if isbn[9] == 'X' else int(isbn[9])]
+        return sum((10 - i) * c for i, c in enumerate(cifre)) % 11 == 0
+    if len(isbn) == 13:
+        if not isbn.isdigit():
+            return False
+        return sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(isbn)) % 10 == 0
+    return False
+
+
+@dataclass
+class ColonnaIsbn:
+    """Posizione della colonna ISBN in un foglio"""
+
+    indice: int
+    """Indice posizionale della colonna (0-based)"""
+
+    riga_intestazione: Optional[int]
+    """Riga dell'intestazione (0-based), None se il foglio non ha intestazione"""
+
+    da_contenuto: bool = False
+    """True se la colonna è stata riconosciuta dal contenuto e non dal nome"""
+
+
+def rileva_colonna_isbn(campione: pd.DataFrame, config: AppConfig) -> Optional[ColonnaIsbn]:
+    """
+    Individua colonna ISBN e riga di intestazione in un campione di righe.
+
+    1. Cerca un'intestazione nota (VARIANTI_ISBN) nelle prime
+       config.RIGHE_RICERCA_INTESTAZIONE righe (gestisce righe titolo sopra l'header).
+    2. Altrimenti assegna a ogni colonna la frazione di ISBN con checksum
+       corretto e sceglie la migliore sopra config.SOGLIA_RILEVAMENTO_ISBN;
+       l'intestazione è la riga sopra il primo ISBN valido.
+
+    Args:
+        campione: Prime righe del foglio lette senza intestazione (header=None)
+        config: Configurazione applicazione
+
+    Returns:
+        ColonnaIsbn, o None se nessuna colonna sembra contenere ISBN
+    """
+    varianti = _varianti_isbn_normalizzate(tuple(config.VARIANTI_ISBN))
+    for riga in range(min(len(campione), config.RIGHE_RICERCA_INTESTAZIONE)):
+        for indice, valore in enumerate(campione.iloc[riga]):
+            if pd.notna(valore) and _normalizza_nome_colonna(valore) in varianti:
+                return ColonnaIsbn(indice=indice, riga_intestazione=riga)
+
+    migliore: Optional[ColonnaIsbn] = None
+    punteggio_migliore = 0.0
+    for indice in range(campione.shape[1]):
+        valori = campione.iloc[:, indice]
+        normalizzati = normalizza_serie_isbn(valori, config)
+        validi = (valida_serie_isbn(normalizzati, config)
+                  & normalizzati.map(verifica_checksum_isbn)).to_numpy()
+        if not validi.any():
+            continue
+
+        prima_riga = int(validi.argmax())
+        non_vuoti = valori.iloc[prima_riga:].notna().sum()
+        punteggio = validi.sum() / max(non_vuoti, 1)
+
+        if punteggio >= config.SOGLIA_RILEVAMENTO_ISBN and punteggio > punteggio_migliore:
+            punteggio_migliore = punteggio
+            migliore = ColonnaIsbn(
+                indice=indice,
+                riga_intestazione=prima_riga - 1 if prima_riga > 0 else None,
+                da_contenuto=True
+            )
+    return migliore
+
+
+def individua_colonna_isbn(
+    xls: pd.ExcelFile,
+    foglio: str,
+    config: AppConfig
+) -> Optional[ColonnaIsbn]:
+    """
+    Legge solo le prime config.RIGHE_CAMPIONE_ISBN righe di un foglio
+    e individua la colonna ISBN (mai l'intero foglio).
+
+    Args:
+        xls: File Excel già aperto
+        foglio: Nome del foglio
+        config: Configurazione applicazione
+
+    Returns:
+        ColonnaIsbn, o None se il foglio non contiene una colonna ISBN
+    """
+    campione = xls.parse(
+        foglio,
+        header=None,
+        nrows=config.RIGHE_CAMPIONE_ISBN,
+        dtype=str
+    )
+    return rileva_colonna_isbn(campione, config)
+
+
+def codifica_chiavi_isbn(chiavi: Any, larghezza: int = 13) -> np.ndarray:
+    """
+    Converte ISBN normalizzati in interi uint64 univoci (vettorizzato).
+
+    Ogni carattere vale una cifra in base 11 (X = 10) e la lunghezza viene
+    aggiunta come cifra più significativa, quindi chiavi diverse danno
+    sempre interi diversi. Utile per hash e array compatti.
+
+    Args:
+        chiavi: Sequenza di ISBN normalizzati (solo cifre e X)
+        larghezza: Lunghezza massima delle chiavi (config.MAX_ISBN_LENGTH)
+
+    Returns:
+        Array uint64 allineato alle chiavi
+    """
+    if 11 ** larghezza * (larghezza + 1) >= 2 ** 64:
+        raise ValueError(f"Larghezza chiave {larghezza} troppo grande per uint64")
+    testo = np.asarray(chiavi, dtype=f'S{larghezza}')
+    if not len(testo):
+        return np.empty(0, dtype=np.uint64)
+
+    byte = np.frombuffer(testo.tobytes(), dtype=np.uint8).reshape(len(testo), larghezza)
+    presenti = byte != 0
+    cifre = np.where(byte == ord('X'), 10, byte.astype(np.int64) - ord('0'))
+    cifre = np.where(presenti, cifre, 0).astype(np.uint64)
+
+    potenze = np.array([11 ** (larghezza - 1 - j) for j in range(larghezza)], dtype=np.uint64)
+    lunghezze = presenti.sum(axis=1).astype(np.uint64)
+    return cifre @ potenze + lunghezze * np.uint64(11 ** larghezza)
+
+
+def decodifica_chiavi_isbn(codici: np.ndarray, larghezza: int = 13) -> np.ndarray:
+    """
+    Inverso di codifica_chiavi_isbn: da interi uint64 a ISBN normalizzati.
+
+    Returns:
+        Array di stringhe (dtype object) allineato ai codici
+    """
+    codici = np.asarray(codici, dtype=np.uint64)
+    base = np.uint64(11 ** larghezza)
+    lunghezze = (codici // base).astype(np.intp)
+    resto = codici % base
+
+    cifre = np.empty((len(codici), larghezza), dtype=np.uint8)
+    for j in range(larghezza - 1, -1, -1):
+        cifre[:, j] = (resto % np.uint64(11)).astype(np.uint8)
+        resto //= np.uint64(11)
+    caratteri = np.where(cifre == 10, ord('X'), cifre + ord('0')).astype(np.uint8)
+    caratteri[np.arange(larghezza)[None, :] >= lunghezze[:, None]] = 0
+
+    testo = np.frombuffer(caratteri.tobytes(), dtype=f'S{larghezza}')
+    return testo.astype(str).astype(object)
+
+
+def memoria_disponibile() -> Optional[int]:
+    """
+    Memoria fisica disponibile in byte (best effort, senza dipendenze esterne).
+
+    Returns:
+        Byte disponibili, None se non rilevabile sulla piattaforma
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for riga in f:
+                if riga.startswith('MemAvailable:'):
+                    return int(riga.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        import ctypes
+
+        class _MemoryStatusEx(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong),
+                ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong),
+                ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong),
+                ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong),
+                ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('sullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+
+        stato = _MemoryStatusEx()
+        stato.dwLength = ctypes.sizeof(_MemoryStatusEx)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(stato)):
+            return int(stato.ullAvailPhys)
+    except (AttributeError, OSError):
+        pass
     return None
 
 
+def impronta_file(path: Path, dimensione_blocco: int = 1 << 20) -> Dict[str, Any]:
+    """
+    Calcola l'impronta di un file (nome, dimensione, SHA-256 del contenuto).
+
+    Due copie identiche dello stesso export hanno la stessa impronta anche
+    se copiate su PC diversi (data di modifica diversa).
+
+    Args:
+        path: File di cui calcolare l'impronta
+        dimensione_blocco: Byte letti per volta
+
+    Returns:
+        Dict con 'file', 'dimensione', 'sha256'
+    """
+    sha = hashlib.sha256()
+    with apri_binario(path) as f:
+        for blocco in iter(lambda: f.read(dimensione_blocco), b''):
+            sha.update(blocco)
+    return {
+        'file': Path(path).name,
+        'dimensione': dimensione_input(path),
+        'sha256': sha.hexdigest(),
+    }
+
+
 def pulisci_serie(serie: pd.Series) -> pd.Series:
     """Pulisce una serie pandas rimuovendo NA e spazi."""
     return serie.dropna().astype(str).str.strip()
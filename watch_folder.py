@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Cartelle osservate: confronto automatico dei file depositati
+
+Il personale deposita gli export in cartelle condivise; l'osservatore
+controlla periodicamente le cartelle delle worklist e dei file di
+confronto e, quando trova file nuovi o modificati, esegue il confronto
+(vedi DataProcessor.process_batch_isbn) scrivendo gli output nella
+cartella indicata:
+
+    - una worklist nuova o modificata viene confrontata con tutti i file
+      di confronto; se cambiano i file di confronto tutte le worklist
+      vengono confrontate di nuovo;
+    - un file viene considerato completo quando dimensione e data di
+      modifica non cambiano per config.OSSERVA_STABILITA_SECONDI: una
+      serie di copie ravvicinate produce un unico lavoro;
+    - le chiavi dei file di confronto sono conservate in una cache
+      (key_cache.CacheChiavi) nella cartella di output: vengono letti
+      solo i file nuovi o cambiati;
+    - con più cartelle worklist il nome di ogni output comprende la
+      cartella di origine: worklist omonime non si sovrascrivono;
+    - i lavori vengono eseguiti uno alla volta e un file di lock nella
+      cartella di output impedisce a un secondo osservatore di lavorare
+      sugli stessi file.
+
+Non richiede librerie esterne (nessuna notifica del file system): il
+controllo è un confronto di dimensioni e date tra due passaggi.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from data_processor import LOG_ERROR, LOG_INFO, LOG_SUCCESS, LOG_WARNING, DataProcessor
+from key_cache import CacheChiavi
+from zip_bundle import espandi_archivi, percorso_su_disco
+
+
+FILE_LOCK = '.isbnwatch.lock'
+FILE_STATO = '.isbnwatch.json'
+
+
+class OsservatoreGiaAttivo(Exception):
+    """Un altro osservatore usa già la cartella di output"""
+
+
+class OsservatoreCartelle:
+    """
+    Esegue i confronti quando cambiano i file delle cartelle osservate.
+
+    Esempio:
+        >>> osservatore = OsservatoreCartelle(
+        ...     processor, [Path("worklist")], [Path("cataloghi")], Path("output"), log
+        ... )
+        >>> osservatore.esegui()    # fino a Ctrl+C
+    """
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        cartelle_worklist: List[Path],
+        cartelle_confronto: List[Path],
+        cartella_output: Path,
+        log_callback: Callable[[str, str], None],
+        modalita: Optional[str] = None
+    ):
+        self.processor = processor
+        self.config = processor.config
+        self.cartelle_worklist = [Path(c) for c in cartelle_worklist]
+        self.cartelle_confronto = [Path(c) for c in cartelle_confronto]
+        self.cartella_output = Path(cartella_output)
+        self.log_callback = log_callback
+        self.modalita = modalita or self.config.MODE_MATCH
+
+        # File osservati: (dimensione, data di modifica) e istante dell'ultima variazione
+        self._osservati: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+        # Chiavi dei file di confronto, in memoria e nella cartella di output
+        self.cache = CacheChiavi(
+            self.config.CODA_CACHE_MB * 1024 * 1024,
+            self.cartella_output / self.config.CARTELLA_CACHE_CHIAVI
+        )
+        # Firme dei file all'ultimo lavoro (anche non riuscito)
+        self._eseguiti: Dict[str, Any] = {'worklist': {}, 'confronto': []}
+
+    # ------------------------------------------------------------------
+    # Ciclo di osservazione
+    # ------------------------------------------------------------------
+
+    def esegui(self, fine: Optional[threading.Event] = None) -> None:
+        """
+        Osserva le cartelle fino a KeyboardInterrupt (o fino a fine.set()).
+
+        Raises:
+            OsservatoreGiaAttivo: la cartella di output è già in uso
+        """
+        self.cartella_output.mkdir(parents=True, exist_ok=True)
+        lock = self.cartella_output / FILE_LOCK
+        try:
+            with open(lock, 'x', encoding='utf-8') as f:
+                f.write(f"{os.getpid()}\n")
+        except FileExistsError:
+            t = self.processor.t
+            raise OsservatoreGiaAttivo((
+                t.watch_locked if t
+                else "Un altro osservatore usa già {folder} (se non è attivo elimina {lock})"
+            ).format(folder=self.cartella_output, lock=lock.name))
+
+        fine = fine or threading.Event()
+        try:
+            self._carica_eseguiti()
+            t = self.processor.t
+            self.log_callback((
+                t.watch_started if t
+                else "👀 Osservo {worklists} e {comparison}; output in {output} (Ctrl+C per terminare)"
+            ).format(
+                worklists=', '.join(str(c) for c in self.cartelle_worklist),
+                comparison=', '.join(str(c) for c in self.cartelle_confronto),
+                output=self.cartella_output
+            ), LOG_INFO)
+            while not fine.is_set():
+                try:
+                    self.controlla()
+                except OSError as e:
+                    # Cartella di rete non raggiungibile: si riprova al passaggio successivo
+                    self.log_callback(f"👀 {e}", LOG_WARNING)
+                fine.wait(self.config.OSSERVA_INTERVALLO_SECONDI)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            lock.unlink(missing_ok=True)
+
+    def controlla(self) -> bool:
+        """
+        Un passaggio: registra le variazioni ed esegue il lavoro se tutti i
+        file cambiati sono stabili.
+
+        Returns:
+            True se è stato eseguito un lavoro
+        """
+        ora = time.monotonic()
+        worklist = self._elenca(self.cartelle_worklist, self.config.SUFFISSI_EXCEL)
+        confronto = self._elenca(
+            self.cartelle_confronto,
+            (*self.config.SUFFISSI_EXCEL, self.config.SUFFIX_INDICE, self.config.SUFFIX_STORICO)
+        )
+        firme = {}
+        for file in worklist + confronto:
+            stat = file.stat()
+            firme[file] = (stat.st_size, stat.st_mtime_ns)
+            precedente = self._osservati.get(file)
+            if precedente is None or precedente[0] != firme[file]:
+                self._osservati[file] = (firme[file], ora)
+        for file in list(self._osservati):
+            if file not in firme:
+                del self._osservati[file]
+
+        firma_confronto = sorted([str(f), *firme[f]] for f in confronto)
+        if firma_confronto != self._eseguiti['confronto']:
+            da_eseguire = worklist
+        else:
+            da_eseguire = [
+                f for f in worklist if self._eseguiti['worklist'].get(str(f)) != list(firme[f])
+            ]
+        if not da_eseguire or not confronto:
+            return False
+
+        # Lavoro rimandato finché qualche file cambia ancora (scrittura in corso)
+        ultima_variazione = max(self._osservati[f][1] for f in da_eseguire + confronto)
+        if ora - ultima_variazione < self.config.OSSERVA_STABILITA_SECONDI:
+            return False
+
+        self._lavoro(da_eseguire, confronto)
+        # Le firme sono quelle viste prima del lavoro: un file cambiato nel
+        # frattempo risulta modificato al passaggio successivo
+        for file in da_eseguire:
+            self._eseguiti['worklist'][str(file)] = list(firme[file])
+        self._eseguiti['confronto'] = firma_confronto
+        self._salva_eseguiti()
+        return True
+
+    def _elenca(self, cartelle: List[Path], suffissi: Tuple[str, ...]) -> List[Path]:
+        """File osservati delle cartelle (non ricorsivo), archivi .zip compresi"""
+        accettati = {s.lower() for s in (*suffissi, self.config.SUFFIX_ARCHIVIO)}
+        files = []
+        for cartella in cartelle:
+            for file in sorted(cartella.iterdir()):
+                nome = file.name
+                if (
+                    file.is_file()
+                    and file.suffix.lower() in accettati
+                    # File di lock di Excel, nascosti e output (se la cartella coincide)
+                    and not nome.startswith(('~$', '.'))
+                    and not nome.endswith(self.config.SUFFIX_OUTPUT)
+                ):
+                    files.append(file)
+        return files
+
+    # ------------------------------------------------------------------
+    # Lavoro
+    # ------------------------------------------------------------------
+
+    def _lavoro(self, worklist: List[Path], confronto: List[Path]) -> None:
+        """Confronta le worklist indicate con le chiavi (in cache) dei file di confronto"""
+        t = self.processor.t
+        self.log_callback((
+            t.watch_job if t else "👀 {worklists} worklist da confrontare ({time})"
+        ).format(worklists=len(worklist), time=datetime.now().strftime('%H:%M:%S')), LOG_INFO)
+        try:
+            files_confronto = espandi_archivi(confronto, self.config.SUFFISSI_EXCEL)
+            chiavi = self._chiavi_confronto(files_confronto)
+            risultati = self.processor.process_batch_isbn(
+                worklist, files_confronto, self.log_callback,
+                modalita=self.modalita,
+                confronto=chiavi,
+                cartella_output=self.cartella_output,
+                prefisso_output=self._prefisso_output
+            )
+        except MemoryError:
+            raise
+        except Exception as e:
+            # Riprovato solo quando i file cambiano di nuovo
+            self.log_callback(f"👀 {e}", LOG_ERROR)
+            return
+        riusciti = sum(1 for r in risultati if 'errore' not in r)
+        self.log_callback((
+            t.watch_job_done if t else "👀 Lavoro completato: {ok} di {count} output in {folder}"
+        ).format(ok=riusciti, count=len(risultati), folder=self.cartella_output),
+            LOG_SUCCESS if riusciti == len(risultati) else LOG_WARNING)
+
+    def _chiavi_confronto(self, files: List[Path]) -> np.ndarray:
+        """Chiavi di tutti i file di confronto: dalla cache o lette se nuove o cambiate"""
+        # File non più presenti: fuori dalla cache (anche su disco)
+        self.cache.mantieni(files)
+        chiavi, da_cache = self.cache.chiavi_confronto(self.processor, files, self.log_callback)
+
+        t = self.processor.t
+        self.log_callback((
+            t.watch_cache if t else "🗃️ File di confronto: {cached} dalla cache, {read} da leggere"
+        ).format(cached=da_cache, read=len(files) - da_cache), LOG_INFO)
+        return chiavi
+
+    def _prefisso_output(self, worklist: Path) -> str:
+        """
+        Prefisso degli output di una worklist. Con più cartelle worklist
+        comprende la cartella di origine: file con lo stesso nome in
+        cartelle diverse non si sovrascrivono nella cartella di output.
+        """
+        if len(self.cartelle_worklist) < 2:
+            return f"{worklist.stem}_"
+        cartella = percorso_su_disco(worklist).parent
+        nomi = [c.name for c in self.cartelle_worklist]
+        for numero, osservata in enumerate(self.cartelle_worklist, 1):
+            if osservata == cartella:
+                # Cartelle osservate con lo stesso nome: distinte dal numero
+                nome = osservata.name if nomi.count(osservata.name) == 1 else f"{osservata.name}{numero}"
+                return f"{nome}_{worklist.stem}_"
+        return f"{worklist.stem}_"
+
+    # ------------------------------------------------------------------
+    # Persistenza (firme dell'ultimo lavoro)
+    # ------------------------------------------------------------------
+
+    def _carica_eseguiti(self) -> None:
+        """Firme dell'ultimo lavoro salvate da un'esecuzione precedente"""
+        try:
+            dati = json.loads((self.cartella_output / FILE_STATO).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if isinstance(dati, dict) and {'worklist', 'confronto'} <= dati.keys():
+            self._eseguiti = dati
+
+    def _salva_eseguiti(self) -> None:
+        destinazione = self.cartella_output / FILE_STATO
+        temporaneo = destinazione.with_name(destinazione.name + '.tmp')
+        temporaneo.write_text(json.dumps(self._eseguiti, ensure_ascii=False), encoding='utf-8')
+        temporaneo.replace(destinazione)
@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+"""
+Lettore veloce per colonne ISBN da file .xlsx
+
+Legge l'XML del foglio direttamente dallo zip con un parser incrementale
+(expat): le celle fuori dalla colonna ISBN vengono scartate in base al
+riferimento (attributo r="B12") senza costruire oggetti, e della tabella
+sharedStrings si decodificano solo le voci usate dalla colonna.
+
+Per file insoliti (celle senza riferimento, namespace "strict", parti
+mancanti) viene sollevata XlsxNonSupportato: il chiamante ripiega su
+pandas/openpyxl.
+"""
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple, Union
+from xml.parsers import expat
+
+import pandas as pd
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import from_ISO8601
+
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+TIPO_SHARED_STRINGS = NS_REL + '/sharedStrings'
+
+# Nomi elemento come li restituisce expat con namespace_separator=' '
+_C = f'{NS_MAIN} c'
+_V = f'{NS_MAIN} v'
+_T = f'{NS_MAIN} t'
+_ROW = f'{NS_MAIN} row'
+_SI = f'{NS_MAIN} si'
+_RPH = f'{NS_MAIN} rPh'
+_SHEET_DATA = f'{NS_MAIN} sheetData'
+_DIMENSION = f'{NS_MAIN} dimension'
+
+_DIMENSIONE_BLOCCO = 1 << 16
+
+# Marcatori byte per saltare le righe iniziali senza parsing (solo XML non prefissato)
+_APERTURA_SHEET_DATA = b'<sheetData>'
+_CHIUSURA_SHEET_DATA = b'</sheetData>'
+_RE_INIZIO_RIGA = re.compile(rb'<row r="(\d+)"')
+_RE_RIGA_NON_NUMERATA = re.compile(rb'<row(?:>|\s(?!\s*r="))')
+
+
+class XlsxNonSupportato(Exception):
+    """Il file non può essere letto dal lettore veloce (usare pandas/openpyxl)"""
+
+
+class _FineLettura(Exception):
+    """Interrompe il parsing quando sono state lette abbastanza righe"""
+
+
+def _converti_valore(tipo: Optional[str], testo: str) -> str:
+    """
+    Converte il valore grezzo di una cella nella stessa stringa che
+    pd.read_excel(dtype=str) produrrebbe (interi senza '.0', date ISO
+    come str di datetime/date/time).
+    
+    Raises:
+        ValueError: valore non convertibile (vedi LettoreXlsx._valori)
+    """
+    if tipo in ('s', 'str', 'inlineStr', 'e'):
+        return testo
+    if tipo == 'b':
+        return 'True' if testo == '1' else 'False'
+    if tipo == 'd':
+        return str(from_ISO8601(testo))
+    if '.' in testo or 'E' in testo or 'e' in testo:
+        numero = float(testo)
+        return str(int(numero)) if numero.is_integer() else str(numero)
+    return str(int(testo))
+
+
+def _parser() -> 'expat.XMLParserType':
+    parser = expat.ParserCreate(namespace_separator=' ')
+    parser.buffer_text = True
+    return parser
+
+
+class _ScansioneFoglio:
+    """
+    Gestori expat per la scansione di un foglio.
+
+    Raccoglie (riga, colonna, tipo, testo) solo per le celle delle colonne
+    richieste (tutte se colonne è None) fino a max_righe.
+    """
+
+    def __init__(self, colonne: Optional[Set[str]], max_righe: Optional[int]):
+        self.colonne = colonne
+        self.max_righe = max_righe
+        self.celle: List[Tuple[int, str, Optional[str], str]] = []
+        self.sheet_data_trovato = False
+        self._cella: Optional[Tuple[int, str, Optional[str]]] = None
+        self._raccogli = False
+        self._testo: List[str] = []
+
+    def start(self, nome: str, attributi: Dict[str, str]) -> None:
+        if nome == _C:
+            rif = attributi.get('r')
+            if rif is None:
+                raise XlsxNonSupportato("cella senza riferimento")
+            fine_lettere = 0
+            while rif[fine_lettere].isalpha():
+                fine_lettere += 1
+            colonna = rif[:fine_lettere]
+            if self.colonne is None or colonna in self.colonne:
+                self._cella = (int(rif[fine_lettere:]), colonna, attributi.get('t'))
+                self._testo = []
+        elif self._cella is not None and (nome == _V or nome == _T):
+            self._raccogli = True
+        elif nome == _ROW and self.max_righe is not None:
+            riga = attributi.get('r')
+            if riga is not None and int(riga) > self.max_righe:
+                raise _FineLettura()
+        elif nome == _SHEET_DATA:
+            self.sheet_data_trovato = True
+
+    def end(self, nome: str) -> None:
+        if nome == _C:
+            if self._cella is not None:
+                riga, colonna, tipo = self._cella
+                self.celle.append((riga, colonna, tipo, ''.join(self._testo)))
+                self._cella = None
+        elif nome == _V or nome == _T:
+            self._raccogli = False
+
+    def testo(self, dati: str) -> None:
+        if self._raccogli:
+            self._testo.append(dati)
+
+
+class _ScansioneStringhe:
+    """Gestori expat per sharedStrings.xml: decodifica solo gli indici richiesti."""
+
+    def __init__(self, indici: Set[int]):
+        self.indici = indici
+        self.ultimo = max(indici) if indici else -1
+        self.stringhe: Dict[int, str] = {}
+        self._corrente = -1
+        self._in_rph = 0
+        self._raccogli = False
+        self._testo: List[str] = []
+
+    def start(self, nome: str, attributi: Dict[str, str]) -> None:
+        if nome == _SI:
+            self._corrente += 1
+            if self._corrente > self.ultimo:
+                raise _FineLettura()
+            self._testo = []
+        elif nome == _RPH:
+            self._in_rph += 1
+        elif nome == _T and not self._in_rph and self._corrente in self.indici:
+            self._raccogli = True
+
+    def end(self, nome: str) -> None:
+        if nome == _SI:
+            if self._corrente in self.indici:
+                self.stringhe[self._corrente] = ''.join(self._testo)
+        elif nome == _RPH:
+            self._in_rph -= 1
+        elif nome == _T:
+            self._raccogli = False
+
+    def testo(self, dati: str) -> None:
+        if self._raccogli:
+            self._testo.append(dati)
+
+
+class _ScansioneDimensione:
+    """Gestore expat che legge solo il record <dimension> in testa al foglio."""
+
+    def __init__(self):
+        self.riferimento: Optional[str] = None
+
+    def start(self, nome: str, attributi: Dict[str, str]) -> None:
+        if nome == _DIMENSION:
+            self.riferimento = attributi.get('ref')
+            raise _FineLettura()
+        if nome == _SHEET_DATA:
+            raise _FineLettura()
+
+
+class LettoreXlsx:
+    """
+    Lettore in streaming di un file .xlsx (un solo zip aperto per file).
+
+    Esempio:
+        >>> with LettoreXlsx(path) as lettore:
+        ...     for foglio in lettore.sheet_names:
+        ...         campione = lettore.campione(foglio, 50)
+        ...         valori = lettore.colonna(foglio, 1, riga_intestazione=0)
+    """
+
+    def __init__(self, path: Union[Path, BinaryIO]):
+        try:
+            self._zip = zipfile.ZipFile(path)
+        except (zipfile.BadZipFile, OSError) as e:
+            raise XlsxNonSupportato(str(e))
+        try:
+            self._fogli, self._shared_strings = self._leggi_struttura()
+        except XlsxNonSupportato:
+            self._zip.close()
+            raise
+        except (KeyError, ET.ParseError) as e:
+            self._zip.close()
+            raise XlsxNonSupportato(str(e))
+
+    def __enter__(self) -> 'LettoreXlsx':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self._fogli)
+
+    def _leggi_struttura(self) -> Tuple[Dict[str, str], Optional[str]]:
+        """Mappa nome foglio -> parte XML e individua sharedStrings."""
+        workbook = ET.fromstring(self._zip.read('xl/workbook.xml'))
+        relazioni = ET.fromstring(self._zip.read('xl/_rels/workbook.xml.rels'))
+
+        target_per_id = {}
+        shared_strings = None
+        for rel in relazioni.iter(f'{{{NS_PKG_REL}}}Relationship'):
+            target = rel.get('Target', '')
+            if target.startswith('/'):
+                parte = target.lstrip('/')
+            else:
+                parte = posixpath.normpath(posixpath.join('xl', target))
+            target_per_id[rel.get('Id')] = parte
+            if rel.get('Type') == TIPO_SHARED_STRINGS:
+                shared_strings = parte
+
+        fogli = {}
+        for sheet in workbook.iter(f'{{{NS_MAIN}}}sheet'):
+            rel_id = sheet.get(f'{{{NS_REL}}}id')
+            if rel_id not in target_per_id:
+                raise XlsxNonSupportato(f"relazione mancante per il foglio {sheet.get('name')}")
+            fogli[sheet.get('name')] = target_per_id[rel_id]
+
+        if not fogli:
+            raise XlsxNonSupportato("nessun foglio trovato (namespace non standard?)")
+        return fogli, shared_strings
+
+    def _scansiona(
+        self,
+        foglio: str,
+        scansione: _ScansioneFoglio,
+        da_riga: Optional[int] = None
+    ) -> None:
+        """
+        Esegue il parsing incrementale della parte XML del foglio.
+
+        Con da_riga le righe precedenti vengono saltate cercando i
+        marcatori <row r="..."> nei byte decompressi, senza parsing XML;
+        se il file non lo permette si legge dall'inizio.
+        """
+        parser = _parser()
+        parser.StartElementHandler = scansione.start
+        parser.EndElementHandler = scansione.end
+        parser.CharacterDataHandler = scansione.testo
+        try:
+            inizio = None
+            if da_riga is not None and da_riga > 1:
+                with self._zip.open(self._fogli[foglio]) as stream:
+                    inizio = _salta_a_riga(stream, da_riga)
+                    if inizio is not None:
+                        parser.Parse(inizio, False)
+                        while True:
+                            blocco = stream.read(_DIMENSIONE_BLOCCO)
+                            if not blocco:
+                                break
+                            parser.Parse(blocco, False)
+                        parser.Parse(b'', True)
+            if inizio is None:
+                with self._zip.open(self._fogli[foglio]) as stream:
+                    while True:
+                        blocco = stream.read(_DIMENSIONE_BLOCCO)
+                        if not blocco:
+                            break
+                        parser.Parse(blocco, False)
+                    parser.Parse(b'', True)
+        except _FineLettura:
+            pass
+        except (expat.ExpatError, KeyError, ValueError, IndexError) as e:
+            raise XlsxNonSupportato(str(e))
+        if not scansione.sheet_data_trovato:
+            raise XlsxNonSupportato("sheetData non trovato (namespace non standard?)")
+
+    def dimensioni(self, foglio: str) -> Optional[Tuple[int, int]]:
+        """
+        Righe e colonne del foglio dal record <dimension> (senza leggere le celle).
+
+        Returns:
+            Tupla (righe, colonne) dalla cella A1, None se il record manca
+            o è generico (alcuni programmi scrivono sempre "A1")
+        """
+        scansione = _ScansioneDimensione()
+        parser = _parser()
+        parser.StartElementHandler = scansione.start
+        try:
+            with self._zip.open(self._fogli[foglio]) as stream:
+                while True:
+                    blocco = stream.read(_DIMENSIONE_BLOCCO)
+                    if not blocco:
+                        break
+                    parser.Parse(blocco, False)
+        except _FineLettura:
+            pass
+        except (expat.ExpatError, KeyError) as e:
+            raise XlsxNonSupportato(str(e))
+
+        if not scansione.riferimento or ':' not in scansione.riferimento:
+            return None
+        fine = scansione.riferimento.split(':')[1]
+        fine_lettere = 0
+        while fine_lettere < len(fine) and fine[fine_lettere].isalpha():
+            fine_lettere += 1
+        try:
+            return int(fine[fine_lettere:]), _indice_colonna(fine[:fine_lettere].upper()) + 1
+        except ValueError:
+            return None
+
+    def dimensione_xml(self, foglio: str) -> int:
+        """Byte non compressi della parte XML del foglio (per stime quando manca <dimension>)."""
+        return self._zip.getinfo(self._fogli[foglio]).file_size
+
+    def _stringhe_condivise(self, indici: Set[int]) -> Dict[int, str]:
+        """Decodifica solo le voci sharedStrings richieste."""
+        if not indici:
+            return {}
+        if self._shared_strings is None:
+            raise XlsxNonSupportato("sharedStrings mancante")
+
+        scansione = _ScansioneStringhe(indici)
+        parser = _parser()
+        parser.StartElementHandler = scansione.start
+        parser.EndElementHandler = scansione.end
+        parser.CharacterDataHandler = scansione.testo
+        try:
+            with self._zip.open(self._shared_strings) as stream:
+                while True:
+                    blocco = stream.read(_DIMENSIONE_BLOCCO)
+                    if not blocco:
+                        break
+                    parser.Parse(blocco, False)
+                parser.Parse(b'', True)
+        except _FineLettura:
+            pass
+        except (expat.ExpatError, KeyError) as e:
+            raise XlsxNonSupportato(str(e))
+
+        if len(scansione.stringhe) != len(indici):
+            raise XlsxNonSupportato("indici sharedStrings fuori tabella")
+        return scansione.stringhe
+
+    def _valori(self, celle: List[Tuple[int, str, Optional[str], str]]) -> List[str]:
+        """
+        Risolve stringhe condivise e converte i valori grezzi delle celle.
+        
+        Raises:
+            XlsxNonSupportato: valore inatteso (tipo o testo non previsti)
+        """
+        try:
+            indici = {int(testo) for _, _, tipo, testo in celle if tipo == 's'}
+            stringhe = self._stringhe_condivise(indici)
+            return [
+                stringhe[int(testo)] if tipo == 's' else _converti_valore(tipo, testo)
+                for _, _, tipo, testo in celle
+            ]
+        except (ValueError, OverflowError) as e:
+            raise XlsxNonSupportato(f"valore di cella non previsto ({e})")
+
+    def campione(self, foglio: str, nrows: int) -> pd.DataFrame:
+        """
+        Prime nrows righe del foglio, come pd.read_excel(header=None, nrows=nrows, dtype=str).
+        """
+        scansione = _ScansioneFoglio(colonne=None, max_righe=nrows)
+        self._scansiona(foglio, scansione)
+        celle = [c for c in scansione.celle if c[3] != '']
+        if not celle:
+            return pd.DataFrame()
+
+        valori = self._valori(celle)
+        indici_colonna = {}
+        for _, colonna, _, _ in celle:
+            if colonna not in indici_colonna:
+                indici_colonna[colonna] = _indice_colonna(colonna)
+        n_righe = max(c[0] for c in celle)
+        n_colonne = max(indici_colonna.values()) + 1
+
+        griglia: List[List[Optional[str]]] = [[None] * n_colonne for _ in range(n_righe)]
+        for (riga, colonna, _, _), valore in zip(celle, valori):
+            griglia[riga - 1][indici_colonna[colonna]] = valore
+        return pd.DataFrame(griglia)
+
+    def colonna(
+        self,
+        foglio: str,
+        indice: int,
+        riga_intestazione: Optional[int] = None,
+        righe: Optional[Tuple[int, Optional[int]]] = None
+    ) -> pd.Series:
+        """
+        Valori non vuoti di una colonna sotto la riga di intestazione.
+
+        Args:
+            foglio: Nome del foglio
+            indice: Indice posizionale della colonna (0-based)
+            riga_intestazione: Riga intestazione (0-based), None se assente
+            righe: Intervallo [da, a) di righe Excel (1-based) da leggere
+                (a = None: fino alla fine), None = tutto il foglio
+
+        Returns:
+            Serie di stringhe (le celle vuote sono omesse); l'indice è la
+            posizione della riga nel DataFrame che restituirebbe pd.read_excel
+        """
+        lettera = get_column_letter(indice + 1)
+        prima_riga = 1 if riga_intestazione is None else riga_intestazione + 2
+        da_riga, a_riga = righe if righe is not None else (prima_riga, None)
+
+        scansione = _ScansioneFoglio(
+            colonne={lettera}, max_righe=None if a_riga is None else a_riga - 1
+        )
+        self._scansiona(foglio, scansione, da_riga)
+
+        da_riga = max(da_riga, prima_riga)
+        celle = [c for c in scansione.celle if c[0] >= da_riga and c[3] != '']
+        return pd.Series(self._valori(celle), index=[c[0] - prima_riga for c in celle],
+                         dtype=object)
+
+
+def _indice_colonna(lettere: str) -> int:
+    """'A' -> 0, 'AB' -> 27"""
+    indice = 0
+    for lettera in lettere:
+        indice = indice * 26 + (ord(lettera) - 64)
+    return indice - 1
+
+
+def _salta_a_riga(stream: Any, da_riga: int) -> Optional[bytes]:
+    """
+    Consuma lo stream fino alla prima riga con numero >= da_riga.
+
+    Returns:
+        Testa del documento (fino a <sheetData>) seguita dall'XML a partire
+        da quella riga, da passare al parser prima del resto dello stream;
+        None se il salto non è possibile (prefissi, attributi insoliti)
+    """
+    buffer = b''
+    testa = None
+    while True:
+        blocco = stream.read(_DIMENSIONE_BLOCCO)
+        buffer += blocco
+        if testa is None:
+            fine_testa = buffer.find(_APERTURA_SHEET_DATA)
+            if fine_testa < 0:
+                if not blocco or len(buffer) > 16 * _DIMENSIONE_BLOCCO:
+                    return None
+                continue
+            fine_testa += len(_APERTURA_SHEET_DATA)
+            testa, buffer = buffer[:fine_testa], buffer[fine_testa:]
+
+        # Righe senza numero o con attributi in altro ordine: non si può saltare
+        # (la coda di 32 byte viene ricontrollata al giro successivo)
+        if _RE_RIGA_NON_NUMERATA.search(buffer if not blocco else buffer[:-32]):
+            return None
+        for riga in _RE_INIZIO_RIGA.finditer(buffer):
+            if int(riga.group(1)) >= da_riga:
+                return testa + buffer[riga.start():]
+
+        if not blocco:
+            # Nessuna riga nell'intervallo: basta chiudere il documento
+            chiusura = buffer.find(_CHIUSURA_SHEET_DATA)
+            return None if chiusura < 0 else testa + buffer[chiusura:]
+        # Tiene la coda, che potrebbe contenere un marcatore spezzato
+        buffer = buffer[-32:]
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Archivi .zip di export come input
+
+Gli export mensili del gestionale arrivano in un unico .zip con molti
+file. I file contenuti sono indicati con il percorso dell'archivio
+seguito dal nome interno:
+
+    Path("export_2024_05.zip/catalogo/sede1.xlsx")
+
+e vengono letti direttamente dall'archivio, senza estrarli su disco:
+in un processo di lettura come in un altro basta il percorso.
+"""
+import io
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterable, List, Optional, Tuple, Union
+
+
+SUFFIX_ARCHIVIO = '.zip'
+
+
+def membro_archivio(path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Archivio e nome interno di un file contenuto in un .zip.
+
+    Returns:
+        Tupla (percorso dell'archivio, nome del membro), None per i file normali
+    """
+    path = Path(path)
+    for archivio in path.parents:
+        if archivio.suffix.lower() == SUFFIX_ARCHIVIO and archivio.is_file():
+            return archivio, path.relative_to(archivio).as_posix()
+    return None
+
+
+def elenca_archivio(archivio: Path, suffissi: Iterable[str]) -> List[Path]:
+    """
+    File dell'archivio con uno dei suffissi dati, come percorsi di input.
+
+    Le cartelle, i file nascosti e i residui di macOS (__MACOSX, ._*)
+    vengono ignorati; l'ordine è quello dei nomi interni.
+    """
+    suffissi = {s.lower() for s in suffissi}
+    archivio = Path(archivio)
+    with zipfile.ZipFile(archivio) as zf:
+        nomi = sorted(
+            info.filename for info in zf.infolist()
+            if not info.is_dir()
+            and PurePosixPath(info.filename).suffix.lower() in suffissi
+            and not any(parte.startswith(('.', '__MACOSX')) for parte in PurePosixPath(info.filename).parts)
+        )
+    return [archivio.joinpath(*PurePosixPath(nome).parts) for nome in nomi]
+
+
+def espandi_archivi(files: Iterable[Path], suffissi: Iterable[str]) -> List[Path]:
+    """Sostituisce ogni .zip con i file che contiene (vedi elenca_archivio)"""
+    suffissi = list(suffissi)
+    risultato: List[Path] = []
+    for file in files:
+        file = Path(file)
+        if file.suffix.lower() == SUFFIX_ARCHIVIO:
+            risultato.extend(elenca_archivio(file, suffissi))
+        else:
+            risultato.append(file)
+    return risultato
+
+
+def percorso_su_disco(path: Path) -> Path:
+    """Il file stesso o, per un membro, l'archivio che lo contiene"""
+    membro = membro_archivio(path)
+    return Path(path) if membro is None else membro[0]
+
+
+def dimensione_input(path: Path) -> int:
+    """Byte di un file di input (per un membro: dimensione non compressa)"""
+    membro = membro_archivio(path)
+    if membro is None:
+        return Path(path).stat().st_size
+    archivio, nome = membro
+    with zipfile.ZipFile(archivio) as zf:
+        return zf.getinfo(nome).file_size
+
+
+def apri_binario(path: Path) -> BinaryIO:
+    """Stream binario sequenziale del contenuto (file normale o membro)"""
+    membro = membro_archivio(path)
+    if membro is None:
+        return open(path, 'rb')
+    archivio, nome = membro
+    zf = zipfile.ZipFile(archivio)
+    try:
+        stream = zf.open(nome)
+    except KeyError:
+        zf.close()
+        raise FileNotFoundError(f"{nome} non trovato in {archivio.name}")
+    # Lo ZipFile si chiude con lo stream (ZipExtFile tiene un riferimento al file)
+    zf.close()
+    return stream
+
+
+def sorgente_input(path: Path) -> Union[Path, io.BytesIO]:
+    """
+    Sorgente da passare ai lettori (pd.ExcelFile, LettoreXlsx).
+
+    I file normali si aprono dal percorso. Un membro viene letto in un
+    buffer in memoria: un .xlsx è a sua volta uno zip e va letto ad
+    accesso casuale, che uno stream compresso non permette.
+    """
+    if membro_archivio(path) is None:
+        return Path(path)
+    with apri_binario(path) as stream:
+        return io.BytesIO(stream.read())